@@ -0,0 +1,33 @@
+"""Add phase_array table, that stores phases of resonance by arrays.
+
+Revision ID: 4a1f6e2c9b37
+Revises: 26154372b03
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4a1f6e2c9b37'
+down_revision = '26154372b03'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+from sqlalchemy.dialects.postgresql import ARRAY
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'phase_array',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('resonance_id', sa.Integer, sa.ForeignKey('resonance.id'), nullable=False),
+        sa.Column('years', ARRAY(sa.Float), nullable=False),
+        sa.Column('values', ARRAY(sa.Float), nullable=False),
+    )
+    op.create_unique_constraint('uc_phase_array_resonance_id', 'phase_array', ['resonance_id'])
+
+
+def downgrade():
+    op.drop_constraint('uc_phase_array_resonance_id', 'phase_array')
+    op.drop_table('phase_array')
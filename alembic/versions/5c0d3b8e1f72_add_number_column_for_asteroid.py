@@ -0,0 +1,34 @@
+"""Add indexed number column for asteroid table and indexes for foreign keys of resonances.
+
+Revision ID: 5c0d3b8e1f72
+Revises: 4a1f6e2c9b37
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5c0d3b8e1f72'
+down_revision = '4a1f6e2c9b37'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('asteroid', sa.Column('number', sa.Integer, nullable=True))
+    op.execute("UPDATE asteroid SET number = substr(name, 2)::integer WHERE name ~ '^A\\d+$'")
+    op.create_index('ix_asteroid_number_name', 'asteroid', ['number', 'name'])
+    op.create_index('ix_resonance_second_body_id', 'resonance', ['second_body_id'])
+    op.create_index('ix_resonance_small_body_id', 'resonance', ['small_body_id'])
+    op.create_index('ix_two_body_resonance_small_body_id', 'two_body_resonance',
+                    ['small_body_id'])
+
+
+def downgrade():
+    op.drop_index('ix_two_body_resonance_small_body_id', 'two_body_resonance')
+    op.drop_index('ix_resonance_small_body_id', 'resonance')
+    op.drop_index('ix_resonance_second_body_id', 'resonance')
+    op.drop_index('ix_asteroid_number_name', 'asteroid')
+    op.drop_column('asteroid', 'number')
@@ -0,0 +1,34 @@
+"""Add resonance_progress table, that is journal of search of librations.
+
+Revision ID: 8d2e4f6a1b90
+Revises: 5c0d3b8e1f72
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '8d2e4f6a1b90'
+down_revision = '5c0d3b8e1f72'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'resonance_progress',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('asteroid_name', sa.String(255), nullable=False),
+        sa.Column('planets', sa.String(255), nullable=False),
+        sa.Column('resonance_id', sa.Integer, nullable=False),
+        sa.Column('outcome', sa.Integer, nullable=False),
+    )
+    op.create_unique_constraint('uc_planets_resonance_id', 'resonance_progress',
+                                ['planets', 'resonance_id'])
+
+
+def downgrade():
+    op.drop_constraint('uc_planets_resonance_id', 'resonance_progress')
+    op.drop_table('resonance_progress')
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Compares latency of getting resonances for block of asteroids by number, that is computed from
+name of asteroid, and by indexed number column. Tables are created in separate schema by
+generate_series and the schema is dropped after measuring.
+
+Usage: bench-asteroid-number.py [RESONANCE_COUNT] [RESONANCES_PER_ASTEROID]
+"""
+import sys
+import time
+
+from resonances.entities.dbutills import engine
+
+SCHEMA = 'bench_asteroid_number'
+BLOCK = (100000, 100100)
+
+QUERIES = [
+    ('name expression', """
+        SELECT r.id, a.name FROM {0}.resonance r
+        JOIN {0}.asteroid a ON r.small_body_id = a.id
+        WHERE a.name ~ '^A\\d*$'
+            AND CAST(substr(a.name, 2, length(a.name) - 1) AS INTEGER) >= {1}
+            AND CAST(substr(a.name, 2, length(a.name) - 1) AS INTEGER) < {2}
+        ORDER BY CAST(substr(a.name, 2, length(a.name) - 1) AS INTEGER)
+    """),
+    ('number column', """
+        SELECT r.id, a.name FROM {0}.resonance r
+        JOIN {0}.asteroid a ON r.small_body_id = a.id
+        WHERE a.number >= {1} AND a.number < {2}
+        ORDER BY a.number, a.name
+    """),
+]
+
+
+def _prepare(conn, resonance_count: int, per_asteroid: int):
+    asteroid_count = resonance_count // per_asteroid
+    conn.execute('CREATE SCHEMA %s' % SCHEMA)
+    conn.execute("""
+        CREATE TABLE {0}.asteroid AS
+        SELECT x AS id, 'A' || x AS name, x AS number, 1 AS longitude_coeff,
+            1 AS perihelion_longitude_coeff, 2.5 + x * 1e-7 AS axis
+        FROM generate_series(1, {1}) x
+    """.format(SCHEMA, asteroid_count))
+    conn.execute("""
+        CREATE TABLE {0}.resonance AS
+        SELECT x AS id, 1 AS first_body_id, 2 AS second_body_id,
+            (x - 1) / {1} + 1 AS small_body_id
+        FROM generate_series(1, {2}) x
+    """.format(SCHEMA, per_asteroid, asteroid_count * per_asteroid))
+    conn.execute('ALTER TABLE %s.asteroid ADD PRIMARY KEY (id)' % SCHEMA)
+    conn.execute('ALTER TABLE %s.resonance ADD PRIMARY KEY (id)' % SCHEMA)
+    conn.execute('CREATE INDEX ON %s.asteroid (number, name)' % SCHEMA)
+    conn.execute('CREATE INDEX ON %s.resonance (small_body_id)' % SCHEMA)
+    conn.execute('ANALYZE %s.asteroid' % SCHEMA)
+    conn.execute('ANALYZE %s.resonance' % SCHEMA)
+
+
+def main():
+    resonance_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+    per_asteroid = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    conn = engine.connect()
+    try:
+        start = time.time()
+        _prepare(conn, resonance_count, per_asteroid)
+        print('Tables with %i resonances are prepared in %.1f s' %
+              (resonance_count, time.time() - start))
+        for title, query in QUERIES:
+            query = query.format(SCHEMA, *BLOCK)
+            plan = [x[0] for x in conn.execute('EXPLAIN ANALYZE %s' % query)]
+            print('\n%s:\n%s' % (title, '\n'.join(plan)))
+    finally:
+        conn.execute('DROP SCHEMA IF EXISTS %s CASCADE' % SCHEMA)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Module contains kit for caching of parsed data in binary format. Every cached file is related to
+source file by absolute path, time of modification and size of the source.
+"""
+import glob
+import hashlib
+import os
+from os.path import isabs
+from os.path import join as opjoin
+from os.path import exists as opexists
+from typing import List
+
+import numpy as np
+
+from resonances.settings import Config
+
+CONFIG = Config.get_params()
+PROJECT_DIR = Config.get_project_dir()
+_folder = CONFIG['cache']['dir']
+CACHE_DIR = _folder if isabs(_folder) else opjoin(PROJECT_DIR, _folder)
+AEI_DTYPE = np.dtype(CONFIG['cache']['aei_dtype'])
+AEI_SUFFIX = '.aei.npy'
+
+
+def _get_key(for_path: str) -> str:
+    return hashlib.sha1(os.path.abspath(for_path).encode('utf-8')).hexdigest()
+
+
+def get_cache_path(for_path: str, suffix: str) -> str:
+    """Builds path of cached file for pointed source file. If source is changed, path will be
+    changed too.
+
+    :param for_path: path to source file.
+    :param suffix: suffix of cached file.
+    """
+    stat = os.stat(for_path)
+    return opjoin(CACHE_DIR, '%s-%i-%i%s' % (_get_key(for_path), stat.st_mtime_ns,
+                                               stat.st_size, suffix))
+
+
+def remove_stale(for_path: str, suffix: str):
+    """Removes cached files of previous versions of pointed source file."""
+    actual_path = get_cache_path(for_path, suffix)
+    for path in glob.iglob(opjoin(CACHE_DIR, '%s-*%s' % (_get_key(for_path), suffix))):
+        if path != actual_path:
+            os.remove(path)
+
+
+def save_array(data: np.ndarray, to_path: str):
+    """Saves array to .npy file. File is written to temporary file at first, so other processes
+    never read incomplete data.
+    """
+    if not opexists(CACHE_DIR):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+    temp_path = '%s.%i.tmp' % (to_path, os.getpid())
+    with open(temp_path, 'wb') as f:
+        np.save(f, data)
+    os.replace(temp_path, to_path)
+
+
+def load_aei(aei_path: str) -> np.ndarray:
+    """Loads orbital elements of aei file from cache. Loaded array is memory-mapped and
+    read-only.
+
+    :param aei_path: path to aei file.
+    :return: matrix of orbital elements or None if cache doesn't contain it.
+    """
+    cache_path = get_cache_path(aei_path, AEI_SUFFIX)
+    if not opexists(cache_path):
+        return None
+    return np.load(cache_path, mmap_mode='r')
+
+
+def save_aei(aei_path: str, data: np.ndarray) -> str:
+    """Saves orbital elements of aei file to cache. Every column of saved matrix is stored
+    contiguously.
+
+    :param aei_path: path to aei file.
+    :param data: matrix of orbital elements.
+    :return: path to cached file.
+    """
+    cache_path = get_cache_path(aei_path, AEI_SUFFIX)
+    remove_stale(aei_path, AEI_SUFFIX)
+    save_array(np.asfortranarray(data, dtype=AEI_DTYPE), cache_path)
+    return cache_path
+
+
+def clear() -> List[str]:
+    """Removes all cached files.
+
+    :return: paths of removed files.
+    """
+    paths = glob.glob(opjoin(CACHE_DIR, '*'))
+    for path in paths:
+        os.remove(path)
+    return paths
@@ -1,8 +1,16 @@
 import logging
-from typing import List, Tuple, Iterable
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from os.path import exists as opexists
+from typing import List, Tuple, Iterable, Dict
 from typing import Generator
 
-from resonances.entities import build_resonance, BodyNumberEnum
+import numpy as np
+from sqlalchemy.engine import Connection
+from resonances import cache
+from resonances.entities import build_resonances, BodyNumberEnum
+from resonances.entities import ResonanceFactory
 from resonances.entities import get_resonance_factory
 from resonances.settings import Config
 from os.path import join as opjoin
@@ -11,7 +19,16 @@ CONFIG = Config.get_params()
 PROJECT_DIR = Config.get_project_dir()
 SKIP_LINES = CONFIG['catalog']['astdys']['skip']
 AXIS_COLUMNS = {BodyNumberEnum.two: 4, BodyNumberEnum.three: 6}
+# Bounds of search windows are widened by it against rounding errors.
+AXIS_TOLERANCE = 1e-9
 ASTDYS = opjoin(PROJECT_DIR, CONFIG['catalog']['file'])
+CATALOG_DATA_SUFFIX = '.catalog-data.npy'
+# Orbital elements of asteroid in order of list from get_asteroid_data, argument of
+# perihelion goes before longitude of node like in catalog with swapped columns. Other
+# columns of catalog are ignored.
+CATALOG_FIELDS = ['epoch', 'a', 'e', 'i', 'peri', 'node', 'M', 'H', 'G']
+# Number of asteroids, that are converted to lists at once by asteroid_gen.
+BLOCK_SIZE = 1000
 
 
 def read_header(from_catalog: str) -> Iterable[str]:
@@ -22,6 +39,21 @@ def read_header(from_catalog: str) -> Iterable[str]:
             yield line[:-1]
 
 
+class ApostropheException(Exception):
+    pass
+
+
+class SpaceException(Exception):
+    pass
+
+
+class ColumnCountException(Exception):
+    pass
+
+
+AsteroidData = Tuple[str, List[float]]
+
+
 def find_by_number(number: int, catalog_path: str = ASTDYS) -> List[float]:
     """Find asteroid parameters by number in catalog.
 
@@ -30,44 +62,32 @@ def find_by_number(number: int, catalog_path: str = ASTDYS) -> List[float]:
     """
 
     try:
-        with open(catalog_path, 'r') as fd:
-            for i, line in enumerate(fd):
-                if i < number - 1 + SKIP_LINES:
-                    continue
-
-                arr = line.split()[1:]
-                arr = [float(x) for x in arr]
-                arr[4], arr[5] = arr[5], arr[4]
-                return arr
+        data = load_catalog(catalog_path)
+        if not 0 < number <= data.shape[0]:
+            return None
+        return get_asteroid_data(data[number - 1:number])[0][1]
     except FileNotFoundError:
         link = 'http://hamilton.dm.unipi.it/~astdys2/catalogs/allnum.cat'
         logging.error('File from astdys doesn\'t exist try this %s' % link)
         exit(-1)
 
 
-class ApostropheException(Exception):
-    pass
-
-
-class SpaceException(Exception):
-    pass
-
-
-AsteroidData = Tuple[str, List[float]]
+def find_by_name(name: str, catalog_path: str = ASTDYS) -> AsteroidData:
+    """Find asteroid parameters by name in catalog.
 
-
-def _gen_data(from_catalog: str) -> Iterable[str]:
-    with open(from_catalog, 'r') as fd:
-        for i, line in enumerate(fd):
-            if i < SKIP_LINES:
-                continue
-            yield line
+    :param name: name of asteroid.
+    :return: name and parameters of asteroid or None if catalog doesn't contain it.
+    """
+    data = load_catalog(catalog_path)
+    positions = np.nonzero(data['name'] == name)[0]
+    if not positions.shape[0]:
+        return None
+    return get_asteroid_data(data[positions[0]:positions[0] + 1])[0]
 
 
 def asteroid_names_gen(from_catalog: str) -> Iterable[str]:
-    for line in _gen_data(from_catalog):
-        name, _ = _parse_asteroid_name(line)
-        yield name
+    for name in load_catalog(from_catalog)['name']:
+        yield str(name)
 
 
 def _parse_asteroid_name(line: str) -> Tuple[str, int]:
@@ -80,42 +100,147 @@ def _parse_asteroid_name(line: str) -> Tuple[str, int]:
     return asteroid_name, pos
 
 
-def _parse_asteroid_data(line: str) -> AsteroidData:
-    asteroid_name, pos = _parse_asteroid_name(line)
-    arr = line[pos:-1].split()[1:]
-    arr = [float(x) for x in arr]
-    arr[4], arr[5] = arr[5], arr[4]
-    return asteroid_name, arr
-
-
 def asteroid_gen(catalog_path: str = ASTDYS, start: int = None, stop: int = None)\
         -> Iterable[AsteroidData]:
+    """Generates asteroids of catalog from pointed sequence number. Asteroids are taken from
+    array of load_catalog.
+
+    :param catalog_path:
+    :param start: sequence number of first asteroid, it starts from 1.
+    :param stop: sequence number of asteroid after last one.
+    """
+    for block in catalog_block_gen(BLOCK_SIZE, catalog_path, start, stop):
+        for asteroid in get_asteroid_data(block):
+            yield asteroid
+
+
+def load_catalog(catalog_path: str = ASTDYS) -> np.ndarray:
+    """Gets all asteroids of catalog as structured array with field name and fields from
+    CATALOG_FIELDS. Element i relates to asteroid with sequence number i + 1. Catalog is parsed
+    once and array is stored to cache, it is parsed again if catalog is changed.
+
+    :param catalog_path: path to catalog.
+    :return: read-only structured array.
+    """
+    stat = os.stat(catalog_path)
+    return _load_catalog(os.path.abspath(catalog_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=2)
+def _load_catalog(catalog_path: str, mtime: int, size: int) -> np.ndarray:
+    """
+    :param catalog_path: absolute path to catalog.
+    :param mtime: time of modification of catalog, it is part of key of cache.
+    :param size: size of catalog, it is part of key of cache.
+    :raises ColumnCountException: if some line of catalog has less columns than
+    CATALOG_FIELDS.
+    """
+    data_path = cache.get_cache_path(catalog_path, CATALOG_DATA_SUFFIX)
+    if not opexists(data_path):
+        cache.remove_stale(catalog_path, CATALOG_DATA_SUFFIX)
+        cache.save_array(_parse_catalog(catalog_path), data_path)
+    return np.load(data_path, mmap_mode='r')
+
+
+def _parse_catalog(catalog_path: str) -> np.ndarray:
+    names = []  # type: List[str]
+    rows = []  # type: List[str]
     with open(catalog_path, 'r') as fd:
         for i, line in enumerate(fd):
-            diff = i - SKIP_LINES + 1
-            if i < SKIP_LINES or start is not None and diff < start:
+            if i < SKIP_LINES:
                 continue
+            name, pos = _parse_asteroid_name(line)
+            names.append(name)
+            rows.append(' '.join(line[pos + 1:].split()[:len(CATALOG_FIELDS)]))
+
+    values = np.fromstring(' '.join(rows), sep=' ')
+    if values.shape[0] != len(names) * len(CATALOG_FIELDS):
+        raise ColumnCountException('Lines of %s must have at least %i columns after name' %
+                                   (catalog_path, len(CATALOG_FIELDS)))
+    values = values.reshape(len(names), len(CATALOG_FIELDS))
+    values[:, [4, 5]] = values[:, [5, 4]]
+
+    name_length = max([len(x) for x in names] or [1])
+    data = np.zeros(len(names), dtype=[('name', 'U%i' % name_length)] +
+                    [(x, 'f8') for x in CATALOG_FIELDS])
+    data['name'] = names
+    for i, field in enumerate(CATALOG_FIELDS):
+        data[field] = values[:, i]
+    return data
+
+
+def catalog_block_gen(buffer_size: int, catalog_path: str = ASTDYS, start: int = None,
+                      stop: int = None) -> Iterable[np.ndarray]:
+    """Generates blocks of asteroids as views of array from load_catalog.
+
+    :param buffer_size: number of asteroids in block.
+    :param catalog_path:
+    :param start: sequence number of first asteroid, it starts from 1.
+    :param stop: sequence number of asteroid after last one.
+    """
+    data = load_catalog(catalog_path)
+    begin = max(start or 1, 1) - 1
+    end = data.shape[0] if stop is None else min(max(stop - 1, 0), data.shape[0])
+    for i in range(begin, end, buffer_size):
+        yield data[i:min(i + buffer_size, end)]
 
-            if stop is not None and diff >= stop:
-                break
 
-            asteroid_data = _parse_asteroid_data(line)
-            yield asteroid_data
+def get_asteroid_data(block: np.ndarray) -> List[AsteroidData]:
+    """Converts asteroids from array of catalog to list of names and lists of orbital elements.
+
+    :param block: part of array from load_catalog.
+    """
+    elements = np.column_stack([block[x] for x in CATALOG_FIELDS])
+    return list(zip(block['name'].tolist(), elements.tolist()))
 
 
 def asteroid_list_gen(buffer_size: int, catalog_path: str = ASTDYS, start: int = None,
                       stop: int = None) -> Generator[List[AsteroidData], None, None]:
-    id_buffer = []
-    for i, asteroid_data in enumerate(asteroid_gen(catalog_path, start, stop)):
-        diff = i + 1
-        id_buffer.append(asteroid_data)
+    for block in catalog_block_gen(buffer_size, catalog_path, start, stop):
+        yield get_asteroid_data(block)
+
+
+class ResonanceTable:
+    """
+    Class contains parsed lines of resonance table. Lines are indexed by semi major axis of
+    asteroid, so resonances near pointed axis are found by binary search.
+    """
+    def __init__(self, from_source: Iterable[str], body_count: BodyNumberEnum):
+        axis_column = AXIS_COLUMNS[body_count]
+        self._lines = [x.split() for x in from_source]
+        for line_data in self._lines:
+            assert (body_count == BodyNumberEnum.three and len(line_data) > 5 or
+                    body_count == BodyNumberEnum.two)
+
+        index = np.zeros(len(self._lines), dtype=[('line', 'i8'), ('axis', 'f8')])
+        index['line'] = np.arange(len(self._lines))
+        index['axis'] = [float(x[axis_column]) for x in self._lines]
+        self._index = np.sort(index, order=['axis', 'line'])
 
-        if diff % buffer_size == 0:
-            yield id_buffer
-            id_buffer.clear()
+    @property
+    def lines(self) -> List[List[str]]:
+        return self._lines
 
-    if id_buffer:
-        yield id_buffer
+    def get_line_numbers(self, axis_values: np.ndarray, axis_swing: float) -> List[np.ndarray]:
+        """Finds resonances for every pointed semi major axis. Resonance is suitable if
+        difference between axis of it and pointed axis is not greater than swing.
+
+        :param axis_values: semi major axises of asteroids.
+        :param axis_swing:
+        :return: numbers of suitable lines for every axis in original order of table.
+        """
+        axis_values = np.asarray(axis_values, dtype=np.float64)
+        sorted_axises = self._index['axis']
+        starts = np.searchsorted(sorted_axises, axis_values - axis_swing - AXIS_TOLERANCE, 'left')
+        stops = np.searchsorted(sorted_axises, axis_values + axis_swing + AXIS_TOLERANCE, 'right')
+
+        res = []
+        for axis, start, stop in zip(axis_values, starts, stops):
+            window = self._index[start:stop]
+            numbers = window['line'][np.abs(window['axis'] - axis) <= axis_swing]
+            numbers.sort()
+            res.append(numbers)
+        return res
 
 
 class PossibleResonanceBuilder:
@@ -124,30 +249,67 @@ class PossibleResonanceBuilder:
         self.axis_swing = axis_swing
         self.catalog_path = catalog_path
 
-    def build(self, from_source: Iterable, asteroid: AsteroidData) -> List[int]:
+    def get_table(self, from_source: Iterable) -> ResonanceTable:
+        """Returns parsed resonance table. Pointed data will be parsed if it is not parsed yet.
+
+        :param from_source: iterable data with resonance matrix or parsed table.
         """
-        Saves resonances to database, that are possible for pointed asteroid.
+        if isinstance(from_source, ResonanceTable):
+            return from_source
+        return ResonanceTable(from_source, BodyNumberEnum(len(self.planets) + 1))
+
+    def get_factories(self, from_source: Iterable, asteroid: AsteroidData) \
+            -> List[ResonanceFactory]:
+        """
+        Makes factories of resonances, that are possible for pointed asteroid.
         Resonance is considering if it's semi major axis similar to semi major
         axis of asteroid from catalog. Them compares with some swing, which
         which pointed in settings.
 
-        :param from_source: iterable data with resonance matrix.
+        :param from_source: iterable data with resonance matrix or parsed table.
+        :param asteroid: asteroid's name and asteroid's data from catalog.
+        :return: list of factories of resonances.
+        """
+        return self._get_factories(self.get_table(from_source), [asteroid])[0]
+
+    def _get_factories(self, table: ResonanceTable, asteroids: List[AsteroidData]) \
+            -> List[List[ResonanceFactory]]:
+        axis_values = [x[1][1] for x in asteroids]
+        line_numbers = table.get_line_numbers(axis_values, self.axis_swing)
+        return [[get_resonance_factory(self.planets, table.lines[x], asteroid[0]) for x in numbers]
+                for asteroid, numbers in zip(asteroids, line_numbers)]
+
+    def build(self, from_source: Iterable, asteroid: AsteroidData, conn: Connection = None) \
+            -> List[int]:
+        """
+        Saves resonances to database, that are possible for pointed asteroid.
+
+        :param from_source: iterable data with resonance matrix or parsed table.
         :param asteroid: asteroid's name and asteroid's data from catalog.
+        :param conn: connection, new connection will be taken from pool if it is not pointed.
         :return: list of id numbers of resonances.
         """
-        possible_resonances = []
-        asteroid_parameters = asteroid[1]
-        asteroid_axis = asteroid_parameters[1]
-        for line in from_source:
-            line_data = line.split()
+        return build_resonances(self.get_factories(from_source, asteroid), conn)
 
-            body_count = BodyNumberEnum(len(self.planets) + 1)
-            assert (body_count == BodyNumberEnum.three and len(line_data) > 5 or
-                    body_count == BodyNumberEnum.two)
-            resonant_asteroid_axis = float(line_data[AXIS_COLUMNS[body_count]])
-            if abs(resonant_asteroid_axis - asteroid_axis) <= self.axis_swing:
-                resonance_factory = get_resonance_factory(
-                    self.planets, line_data, asteroid[0])
-                possible_resonances.append(build_resonance(resonance_factory))
+    def build_block(self, from_source: Iterable, asteroids: List[AsteroidData],
+                    conn: Connection = None) -> Dict[str, List[int]]:
+        """
+        Saves resonances, that are possible for pointed asteroids, by few bulk queries.
 
-        return possible_resonances
+        :param from_source: iterable data with resonance matrix or parsed table.
+        :param asteroids: list of asteroid's names and asteroid's data from catalog.
+        :param conn: connection, new connection will be taken from pool if it is not pointed.
+        :return: dictionary, where keys are names of asteroids and values are lists of id
+        numbers of resonances.
+        """
+        table = self.get_table(from_source)
+        factories = []  # type: List[ResonanceFactory]
+        asteroid_names = []  # type: List[str]
+        for asteroid, asteroid_factories in zip(asteroids, self._get_factories(table, asteroids)):
+            factories += asteroid_factories
+            asteroid_names += [asteroid[0]] * len(asteroid_factories)
+
+        res = OrderedDict((x[0], []) for x in asteroids)  # type: Dict[str, List[int]]
+        for asteroid_name, resonance_id in zip(asteroid_names, build_resonances(factories, conn)):
+            res[asteroid_name].append(resonance_id)
+        return res
@@ -18,7 +18,7 @@ from .internal import report_interval_options
 from resonances.shortcuts import PLANETS
 
 LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
-PHASE_STORAGE = ['REDIS', 'DB', 'FILE']
+PHASE_STORAGE = ['REDIS', 'DB', 'FILE', 'BINARY', 'DB_ARRAY']
 
 CONFIG = Config.get_params()
 PROJECT_DIR = Config.get_project_dir()
@@ -49,11 +49,15 @@ def cli(loglevel: str = 'DEBUG', logfile: str = None):
 @click.option('--aei-path', '-p', multiple=False, default=opjoin(PROJECT_DIR, INTEGRATOR_DIR),
               type=Path(resolve_path=True),
               help='Path where will be stored aei files. It can be tar.gz archive.')
-def calc(start: int, stop: int, from_day: float, to_day: float, aei_path: str, catalog: str):
+@click.option('--jobs', '-j', default=1, type=int, callback=validate_positivie_int,
+              help='Number of integrator launches, that compute blocks of asteroids in own'
+                   ' scratch directories at the same time.')
+def calc(start: int, stop: int, from_day: float, to_day: float, aei_path: str, catalog: str,
+         jobs: int):
     from resonances.commands import calc as _calc
     from resonances.catalog import asteroid_list_gen
     asteroids = asteroid_list_gen(STEP, catalog_path=catalog, start=start, stop=stop)
-    _calc(asteroids, from_day, to_day, aei_path)
+    _calc(asteroids, from_day, to_day, aei_path, jobs)
 
 
 FIND_HELP_PREFIX = 'If true, the application will'
@@ -84,12 +88,14 @@ def load_resonances(start: int, stop: int, file: str, axis_swing: float,
     from resonances.catalog import PossibleResonanceBuilder
     from resonances.commands import load_resonances as _load_resonances
     from resonances.catalog import asteroid_list_gen
+    from resonances.entities.dbutills import pool_metrics
     _asteroid_list_gen = asteroid_list_gen(STEP, start=start, stop=stop, catalog_path=catalog)
     builder = PossibleResonanceBuilder(planets, axis_swing)
     if file == RESONANCE_FILEPATH:
         logging.info('%s will be used as source of integers' % file)
     for asteroid_buffer in _asteroid_list_gen:
         _load_resonances(file, asteroid_buffer, builder, gen)
+    pool_metrics.log()
 
 
 @cli.command(
@@ -108,36 +114,53 @@ def load_resonances(start: int, stop: int, file: str, axis_swing: float,
               help='%s librations only from database, it won\'t compute them from phases' %
                    FIND_HELP_PREFIX)
 @click.option('--phase-storage', '-s', default='FILE', type=click.Choice(PHASE_STORAGE),
-              help='will save phases to redis or postgres or file')
+              help='will save phases to redis or postgres or text file or binary file.'
+                   ' DB_ARRAY stores all phases of resonance in one row of postgres')
 @aei_path_options()
 @click.option('--clear', '-c', type=bool, is_flag=True,
               help='Will clear resonance phases after search librations.')
 @click.option('--clear-s3', type=bool, is_flag=True,
               help='Will clear downloaded s3 files after search librations.')
 @click.option('--verbose', '-v', type=bool, is_flag=True, help='Shows progress bar.')
+@click.option('--workers', '-w', default=1, type=int, callback=validate_positivie_int,
+              help='Number of processes, that will search librations in blocks of asteroids.')
+@click.option('--resume', is_flag=True,
+              help='Skips resonances, that were processed by previous runs.')
 @click.argument('planets', type=click.Choice(PLANETS), nargs=-1)
 def find(start: int, stop: int, from_day: float, to_day: float, reload_resonances: bool,
          recalc: bool, is_current: bool, phase_storage: str, aei_paths: Tuple[str, ...],
-         recursive: bool, clear: bool, clear_s3: bool, planets: Tuple[str], verbose: bool):
+         recursive: bool, clear: bool, clear_s3: bool, planets: Tuple[str], verbose: bool,
+         workers: int, resume: bool):
     from resonances.commands import load_resonances as _load_resonances
     from resonances.datamining import PhaseStorage
     from resonances.commands import calc as _calc
     from resonances.commands import LibrationFinder
     from resonances.catalog import asteroid_list_gen
+    from resonances.entities.dbutills import pool_metrics
 
-    finder = LibrationFinder(planets, recursive, clear, clear_s3, is_current,
-                             PhaseStorage(PHASE_STORAGE.index(phase_storage)), verbose)
-    if start == stop == -1 and aei_paths:
-        finder.find_by_file(aei_paths)
+    from resonances.datamining.orbitalelements.collection import AEIValueError
 
-    if recalc:
-        asteroids = asteroid_list_gen(STEP, start=start, stop=stop)
-        _calc(asteroids, from_day, to_day)
-    for i in range(start, stop, STEP):
-        end = i + STEP if i + STEP < stop else stop
-        if reload_resonances:
-            _load_resonances(RESONANCE_FILEPATH, i, end, planets)
-        finder.find(i, end, aei_paths)
+    finder = LibrationFinder(planets, recursive, clear, clear_s3, is_current,
+                             PhaseStorage(PHASE_STORAGE.index(phase_storage)), verbose, resume)
+    try:
+        if start == stop == -1 and aei_paths:
+            finder.find_by_file(aei_paths)
+
+        if recalc:
+            asteroids = asteroid_list_gen(STEP, start=start, stop=stop)
+            _calc(asteroids, from_day, to_day)
+        for i in range(start, stop, STEP):
+            end = i + STEP if i + STEP < stop else stop
+            if reload_resonances:
+                _load_resonances(RESONANCE_FILEPATH, i, end, planets)
+            if workers == 1:
+                finder.find(i, end, aei_paths)
+        if workers > 1 and start < stop:
+            finder.find_parallel(start, stop, STEP, aei_paths, workers)
+    except AEIValueError as e:
+        logging.error(str(e))
+        exit(-1)
+    pool_metrics.log()
 
 
 @cli.command(help='Makes complete integration for asteroids pointed in catalog with pointed '
@@ -151,19 +174,24 @@ def find(start: int, stop: int, from_day: float, to_day: float, reload_resonance
 @click.argument('planets', type=click.Choice(PLANETS + ['all']), nargs=-1)
 @click.option('--integers', '-i', type=str, callback=validate_integer_expression, default=None,
               help='Examples: \'>1 1\', \'>=3 <5\', \'1 -1 *\'')
-@click.option('--continue', '-c', 'continue_', is_flag=True)
+@click.option('--continue', '-c', 'continue_', is_flag=True,
+              help='Continues previous integration, blocks of asteroids with found librations'
+                   ' are skipped.')
+@click.option('--resume', is_flag=True,
+              help='Skips resonances, that were processed by previous runs.')
 def integrate(from_day: float, to_day: float, planets: Tuple[str], catalog: str,
-              axis_swing: float, integers: List[str], continue_: bool):
+              axis_swing: float, integers: List[str], continue_: bool, resume: bool):
     assert 0 < len(planets) < 3
     from resonances.commands.integrate import integrate as _integrate
-    _integrate(from_day, to_day, planets, catalog, axis_swing, integers, continue_)
+    _integrate(from_day, to_day, planets, catalog, axis_swing, integers, continue_, resume)
 
 
 @cli.command(help='Build graphics for asteroids in pointed interval, that have libration.'
                   ' Libration can be created by command \'find\'.')
 @click.option('--asteroid', '-a', 'asteroids', type=str, multiple=True, help='Name of asteroid')
 @click.option('--phase-storage', default='FILE', type=click.Choice(PHASE_STORAGE),
-              help='will load phases for plotting from redis or postgres or file')
+              help='will load phases for plotting from redis or postgres or text file or'
+                   ' binary file or arrays in postgres')
 @click.option('--only-librations', default=False, type=bool,
               help='flag indicates about plotting only for resonances, that librates')
 @click.option('--output', '-o', default=os.getcwd(), type=Path(resolve_path=True),
@@ -183,6 +211,25 @@ def plot(asteroids: tuple, phase_storage: str, only_librations: bool,
           only_librations, integers, aei_paths, recursive, planets, output, build_phase)
 
 
+@cli.command(name='cache-aei',
+             help='Converts aei files from pointed folders to binary format. Commands will read'
+                  ' aei files from converted copy if file was not changed.')
+@aei_path_options()
+def cache_aei(aei_paths: Tuple[str, ...], recursive: bool):
+    from resonances.commands import cache_aei as _cache_aei
+    _cache_aei(aei_paths, recursive)
+
+
+@cli.command(name='migrate-phases',
+             help='Converts text files of phases from pointed folders to binary format, that'
+                  ' is used by --phase-storage=BINARY. Folder from config is used by default.')
+@click.argument('phase_dirs', nargs=-1, type=click.Path(exists=True, resolve_path=True))
+@click.option('--remove', is_flag=True, help='Removes converted text files.')
+def migrate_phases(phase_dirs: Tuple[str, ...], remove: bool):
+    from resonances.commands import migrate_phases as _migrate_phases
+    _migrate_phases(phase_dirs, remove)
+
+
 @cli.command(name='clear-phases',
              help='Clears phases from database and Redis, which related to '
                   'pointed asteroids.')
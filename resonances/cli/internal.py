@@ -6,6 +6,8 @@ from os.path import join as opjoin
 
 import click
 from resonances.shortcuts import is_s3
+from resonances.shortcuts import IntegerExpressionException
+from resonances.shortcuts import parse_integer_expression
 
 from resonances.entities.resonance import BodyNumberEnum
 from resonances.settings import Config
@@ -13,6 +15,7 @@ from resonances.settings import Config
 CONFIG = Config.get_params()
 PROJECT_DIR = Config.get_project_dir()
 INTEGRATOR_DIR = CONFIG['integrator']['dir']
+_INTEGER_PATTERN = re.compile(r'-?\d+$')
 
 
 def _unite_decorators(*decorators):
@@ -30,13 +33,6 @@ def validate_positivie_int(ctx: click.Context, option: click.Option, value):
     return value
 
 
-def _try_to_int(val: str, option: click.Option):
-    try:
-        int(val)
-    except ValueError:
-        raise click.BadOptionUsage(option, 'Invalid integers.')
-
-
 def validate_or_set_body_count(ctx: click.Context, option: click.Option, value: str):
     ints = ctx.params.get('integers', None)
     if type(ints) == str:
@@ -52,6 +48,9 @@ def validate_or_set_body_count(ctx: click.Context, option: click.Option, value:
 
 
 def validate_integer_expression(ctx: click.Context, option: click.Option, value: str):
+    """Validates expressions of integers, see parse_integer_expression. Bare integer means
+    equality to it.
+    """
     if not value:
         return value
     vals = value.split()
@@ -62,22 +61,13 @@ def validate_integer_expression(ctx: click.Context, option: click.Option, value:
     except ValueError:
         raise click.BadOptionUsage(option, error_message)
 
-    bool_ops = ['<', '>', '<=', '>=']
     for i, val in enumerate(vals):
-        if val == '*':
-            continue
-
-        res = re.search('([0-9])', val)
-        if res:
-            number_part_start = res.start()
-            symbol = val[:number_part_start]
-            _try_to_int(val[number_part_start:], option)
-            if not symbol or symbol == '-':
-                vals[i] = '==%s' % val
-            elif symbol not in bool_ops:
-                raise click.BadOptionUsage(option, 'Invalid operators before integers.')
-        else:
-            raise click.BadOptionUsage(option, error_message)
+        if _INTEGER_PATTERN.match(val):
+            vals[i] = '==%s' % val
+        try:
+            parse_integer_expression(vals[i])
+        except IntegerExpressionException as e:
+            raise click.BadOptionUsage(option, '%s. Check --help' % e)
 
     return vals
 
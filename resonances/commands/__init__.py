@@ -6,12 +6,14 @@ from .reports import show_planets
 from .reports import dump_librations
 from .broken_bodies import show_broken_bodies
 from .calc import calc
+from .cache_aei import cache_aei
 from .cleaning import clear_phases
 from .fileoperations import extract
 from .fileoperations import package
 from .fileoperations import remove_export_directory
 from .find import LibrationFinder
 from .load_resonances import load_resonances
+from .migrate_phases import migrate_phases
 from .plot import plot
 from .genres import genres
 from .resonace_table import generate_resonance_table
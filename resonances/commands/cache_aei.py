@@ -0,0 +1,28 @@
+import glob
+import logging
+import os
+from os.path import join as opjoin
+from typing import Tuple
+
+from resonances.shortcuts import read_aei
+from resonances import cache
+
+
+def cache_aei(aei_paths: Tuple[str, ...], is_recursive: bool):
+    """Converts aei files from pointed folders to binary cache, that will be used by next reading
+    of these files.
+
+    :param aei_paths: folders with aei files.
+    :param is_recursive: indicates about recursive search in pointed folders.
+    """
+    count = 0
+    for path in aei_paths:
+        if not os.path.isdir(path):
+            logging.warning('%s is not folder. Only aei files from folders can be cached.' % path)
+            continue
+        pattern = opjoin(path, '**', '*.aei') if is_recursive else opjoin(path, '*.aei')
+        for filepath in glob.iglob(pattern, recursive=is_recursive):
+            if cache.load_aei(filepath) is None:
+                read_aei(filepath)
+                count += 1
+    logging.info('%i aei files are cached to %s' % (count, cache.CACHE_DIR))
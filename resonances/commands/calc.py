@@ -1,15 +1,25 @@
+from concurrent.futures import Future
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures import wait
+from shutil import rmtree
+from typing import Dict
 from typing import Iterable
+from typing import List
 import logging
 import os
 
 from resonances.integrator import SmallBodiesFileBuilder, set_time_interval
 from resonances.integrator import aei_clean
+from resonances.integrator import create_scratch_dir
 from resonances.integrator import element6
 from resonances.integrator import mercury6
 from resonances.integrator import simple_clean
 from resonances.shortcuts import create_aws_s3_key
 from resonances.shortcuts import is_tar as _is_tar
 from resonances.shortcuts import is_s3 as _is_s3
+from resonances.io import move_aei_files
 from resonances.io import save_aei_files
 from resonances.catalog import AsteroidData
 
@@ -25,15 +35,16 @@ class MercuryException(Exception):
     pass
 
 
-def _execute_mercury():
+def _execute_mercury(path: str = INTEGRATOR_PATH):
     """Execute mercury program
 
+    :param path: directory, where mercury will be launched.
     :raises FileNotFoundError: if mercury not installed.
     """
     try:
-        simple_clean(False)
-        code = mercury6()
-        code += element6()
+        simple_clean(False, path)
+        code = mercury6(path)
+        code += element6(path)
         if code:
             raise MercuryException('Mercury6 programms has been finished with errors.')
 
@@ -48,13 +59,14 @@ def number_gen(start: int, stop: int, step: int):
 
 
 def calc(buffered_asteroid_names: Iterable[AsteroidData], from_day: float, to_day: float,
-         output_path: str = INTEGRATOR_PATH):
+         output_path: str = INTEGRATOR_PATH, jobs: int = 1):
     """
     :param from_day:
     :param to_day:
     :param int start: start is position of start element for computing.
     :param int stop:
     :param str output_path: path where will be saved aei files.
+    :param jobs: number of integrator launches, that compute blocks of asteroids at the same time.
     """
     set_time_interval(from_day, to_day)
     aei_clean()
@@ -67,23 +79,68 @@ def calc(buffered_asteroid_names: Iterable[AsteroidData], from_day: float, to_da
                                           CONFIG['s3']['secret_key'],
                                           CONFIG['s3']['bucket'], output_path)
 
-    for asteroid_names in buffered_asteroid_names:
-        _integrate(asteroid_names)
+    if jobs > 1:
+        aei_path = INTEGRATOR_PATH if _is_tar(output_path) else output_path
+        _integrate_parallel(buffered_asteroid_names, jobs, aei_path)
+    else:
+        for asteroid_names in buffered_asteroid_names:
+            _integrate(asteroid_names)
 
     save_aei_files(output_path, s3_bucket_key)
 
 
-def _integrate(asteroid_data: AsteroidData):
+def _integrate_parallel(buffered_asteroid_data: Iterable[List[AsteroidData]], jobs: int,
+                        aei_path: str):
+    """Integrates several blocks of asteroids at the same time. Every launch of integrator works
+    in own scratch directory, aei files are moved from it to pointed path as soon as the launch
+    is finished.
+
+    :param buffered_asteroid_data: blocks of asteroids.
+    :param jobs: number of launches at the same time.
+    :param aei_path: path where will be moved aei files.
+    """
+    free_paths = [create_scratch_dir() for _ in range(jobs)]
+    running = {}  # type: Dict[Future, str]
+
+    def _gather(futures: Iterable[Future]):
+        for future in futures:
+            path = running.pop(future)
+            free_paths.append(path)
+            future.result()
+            move_aei_files(aei_path, path)
+
+    try:
+        with ThreadPoolExecutor(jobs) as executor:
+            for asteroid_data in buffered_asteroid_data:
+                if not free_paths:
+                    _gather(wait(running, return_when=FIRST_COMPLETED).done)
+                path = free_paths.pop()
+                # Generator of blocks can reuse list, so copy is passed.
+                running[executor.submit(_integrate, list(asteroid_data), path)] = path
+            for future in as_completed(list(running)):
+                _gather([future])
+    finally:
+        for path in free_paths + list(running.values()):
+            rmtree(path)
+
+
+def _integrate(asteroid_data: AsteroidData, path: str = None):
     """Gets from astdys catalog parameters of orbital elements. Represents them
     to small.in file and makes symlink of this file in directory of application
     mercury6.
 
     :param int start: start is position of start element for computing.
     :param int stop:
+    :param path: scratch directory, where small.in will be created and mercury6 will be
+    launched. Directory of application is used if it isn't pointed.
     """
-    filepath = os.path.join(PROJECT_DIR, CONFIG['integrator']['input'], SMALL_BODIES_FILENAME)
-    symlink = os.path.join(INTEGRATOR_PATH, SMALL_BODIES_FILENAME)
-    small_bodies_storage = SmallBodiesFileBuilder(filepath, symlink)
+    if path:
+        small_bodies_storage = SmallBodiesFileBuilder(os.path.join(path, SMALL_BODIES_FILENAME))
+    else:
+        filepath = os.path.join(PROJECT_DIR, CONFIG['integrator']['input'],
+                                SMALL_BODIES_FILENAME)
+        symlink = os.path.join(INTEGRATOR_PATH, SMALL_BODIES_FILENAME)
+        small_bodies_storage = SmallBodiesFileBuilder(filepath, symlink)
     small_bodies_storage.create_small_body_file()
     logging.info('Create initial conditions for asteroids from %s to %s',
                  asteroid_data[0][0], asteroid_data[-1][0])
@@ -93,5 +150,5 @@ def _integrate(asteroid_data: AsteroidData):
     small_bodies_storage.flush()
 
     logging.info('Integrating orbits...')
-    _execute_mercury()
+    _execute_mercury(path or INTEGRATOR_PATH)
     logging.info('[done]')
@@ -3,11 +3,15 @@ import os
 from typing import Tuple
 
 from resonances.datamining import get_file_name
+from resonances.datamining import get_binary_file_name
+from resonances.datamining.phases import BUFFER_SIZE
 from resonances.datamining import get_resonances
 from resonances.entities import Phase
+from resonances.entities import PhaseArray
 from redis.exceptions import ConnectionError
 
-from resonances.entities.dbutills import engine, REDIS
+from resonances.entities.dbutills import REDIS
+from resonances.entities.dbutills import transaction
 
 TABLENAME = Phase.__tablename__
 
@@ -19,20 +23,23 @@ def _log_redis(is_logged):
 
 
 def clear_phases(start: int, stop: int, planets: Tuple[str]):
-    conn = engine.connect()
     resonance_ids = []
     redis_logged = False
-    for resonance in get_resonances(start, stop, False, planets):
+    for resonance in get_resonances(start, stop, False, planets, is_streaming=True):
+        resonance_ids.append(str(resonance.id))
+
+        for filename in [get_file_name(resonance.id), get_binary_file_name(resonance.id)]:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    redis_keys = ['%s:%s' % (TABLENAME, x) for x in resonance_ids]
+    for i in range(0, len(redis_keys), BUFFER_SIZE):
         try:
-            REDIS.delete('%s:%i' % (TABLENAME, resonance.id))
+            REDIS.delete(*redis_keys[i:i + BUFFER_SIZE])
         except ConnectionError:
             redis_logged = _log_redis(redis_logged)
 
-        resonance_ids.append(str(resonance.id))
-
-        filename = get_file_name(resonance.id)
-        if os.path.exists(filename):
-            os.remove(filename)
-
-    conn.execute("DELETE FROM %s WHERE resonance_id = ANY('{%s}'::int[]);" %
-                 (TABLENAME, ','.join(resonance_ids)))
+    with transaction() as conn:
+        for tablename in [TABLENAME, PhaseArray.__tablename__]:
+            conn.execute("DELETE FROM %s WHERE resonance_id = ANY('{%s}'::int[]);" %
+                         (tablename, ','.join(resonance_ids)))
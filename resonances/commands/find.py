@@ -1,28 +1,49 @@
 import json
 import logging
+import os
+from itertools import groupby
+from multiprocessing import Pool
+from multiprocessing import Queue
 from os.path import join as opjoin
 from typing import List
 from typing import Dict
 from typing import Tuple
 from typing import Iterable
+from typing import Set
 
+import pandas as pd
 from resonances.datamining import OrbitalElementSetCollection
 from resonances.datamining import AEIDataGetter
 from resonances.datamining import LibrationClassifier
+from resonances.datamining import LibrationSink
 from resonances.datamining import PhaseStorage
 from resonances.datamining import ResonanceOrbitalElementSetFacade
+from resonances.datamining import ResonantPhaseEngine
+from resonances.datamining import build_coefficient_matrix
 from resonances.datamining import build_bigbody_elements
 from resonances.datamining import get_aggregated_resonances
+from resonances.datamining import expunge_resonances
 from resonances.datamining import ResonanceAeiData
 from resonances.datamining import PhaseBuilder
 from resonances.datamining.orbitalelements import FilepathBuilder
+from resonances.datamining.orbitalelements import EXTRACT_PATH
+from resonances.datamining.orbitalelements import asteroid_aei_gen
+from resonances.datamining import get_resonances_by_asteroids
 from resonances.datamining.orbitalelements.collection import AEIValueError
 from resonances.datamining import AsteroidElementCountException
 from resonances.entities import BodyNumberEnum, Libration, TwoBodyLibration
-from resonances.entities.dbutills import REDIS, engine
+from resonances.entities import ProgressOutcome
+from resonances.entities import ResonanceMixin
+from resonances.entities import ResonanceProgress
+from resonances.entities import get_planets_key
+from resonances.entities.dbutills import REDIS
+from resonances.entities.dbutills import transaction
+from resonances.entities.dbutills import dispose_connections
 from resonances.entities.dbutills import session
 from resonances.shortcuts import get_asteroid_interval, ProgressBar, fix_id_sequence
-from sqlalchemy import exists
+from resonances.shortcuts import is_tar
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
 from resonances.entities.dbutills import OnConflictInsert
 
 from resonances.entities.body import BrokenAsteroid
@@ -33,70 +54,139 @@ CONFIG = Config.get_params()
 BODIES_COUNTER = CONFIG['integrator']['number_of_bodies']
 MERCURY_DIR = opjoin(PROJECT_DIR, CONFIG['integrator']['dir'])
 OUTPUT_ANGLE = CONFIG['output']['angle']
+BROKEN_BATCH_SIZE = 100
 
 
 class LibrationFinder:
     def __init__(self, planets: Tuple[str], is_recursive: bool, clear: bool,
                  clear_s3: bool, is_current: bool = False,
-                 phase_storage: PhaseStorage = PhaseStorage.redis, is_verbose: bool = False):
+                 phase_storage: PhaseStorage = PhaseStorage.redis, is_verbose: bool = False,
+                 is_resuming: bool = False):
+        """
+        :param is_resuming: if it is true, resonances from journal of processed resonances will
+        be skipped.
+        """
         self._is_verbose = is_verbose
+        self._is_resuming = is_resuming
         self._clear_s3 = clear_s3
         self._planets = planets
         self._is_recursive = is_recursive
         self._is_current = is_current
         self._phase_storage = None if clear else phase_storage
         self._clear = clear
-        conn = engine.connect()
+        self._orbital_element_sets = None  # type: List[OrbitalElementSetCollection]
+        self._planet_file_states = None  # type: List[Tuple[str, float, int]]
+        self._extract_path = EXTRACT_PATH
+        self._broken_asteroids = _BrokenAsteroidRegistry()
         table = Libration.__table__ if len(planets) == 2 else TwoBodyLibration.__table__
-        fix_id_sequence(table, conn)
+        with transaction() as conn:
+            fix_id_sequence(table, conn)
 
     @property
     def planets(self):
         return self._planets
 
     def _find(self, resonances_data: Iterable[ResonanceAeiData], length: int,
-              orbital_element_sets: List[OrbitalElementSetCollection]):
+              orbital_element_sets: List[OrbitalElementSetCollection],
+              conn: Connection = None):
         """
+        Results are committed after every asteroid: librations, phases for database, broken
+        asteroids and records of journal of processed resonances are saved by one transaction.
+
         :param resonances_data:
         :param length: used only for progress bar.
         :param orbital_element_sets:
+        :param conn: connection for transactions of asteroids, it is taken from pool if it is
+        not pointed.
         """
-        classifier = LibrationClassifier(self._is_current, BodyNumberEnum(len(self._planets) + 1))
+        body_count = BodyNumberEnum(len(self._planets) + 1)
+        sink = LibrationSink(body_count)
+        classifier = LibrationClassifier(self._is_current, body_count, sink)
         phase_builder = PhaseBuilder(self._phase_storage)
+        journal = _ProgressJournal(self._planets)
         p_bar = None
         if self._is_verbose:
             p_bar = ProgressBar(length, 'Find librations')
-        asteroid_name = None
-        for resonance, aei_data in resonances_data:
-            if self._is_verbose and asteroid_name != resonance.small_body.name:
+        phase_engine = ResonantPhaseEngine(orbital_element_sets)
+        for asteroid_name, items in groupby(resonances_data, lambda x: x[0].small_body.name):
+            if self._is_verbose:
                 p_bar.update()
-            asteroid_name = resonance.small_body.name
-            broken_asteroid_mediator = _BrokenAsteroidMediator(asteroid_name)
-            if broken_asteroid_mediator.check():
+            if self._broken_asteroids.check(asteroid_name):
+                expunge_resonances(x[0] for x in items)
                 continue
 
-            if aei_data.empty:
-                broken_asteroid_mediator.save('Has no data in aei file.')
+            resonances, aei_datas = zip(*items)
+            outcomes = self._classify(asteroid_name, resonances, aei_datas[0], classifier,
+                                      phase_builder, phase_engine, orbital_element_sets)
+            with transaction(conn) as asteroid_conn:
+                phase_builder.flush(asteroid_conn)
+                self._broken_asteroids.flush(asteroid_conn)
+                sink.flush(asteroid_conn)
+                journal.save(asteroid_name, resonances, outcomes, asteroid_conn)
+            expunge_resonances(resonances)
 
+        session.commit()
+
+    def _classify(self, asteroid_name: str, resonances: List[ResonanceMixin],
+                  aei_data: pd.DataFrame, classifier: LibrationClassifier,
+                  phase_builder: PhaseBuilder, phase_engine: ResonantPhaseEngine,
+                  orbital_element_sets: List[OrbitalElementSetCollection]) \
+            -> List[ProgressOutcome]:
+        """Classifies librations of resonances of one asteroid.
+
+        :return: outcomes for every resonance.
+        """
+        broken_outcomes = [ProgressOutcome.broken] * len(resonances)
+        if aei_data.empty:
+            self._broken_asteroids.save(asteroid_name, 'Has no data in aei file.')
+            return broken_outcomes
+
+        try:
+            phase_matrix = phase_engine.get_resonant_phases(
+                aei_data, build_coefficient_matrix(resonances))
+        except AsteroidElementCountException as e:
+            self._broken_asteroids.save(asteroid_name, str(e))
+            return broken_outcomes
+
+        outcomes = []
+        for resonance, resonant_phases in zip(resonances, phase_matrix):
             logging.debug('Analyze asteroid %s, resonance %s' % (asteroid_name, resonance))
             resonance_id = resonance.id
             classifier.set_resonance(resonance)
             orbital_elem_set_facade = ResonanceOrbitalElementSetFacade(
-                orbital_element_sets, resonance)
+                orbital_element_sets, resonance, resonant_phases)
             try:
-                serialized_phases = phase_builder.build(
+                phases = phase_builder.build(
                     aei_data, resonance_id, orbital_elem_set_facade)
             except AEIValueError:
-                broken_asteroid_mediator.save()
-                continue
-            except AsteroidElementCountException as e:
-                broken_asteroid_mediator.save(str(e))
-                continue
+                self._broken_asteroids.save(asteroid_name)
+                return outcomes + broken_outcomes[len(outcomes):]
 
-            classifier.classify(orbital_elem_set_facade, serialized_phases)
+            if classifier.classify(orbital_elem_set_facade, phases):
+                outcomes.append(ProgressOutcome.determined)
+            else:
+                outcomes.append(ProgressOutcome.not_determined)
+        return outcomes
 
-        session.flush()
-        session.commit()
+    def _get_orbital_element_sets(self, pathbuilder: FilepathBuilder) \
+            -> List[OrbitalElementSetCollection]:
+        """Builds orbital elements of planets. They are kept during all run of the finder until
+        aei files of planets are same.
+        """
+        filepaths = [pathbuilder.build('%s.aei' % x) for x in self._planets]
+        file_states = []
+        for filepath in filepaths:
+            stat = os.stat(filepath)
+            file_states.append((filepath, stat.st_mtime, stat.st_size))
+        if file_states == self._planet_file_states:
+            return self._orbital_element_sets
+
+        try:
+            self._orbital_element_sets = build_bigbody_elements(filepaths)
+        except AEIValueError:
+            raise AEIValueError('Incorrect data in %s' % ' or in '.join(filepaths))
+        self._planet_file_states = file_states
+        return self._orbital_element_sets
 
     def find(self, start: int, stop: int, aei_paths: tuple):
         """Analyze resonances for pointed half-interval of numbers of asteroids. It gets resonances
@@ -109,33 +199,54 @@ class LibrationFinder:
         :param stop: stop point of half-interval. It will be excluded.
         :return:
         """
-        pathbuilder = FilepathBuilder(aei_paths, self._is_recursive, self._clear_s3)
-        filepaths = [pathbuilder.build('%s.aei' % x) for x in self._planets]
-        orbital_element_sets = None
-        try:
-            orbital_element_sets = build_bigbody_elements(filepaths)
-        except AEIValueError:
-            logging.error('Incorrect data in %s' % ' or in '.join(filepaths))
-            exit(-1)
-
+        pathbuilder = FilepathBuilder(aei_paths, self._is_recursive, self._clear_s3,
+                                      self._extract_path)
+        if pathbuilder.has_archives:
+            names = ['%s.aei' % x for x in self._planets]
+            names += ['A%i.aei' % x for x in range(start, stop)]
+            list(pathbuilder.extract(names))
+        orbital_element_sets = self._get_orbital_element_sets(pathbuilder)
         aei_getter = AEIDataGetter(pathbuilder, self._clear)
         resonances_data_gen = get_aggregated_resonances(
-            start, stop, False, self._planets, aei_getter)
+            start, stop, False, self._planets, aei_getter, is_streaming=True,
+            is_resuming=self._is_resuming)
         self._find(resonances_data_gen, stop + 1 - start, orbital_element_sets)
 
+    def find_parallel(self, start: int, stop: int, step: int, aei_paths: tuple, workers: int):
+        """Does same that find but spreads blocks of asteroids across pointed number of
+        processes. Every process has own connections to database and loads aei files of planets
+        one time. Found librations are saved by the processes after every asteroid. Every
+        process extracts archives to own folder, that is same for same number of process.
+
+        :param start: start point of half-interval.
+        :param stop: stop point of half-interval. It will be excluded.
+        :param step: number of asteroids in one block.
+        :param aei_paths:
+        :param workers: number of processes.
+        """
+        intervals = [(x, min(x + step, stop)) for x in range(start, stop, step)]
+        p_bar = None
+        if self._is_verbose:
+            p_bar = ProgressBar(len(intervals), 'Find librations', 1)
+
+        slots = Queue()
+        for i in range(workers):
+            slots.put(i)
+        dispose_connections()
+        with Pool(workers, _init_worker, (self, aei_paths, slots)) as pool:
+            for _ in pool.imap_unordered(_find_in_worker, intervals):
+                if p_bar:
+                    p_bar.update()
+
     def find_by_resonances(self, resonances_data: Iterable[ResonanceAeiData], aei_paths: tuple):
-        pathbuilder = FilepathBuilder(aei_paths, self._is_recursive, self._clear_s3)
-        filepaths = [pathbuilder.build('%s.aei' % x) for x in self._planets]
-        orbital_element_sets = None
-        try:
-            orbital_element_sets = build_bigbody_elements(filepaths)
-        except AEIValueError:
-            logging.error('Incorrect data in %s' % ' or in '.join(filepaths))
-            exit(-1)
+        pathbuilder = FilepathBuilder(aei_paths, self._is_recursive, self._clear_s3,
+                                      self._extract_path)
+        orbital_element_sets = self._get_orbital_element_sets(pathbuilder)
         self._find(resonances_data, 0, orbital_element_sets)
 
     def find_by_file(self, aei_paths: tuple):
-        """Do same that find but asteroid interval will be determined by filenames.
+        """Do same that find but asteroid interval will be determined by filenames. Archives are
+        read by one pass, aei files of asteroids are parsed from memory one by one.
 
         :param aei_paths:
         :return:
@@ -143,7 +254,42 @@ class LibrationFinder:
         for path in aei_paths:
             start, stop = get_asteroid_interval(path)
             logging.info('find librations for asteroids [%i %i], from %s' % (start, stop, path))
-            self.find(start, stop, (path,))
+            if not is_tar(path):
+                self.find(start, stop, (path,))
+                continue
+
+            pathbuilder = FilepathBuilder((path,), self._is_recursive, self._clear_s3,
+                                          self._extract_path)
+            orbital_element_sets = self._get_orbital_element_sets(pathbuilder)
+            for tarname in pathbuilder.archives:
+                self._find(self._stream_resonances(tarname), stop + 1 - start,
+                           orbital_element_sets)
+
+    def _stream_resonances(self, tarname: str) -> Iterable[ResonanceAeiData]:
+        for asteroid_name, aei_data in asteroid_aei_gen(tarname):
+            for resonance in get_resonances_by_asteroids([asteroid_name], False, None,
+                                                         self._planets, True, self._is_resuming):
+                yield resonance, aei_data
+
+
+_worker_finder = None  # type: LibrationFinder
+_worker_aei_paths = None  # type: tuple
+
+
+def _init_worker(finder: LibrationFinder, aei_paths: tuple, slots: Queue):
+    """Takes number of worker from slots, so extracted aei files and their cache have same
+    paths in every run.
+    """
+    global _worker_finder, _worker_aei_paths
+    finder._is_verbose = False
+    finder._extract_path = opjoin(EXTRACT_PATH, 'worker-%i' % slots.get())
+    _worker_finder = finder
+    _worker_aei_paths = aei_paths
+
+
+def _find_in_worker(interval: Tuple[int, int]):
+    start, stop = interval
+    _worker_finder.find(start, stop, _worker_aei_paths)
 
 
 def _build_redis_phases(by_aei_data: List[str], in_key: str,
@@ -181,25 +327,59 @@ def _get_phases_fromfile(from_file):
     return phases
 
 
-class _BrokenAsteroidMediator:
-    def __init__(self, asteroid_name: str):
-        self._asteroid_name = asteroid_name
+class _ProgressJournal:
+    """Saves records about processed resonances to journal, so search can be resumed. Outcome
+    of resonance, that is processed again, replaces its previous outcome.
+    """
+    def __init__(self, planets: Tuple[str]):
+        self._planets_key = get_planets_key(planets)
 
-    def check(self):
-        with session.no_autoflush:
-            query = exists().where(BrokenAsteroid.name == self._asteroid_name)
-            return session.query(query).scalar()
+    def save(self, asteroid_name: str, resonances: List[ResonanceMixin],
+             outcomes: List[ProgressOutcome], conn: Connection):
+        if not outcomes:
+            return
+        values = [dict(asteroid_name=asteroid_name, planets=self._planets_key,
+                       resonance_id=x.id, outcome=y.value) for x, y in zip(resonances, outcomes)]
+        insert_q = OnConflictInsert(ResonanceProgress.__table__.insert().values(values),
+                                    ['planets', 'resonance_id'], ['asteroid_name', 'outcome'])
+        conn.execute(insert_q)
 
-    def save(self, reason: str = None):
-        table = BrokenAsteroid.__table__
-        insert_q = table.insert().values(name=self._asteroid_name, reason=reason)
-        insert_q = OnConflictInsert(insert_q, ['name'])
 
-        connection = engine.connect()
-        trans = connection.begin()
-        try:
-            connection.execute(insert_q)
-            trans.commit()
-        except:
-            trans.rollback()
-            raise
+class _BrokenAsteroidRegistry:
+    """Keeps names of broken asteroids in memory. Names are loaded from database one time, new
+    broken asteroids are added to the set immediately and are inserted to database by batches.
+    """
+    def __init__(self, batch_size: int = BROKEN_BATCH_SIZE):
+        self._batch_size = batch_size
+        self._names = None  # type: Set[str]
+        self._pending = []  # type: List[Tuple[str, str]]
+
+    def _load(self) -> Set[str]:
+        if self._names is None:
+            with transaction() as conn:
+                query = select([BrokenAsteroid.__table__.c.name])
+                self._names = set(x for x, in conn.execute(query))
+        return self._names
+
+    def check(self, asteroid_name: str) -> bool:
+        return asteroid_name in self._load()
+
+    def save(self, asteroid_name: str, reason: str = None, conn: Connection = None):
+        names = self._load()
+        if asteroid_name in names:
+            return
+        names.add(asteroid_name)
+        self._pending.append((asteroid_name, reason))
+        if len(self._pending) >= self._batch_size:
+            self.flush(conn)
+
+    def flush(self, conn: Connection = None):
+        """Inserts all pending broken asteroids by one query."""
+        if not self._pending:
+            return
+        table = BrokenAsteroid.__table__
+        values = [dict(name=x, reason=y) for x, y in self._pending]
+        insert_q = OnConflictInsert(table.insert().values(values), ['name'])
+        with transaction(conn) as conn:
+            conn.execute(insert_q)
+        self._pending = []
@@ -2,29 +2,29 @@
 Module aims providing complete cycle resonance integration. The main function
 of this module is method "integrate".
 """
-import logging
 import json
-from resonances.shortcuts import planets_gen
-from os.path import join as opjoin
-from os.path import exists as opexists
+import logging
 from os import remove
-from os import makedirs
-from resonances.datamining import ResonanceAeiData
-from typing import Iterable
+from os import replace
+from os.path import exists as opexists
+from os.path import join as opjoin
+from queue import Full
+from queue import Queue
 from shutil import rmtree
-from typing import Tuple
-from typing import List
+from threading import Event
+from threading import Lock
+from threading import Thread
 from typing import Dict
-from functools import reduce
-from operator import add
-from abc import abstractmethod
+from typing import Iterable
+from typing import List
+from typing import Tuple
 from enum import Enum
 from enum import unique
-from os import listdir
 
 from resonances.settings import Config
 from resonances.commands import load_resonances
 from resonances.datamining import PhaseStorage
+from resonances.datamining import ResonanceAeiData
 from resonances.commands import calc
 from resonances.commands import LibrationFinder
 from resonances.catalog import PossibleResonanceBuilder
@@ -32,8 +32,7 @@ from resonances.datamining import get_resonances_with_id
 from resonances.entities import ResonanceMixin
 from resonances.catalog import AsteroidData
 from resonances.catalog import asteroid_list_gen
-from resonances.catalog import asteroid_names_gen
-from resonances.io import move_aei_files
+from resonances.shortcuts import planets_gen
 from resonances.shortcuts import read_aei
 
 CONFIG = Config.get_params()
@@ -42,6 +41,11 @@ PROJECT_DIR = Config.get_project_dir()
 RESONANCE_FILEPATH = opjoin(PROJECT_DIR, 'axis', RESONANCE_TABLE_FILE)
 STEP = CONFIG['integrator']['number_of_bodies']
 INTEGRATOR_PATH = opjoin(PROJECT_DIR, CONFIG['integrator']['dir'])
+# Number of integrated blocks, that can wait for search of librations.
+QUEUE_SIZE = 2
+_PUT_TIMEOUT = 1.
+STATE_FILE = opjoin('/tmp', 'integration_state.json')
+AEI_PATH = opjoin('/tmp', 'aei')
 
 
 @unique
@@ -53,195 +57,152 @@ class _IntegrationState(Enum):
 
 
 Interval = Tuple[int, int]
+# sequence number of first asteroid of block in catalog, asteroids of block.
+Block = Tuple[int, List[AsteroidData]]
 
 
 class _Integration:
     """
-    Class aims to store state of complete cycle of integration. It also
-    contains neccessary options used by related commands.
-
-    Every step of integration is saved in file /tmp/integration_state.txt. This file
-    contains only on number represents step.
+    Class aims to store state of complete cycle of integration. Cycle is made by blocks of
+    asteroids, every block has own state:
     1 means complete computing of aei files.
     2 means complete generation of resonances.
     3 means complete search of librations.
 
-    After computing aei files they will be in /tmp/aei folder.
-    After generating resonances the application saves id numbers of the
-    resonances to /tmp/resonances/<BODIES>/. The id numbers will be grouped by
-    suitable asteoroids.
+    States are saved in file /tmp/integration_state.json, block is pointed by sequence number
+    of its first asteroid in catalog. Aei files of block are in /tmp/aei/block-<number> folder
+    until librations are found. States are changed by both stages of integration, so they are
+    guarded by lock.
     """
-    def __init__(self, catalog: str):
-        if opexists(self.state_file):
+    def __init__(self, catalog: str, is_continue: bool = False):
+        """
+        :param catalog:
+        :param is_continue: if it is true, states of blocks will be loaded from state file
+        of previous integration.
+        """
+        self._states = {}  # type: Dict[int, _IntegrationState]
+        self._lock = Lock()
+        if is_continue and opexists(self.state_file):
             self.open()
-        else:
-            self._state = _IntegrationState.start
         self.catalog = catalog
-        self.files_with_aggregated_asteroids = []
 
-    def save(self, state: _IntegrationState):
-        with open(self.state_file, 'w') as fd:
-            fd.write(str(state.value))
-        self._state = state
+    def save(self, block_start: int, state: _IntegrationState):
+        """Saves states to temporary file and replaces state file by it, so state file is
+        never partly written.
+        """
+        with self._lock:
+            self._states[block_start] = state
+            tmp_file = '%s.tmp' % self.state_file
+            with open(tmp_file, 'w') as fd:
+                json.dump({str(x): y.value for x, y in self._states.items()}, fd)
+            replace(tmp_file, self.state_file)
 
     def open(self):
         with open(self.state_file, 'r') as fd:
-            self._state = _IntegrationState(int(fd.read(1)))
+            self._states = {int(x): _IntegrationState(y) for x, y in json.load(fd).items()}
 
-    @property
-    def agres_folder(self):
-        return opjoin('/tmp', 'resonances')
+    def get_state(self, block_start: int) -> _IntegrationState:
+        with self._lock:
+            return self._states.get(block_start, _IntegrationState.start)
 
-    @property
-    def state_file(self) -> str:
-        return opjoin('/tmp', 'integration_state.txt')
+    def get_first_unfinished_block(self) -> int:
+        """Returns sequence number of first asteroid of first block, that doesn't have found
+        librations. Blocks follow each other by STEP asteroids.
+        """
+        block_start = 1
+        while self.get_state(block_start) == _IntegrationState.find:
+            block_start += STEP
+        return block_start
 
     @property
-    def state(self) -> _IntegrationState:
-        return self._state
+    def state_file(self) -> str:
+        return STATE_FILE
 
     @property
     def aei_path(self):
-        return opjoin('/tmp', 'aei')
+        return AEI_PATH
 
-    def get_agres_folder(self, for_planets: tuple) -> str:
-        return opjoin(self.agres_folder, '-'.join(for_planets))
+    def get_block_aei_path(self, block_start: int) -> str:
+        return opjoin(self.aei_path, 'block-%i' % block_start)
 
 
-def _get_last_computed_asteroid(catalog: str, in_path: str) -> int:
+class _CalcStage(Thread):
     """
-    Return sequence number in catalog of first asteroid that doesn't have
-    A*.aei file in pointed_path.
+    Stage calls mercury6, that will predict orbital elements of asteroids block by block and
+    save results to /tmp/aei/block-<number>/*.aei files. Integrated blocks are put to bounded
+    queue, so the stage waits when next stage doesn't keep up and disk usage stays bounded.
+    Blocks, that already have aei files, are put without integration.
     """
-    i = 0
-    for i, name in enumerate(asteroid_names_gen(catalog)):
-        path = opjoin(in_path, 'A%s.aei' % name)
-        if not opexists(path):
-            break
-    return i
-
-
-class _ACommand(object):
-    def __init__(self, integration: _Integration):
+    def __init__(self, integration: _Integration, blocks: Iterable[Block], from_day: float,
+                 to_day: float, queue_size: int = QUEUE_SIZE):
+        super(_CalcStage, self).__init__(daemon=True)
         self._integration = integration
-        self._catalog = integration.catalog
-
-    def get_asteroid_list_gen(self) -> Iterable[List[AsteroidData]]:
-        """
-        Getter is neccessary for instantiating below generator. Generators
-        cannot be reused.
-        """
-        return asteroid_list_gen(STEP, self._catalog)
-
-    @abstractmethod
-    def exec(self):
-        pass
-
-
-class _CalcCommand(_ACommand):
-    """
-    Used for calling mercury6 that will predict orbital elements and saves
-    results to /tmp/aei/*.aei files.
-    """
-    def __init__(self, integration: _Integration, from_day: float,
-                 to_day: float, is_continue: bool):
-        super(_CalcCommand, self).__init__(integration)
+        self._blocks = blocks
         self._from_day = from_day
         self._to_day = to_day
-        self._state = _IntegrationState.calc
-        self._is_continue = is_continue
-
-    def get_asteroid_list_gen(self) -> Iterable[List[AsteroidData]]:
-        """
-        Getter is neccessary for instantiating below generator. Generators
-        cannot be reused.
-        """
-        start = None
-        if self._is_continue:
-            start = _get_last_computed_asteroid(self._catalog, self._integration.aei_path) + 1
-        return asteroid_list_gen(STEP, self._catalog, start=start)
-
-    def exec(self):
-        if self._integration.state == _IntegrationState.start or self._is_continue:
-            if self._is_continue:
-                move_aei_files(self._integration.aei_path)
-
-            calc(self.get_asteroid_list_gen(), self._from_day,
-                 self._to_day, self._integration.aei_path)
-            self._integration.save(self._state)
-
-
-class _LoadCommand(_ACommand):
+        self.queue = Queue(queue_size)
+        self.stopped = Event()
+        self.error = None  # type: Exception
+
+    def run(self):
+        try:
+            for block_start, asteroids in self._blocks:
+                if self.stopped.is_set():
+                    return
+                state = self._integration.get_state(block_start)
+                if state == _IntegrationState.find:
+                    continue
+                if state == _IntegrationState.start:
+                    calc([asteroids], self._from_day, self._to_day,
+                         self._integration.get_block_aei_path(block_start))
+                    self._integration.save(block_start, _IntegrationState.calc)
+                # Generator of blocks can reuse list, so copy is put.
+                self._put((block_start, list(asteroids)))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(None)
+
+    def _put(self, item: Block):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=_PUT_TIMEOUT)
+                return
+            except Full:
+                continue
+
+
+class _SearchStage:
     """
-    Command generates resonance table, loads it to database and saves
-    resonances id to /tmp/resonances/agres-<asteroid-buffer-number>.json.
+    Stage generates resonance table, loads resonances of block to database and finds librations
+    in them. It needs aei files of block, that are removed after search. Resonances are loaded
+    and librations are found in one thread, because they share session of database.
     """
-    def __init__(self, integration: _Integration, planets: Tuple[str],
-                 axis_swing: float):
-        super(_LoadCommand, self).__init__(integration)
+    def __init__(self, integration: _Integration, planets: Tuple[str], axis_swing: float,
+                 integers: List[str], is_resuming: bool = False):
+        self._integration = integration
+        self._integers = integers
+        self._is_resuming = is_resuming
         self._builders = []
-        for planets in planets_gen(planets):
-            self._builders.append(PossibleResonanceBuilder(planets, axis_swing, self._catalog))
-        self._state = _IntegrationState.load
-
-    def exec(self):
-        """
-        Loads resonances and makes list of files contains aggregated the
-        resonances' id by asteroid.
-        """
-        if self._integration.state == _IntegrationState.calc:
-            for builder in self._builders:
-                planets = builder.planets
-                logging.debug('Load resonances for %s' % ', '.join(planets))
-                folder = self._integration.get_agres_folder(planets)
-                if opexists(folder):
-                    rmtree(folder)
-                makedirs(folder)
-
-                for i, asteroid_buffer in enumerate(self.get_asteroid_list_gen()):
-                    aggregated_resonances = load_resonances(
-                        RESONANCE_FILEPATH, asteroid_buffer, builder, True)
-
-                    asteroids_without_resonances = [
-                        x for x in aggregated_resonances.keys() if not aggregated_resonances[x]
-                    ]
-                    for key in asteroids_without_resonances:
-                        del aggregated_resonances[key]
-
-                    if asteroids_without_resonances:
-                        logging.info('Asteroids %s have no resonances with axis variation: %f',
-                                     ' '.join(asteroids_without_resonances), builder.axis_swing)
-
-                    if aggregated_resonances:
-                        filename = opjoin(folder, 'agres-%i.json' % i)
-                        with open(filename, 'w') as fd:
-                            json.dump(aggregated_resonances, fd)
-
-                        self._integration.files_with_aggregated_asteroids.append(filename)
-            self._integration.save(self._state)
-
-
-class _FindCommand(_ACommand):
-    """
-    _FindCommand produced search librations in data from _LoadCommand instance.
-    It needs:
-        * aei files that will be get from path pointed in _Integration instance,
-        that should be produced by _CalcCommand instance.
-        * resonances id number for mining the resonances from a database and search
-        librations in him for asteroids represented in aei files.
-    """
-    def __init__(self, integration: _Integration, planets: Tuple[str], integers: List[str]):
-        super(_FindCommand, self).__init__(integration)
-        self._aei_path = self._integration.aei_path
-
         self._finders = []
         for planets in planets_gen(planets):
+            self._builders.append(PossibleResonanceBuilder(planets, axis_swing,
+                                                           integration.catalog))
             finder = LibrationFinder(planets, False, True, False, False, PhaseStorage.file, True)
             self._finders.append(finder)
-        self._state = _IntegrationState.find
-        self._integers = integers
 
-    def _resonance_aei_gen(self, resonances: Iterable[ResonanceMixin])\
+    def _load(self, asteroids: List[AsteroidData], builder: PossibleResonanceBuilder) \
+            -> List[int]:
+        """Loads resonances and returns their id numbers."""
+        aggregated_resonances = load_resonances(RESONANCE_FILEPATH, asteroids, builder, True)
+        asteroids_without_resonances = [x for x, y in aggregated_resonances.items() if not y]
+        if asteroids_without_resonances:
+            logging.info('Asteroids %s have no resonances with axis variation: %f',
+                         ' '.join(asteroids_without_resonances), builder.axis_swing)
+        return [x for y in aggregated_resonances.values() for x in y]
+
+    @staticmethod
+    def _resonance_aei_gen(resonances: Iterable[ResonanceMixin], aei_path: str)\
             -> Iterable[ResonanceAeiData]:
         """Resolves aei data and resonance by resonance's asteroid."""
         asteroid_name = None
@@ -249,58 +210,77 @@ class _FindCommand(_ACommand):
         for resonance in resonances:
             if asteroid_name != resonance.small_body.name:
                 asteroid_name = resonance.small_body.name
-                filepath = opjoin(self._aei_path, '%s.aei' % asteroid_name)
-                aei_data = read_aei(filepath)
+                filepath = opjoin(aei_path, '%s.aei' % asteroid_name)
+                aei_data = read_aei(filepath, False)
             yield resonance, aei_data
 
-    def exec(self):
+    def exec(self, block_start: int, asteroids: List[AsteroidData]):
         """
         Method does next:
-            1) Check /tmp/resonances/agres-*.json files and set them to
-            Integration instance if it is neccessary.
-            2) Stops the application if files not found.
-            3) Gets resonances from database and filter them by integer expression.
-            4) Links to mined resonances' asteroid predicted orbital elements from aei data.
-            5) Finds librations in resonances.
+            1) Loads resonances for asteroids of block.
+            2) Gets resonances from database and filter them by integer expression.
+            3) Links to mined resonances' asteroid predicted orbital elements from aei data.
+            4) Finds librations in resonances.
+            5) Removes aei files of block.
         """
-        if self._integration.state == _IntegrationState.load:
-            for finder in self._finders:
-                planets = finder.planets
-                logging.debug('Find librations for %s' % ', '.join(planets))
-                folder = self._integration.get_agres_folder(planets)
-                for filename in listdir(folder):
-                    with open(opjoin(folder, filename)) as fd:
-                        aggregated_resonances_id = json.load(fd)  # type: Dict[str, List[int]]
-                        resonances_id_list = reduce(add, aggregated_resonances_id.values())
-
-                        resonance_gen = get_resonances_with_id(
-                            resonances_id_list, planets, self._integers)
-                        gen = self._resonance_aei_gen(resonance_gen)
-                        finder.find_by_resonances(gen, (self._aei_path,))
-            self._integration.save(self._state)
+        aei_path = self._integration.get_block_aei_path(block_start)
+        resonance_ids = []
+        for builder in self._builders:
+            logging.debug('Load resonances for %s' % ', '.join(builder.planets))
+            resonance_ids.append(self._load(asteroids, builder))
+        self._integration.save(block_start, _IntegrationState.load)
+
+        for finder, ids in zip(self._finders, resonance_ids):
+            logging.debug('Find librations for %s' % ', '.join(finder.planets))
+            if not ids:
+                continue
+            resonance_gen = get_resonances_with_id(ids, finder.planets, self._integers, True,
+                                                   self._is_resuming)
+            finder.find_by_resonances(self._resonance_aei_gen(resonance_gen, aei_path),
+                                      (aei_path,))
+        rmtree(aei_path)
+        self._integration.save(block_start, _IntegrationState.find)
+
+
+def _block_gen(catalog: str, start: int) -> Iterable[Block]:
+    for i, asteroids in enumerate(asteroid_list_gen(STEP, catalog, start=start)):
+        yield start + i * STEP, asteroids
 
 
 def integrate(from_day: float, to_day: float, planets: Tuple[str], catalog: str,
-              axis_swing: float, integers: List[str], do_continue: bool):
+              axis_swing: float, integers: List[str], do_continue: bool,
+              is_resuming: bool = False, queue_size: int = QUEUE_SIZE):
     """
-    Make complete cycle from calculation aei files to search librations. State
-    of the cycle is saved after every step to file /tmp/integration_state.txt.
-    If integration will be crashed by some reasons then state of it will be
-    repaired from this file and considered in every command.
-
-    The process contains 3 steps:
-        1) Prediction orbital elements by Mercury6 and saving results to /tmp/aei/*.aei.
+    Make complete cycle from calculation aei files to search librations. Cycle is made by
+    blocks of asteroids, librations of block are searched while next blocks are integrated.
+    State of every block is saved to file /tmp/integration_state.json. If integration will be
+    crashed by some reasons, it can be continued from this file.
+
+    The process contains 3 steps for every block:
+        1) Prediction orbital elements by Mercury6 and saving results to
+        /tmp/aei/block-<number>/*.aei.
         2) Generating resonance table and loading from it suitable resonances for asteroids.
-        3) Search librations in loaded resonances.
+        3) Search librations in loaded resonances and removing aei files of block.
+
+    If do_continue is true, blocks with found librations are skipped and blocks with aei files
+    are not integrated again. If is_resuming is true, resonances from journal of search of
+    librations are skipped.
+
+    :param queue_size: number of integrated blocks, that can wait for search of librations.
     """
-    integration = _Integration(catalog)
-    cmds = [
-        _CalcCommand(integration, from_day, to_day, do_continue),
-        _LoadCommand(integration, planets, axis_swing),
-        _FindCommand(integration, planets, integers)
-    ]
-
-    for cmd in cmds:
-        cmd.exec()
+    integration = _Integration(catalog, do_continue)
+    search_stage = _SearchStage(integration, planets, axis_swing, integers, is_resuming)
+    calc_stage = _CalcStage(integration, _block_gen(catalog,
+                                                    integration.get_first_unfinished_block()),
+                            from_day, to_day, queue_size)
+    calc_stage.start()
+    try:
+        for block_start, asteroids in iter(calc_stage.queue.get, None):
+            search_stage.exec(block_start, asteroids)
+    finally:
+        calc_stage.stopped.set()
+        calc_stage.join()
+    if calc_stage.error:
+        raise calc_stage.error
 
     remove(integration.state_file)
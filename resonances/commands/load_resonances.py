@@ -1,11 +1,16 @@
 from .resonace_table import generate_resonance_table as gentable
 
-from typing import Dict, List
+from functools import lru_cache
+from os import stat
+from typing import Dict, List, Tuple
 
-from resonances.shortcuts import ProgressBar
 from resonances.settings import Config
 from resonances.catalog import PossibleResonanceBuilder
 from resonances.catalog import AsteroidData
+from resonances.catalog import ResonanceTable
+from resonances.entities import BodyNumberEnum
+from resonances.entities.dbutills import transaction
+from sqlalchemy.engine import Connection
 
 
 CONFIG = Config.get_params()
@@ -13,8 +18,8 @@ PROJECT_DIR = Config.get_project_dir()
 
 
 def load_resonances(from_source: str, asteroids: List[AsteroidData],
-                    builder: PossibleResonanceBuilder, gen: bool = False)\
-        -> Dict[str, List[int]]:
+                    builder: PossibleResonanceBuilder, gen: bool = False,
+                    conn: Connection = None) -> Dict[str, List[int]]:
     """
     Makes all possible resonances for asteroids, that pointed by half-interval.
     Orbital elements for every asteroid will got from catalog, which has pointed filepath.
@@ -22,20 +27,31 @@ def load_resonances(from_source: str, asteroids: List[AsteroidData],
     :param asteroids: list of tuples, every tuple contains pair of asteroid's
     name and his parameters mined from catalog.
     :param gen: indicates about need to generate data.
+    :param conn: connection, resonances of all asteroids are saved by one transaction of it.
     :return: dictionary, where keys are number of asteroids and values are
     lists of id numbers of resonances.
     """
     if gen:
-        source = gentable([x for x in builder.planets])
+        table = _get_table(None, None, tuple(builder.planets))
     else:
-        with open(from_source) as fd:
-            source = [x for x in fd]
+        table = _get_table(from_source, stat(from_source).st_mtime_ns, tuple(builder.planets))
+
+    with transaction(conn) as conn:
+        return builder.build_block(table, asteroids, conn)
+
 
-    p_bar = ProgressBar(len(asteroids), 'Build resonances')
-    res = {}
-    for asteroid in asteroids:
-        res[asteroid[0]] = builder.build(source, asteroid)
-        p_bar.update()
-    p_bar.fin()
+@lru_cache(maxsize=8)
+def _get_table(from_source: str, mtime: int, planets: Tuple[str]) -> ResonanceTable:
+    """Parses resonance table once for every source. If path to source is not pointed, table
+    will be generated.
 
-    return res
+    :param from_source: path to file with resonance table.
+    :param mtime: time of modification of the file, it is part of key of cache.
+    :param planets:
+    """
+    if from_source is None:
+        source = gentable([x for x in planets])
+    else:
+        with open(from_source) as fd:
+            source = [x for x in fd]
+    return ResonanceTable(source, BodyNumberEnum(len(planets) + 1))
@@ -0,0 +1,34 @@
+import glob
+import json
+import logging
+import os
+from os.path import join as opjoin
+from typing import Tuple
+
+from resonances.datamining.phases import PHASE_DIR
+from resonances.datamining.phases import save_binary
+
+
+def migrate_phases(phase_dirs: Tuple[str, ...], is_removing: bool):
+    """Converts text files of phases (.rphs) to binary format of PhaseStorage.binary. Binary file
+    is saved near text file with same name and .npy extension.
+
+    :param phase_dirs: folders with text files of phases. Folder from config is used if
+    folders are not pointed.
+    :param is_removing: indicates about removing of converted text files.
+    """
+    count = 0
+    for phase_dir in phase_dirs or (PHASE_DIR,):
+        for filepath in glob.iglob(opjoin(phase_dir, '*.rphs')):
+            years = []
+            values = []
+            with open(filepath) as f:
+                for line in f:
+                    phase = json.loads(line.replace('\'', '"'))
+                    years.append(phase['year'])
+                    values.append(phase['value'])
+            save_binary(years, values, '%s.npy' % filepath[:-len('.rphs')])
+            if is_removing:
+                os.remove(filepath)
+            count += 1
+    logging.info('%i files of phases are converted to binary format' % count)
@@ -177,21 +177,21 @@ def plot(asteroids: tuple, phase_storage: PhaseStorage, for_librations: bool,
     resmaker = ResfileMaker(planets, planet_aei_paths)
 
     phase_builder = PhaseBuilder(phase_storage)
-    orbital_element_sets = None
-    if build_phases:
-        orbital_element_sets = build_bigbody_elements(planet_aei_paths)
+    orbital_element_sets = resmaker.orbital_element_sets
     phase_loader = PhaseLoader(phase_storage)
     aei_getter = AEIDataGetter(pathbuilder)
 
     plot_saver = PlotSaver(out_paths, output if is_tar else None, s3_bucket_key)
     builder = _PlotBuilder(phase_loader, plot_saver, resmaker, planets)
 
-    for resonance in get_resonances_by_asteroids(asteroids, for_librations, integers, planets):
+    for resonance in get_resonances_by_asteroids(asteroids, for_librations, integers, planets,
+                                                 True):
         aei_data = aei_getter.get_aei_matrix(resonance.small_body.name)
         if build_phases:
             orbital_elem_set_facade = ResonanceOrbitalElementSetFacade(
                 orbital_element_sets, resonance)
             phase_builder.build(aei_data, resonance.id, orbital_elem_set_facade)
+            phase_builder.flush()
 
         builder.build(resonance, aei_data)
 
@@ -1,6 +1,7 @@
 from typing import List
 
 from resonances.datamining.resonances import GetQueryBuilder, PLANET_TABLES
+from resonances.datamining.resonances import stream_resonances
 from resonances.entities import Libration, TwoBodyLibration
 from sqlalchemy.orm import Query
 from sqlalchemy.orm import aliased, contains_eager
@@ -75,7 +76,7 @@ def dump_librations(asteroid_condition: AsteroidCondition = None,
                'first_planet', 'second_planet',
                'pure', 'apocentric']
     print(';'.join(headers))
-    for resonance in query:  # type: ResonanceMixin
+    for resonance in stream_resonances(query):  # type: ResonanceMixin
         libration = resonance.libration
         data = [str(libration.id), resonance.small_body.name[1:]]
         data += [str(x.longitude_coeff) for x in resonance.get_big_bodies()]
@@ -108,7 +109,7 @@ def show_librations(asteroid_condition: AsteroidCondition = None,
                 'axis (degrees)']
     table.add_row(headers)
 
-    for resonance in query:  # type: ResonanceMixin
+    for resonance in stream_resonances(query):  # type: ResonanceMixin
         libration = resonance.libration
         data = [x.name for x in resonance.get_big_bodies()]
         data += [
@@ -5,6 +5,7 @@ from resonances.shortcuts import add_integer_filter
 from texttable import Texttable
 
 from resonances.datamining.resonances import PLANET_TABLES, GetQueryBuilder
+from resonances.datamining.resonances import stream_resonances
 from resonances.settings import Config
 from .shortcuts import AsteroidCondition, PlanetCondition
 
@@ -69,7 +70,7 @@ def show_resonance_table(asteroid_condition: AsteroidCondition = None,
     options = None
     table = None
 
-    for resonance in query:  # type: ResonanceMixin
+    for resonance in stream_resonances(query):  # type: ResonanceMixin
         if options is None:
             options = type(resonance).get_table_options()
             table = Texttable(max_width=120)
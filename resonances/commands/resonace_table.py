@@ -1,10 +1,13 @@
 from resonances.settings import Config
 import math
+from functools import lru_cache
 from typing import Dict
+from typing import Tuple
 from enum import Enum
 from enum import unique
 from typing import List
-from fractions import gcd
+
+import numpy as np
 
 
 @unique
@@ -41,30 +44,42 @@ class _ResonanceGeneratorBuilder:
         else:
             self.order_max = 25
 
-    def build(self):
+    def build(self) -> np.ndarray:
+        """Builds matrix, where every row contains integers of resonance. Rows are ordered
+        lexicographically by varied integers.
+        """
         if self.body_count == 2:
             return self._3b_resonance_gen()
         else:
             return self._2b_resonance_gen()
 
-    def _3b_resonance_gen(self):
-        for i in range(1, 9):
-            for j in range(-self.order_max, self.order_max + 1):
-                for k in range(-self.order_max, self.order_max + 1):
-                    diff = int(0.0 - i - j - k)
-                    if i == 0 or j == 0 or k == 0 or abs(diff) > self.order_max:
-                        continue
-                    resonance = [i, j, k, 0, 0, diff]
-                    yield resonance
-
-    def _2b_resonance_gen(self):
-        for i in range(1, self.order_max + 1):
-            for j in range(1, self.order_max + 1):
-                if gcd(i, j) > 1:
-                    continue
-                diff = i - j
-                resonance = [i, -j, 0, -diff]
-                yield resonance
+    def _3b_resonance_gen(self) -> np.ndarray:
+        i, j, k = _grid(range(1, 9), range(-self.order_max, self.order_max + 1),
+                        range(-self.order_max, self.order_max + 1))
+        diff = -i - j - k
+        mask = (j != 0) & (k != 0) & (np.abs(diff) <= self.order_max)
+        zeros = np.zeros(np.count_nonzero(mask), dtype=int)
+        return np.column_stack([i[mask], j[mask], k[mask], zeros, zeros, diff[mask]])
+
+    def _2b_resonance_gen(self) -> np.ndarray:
+        i, j = _grid(range(1, self.order_max + 1), range(1, self.order_max + 1))
+        mask = _gcd(i, j) == 1
+        i, j = i[mask], j[mask]
+        return np.column_stack([i, -j, np.zeros_like(i), j - i])
+
+
+def _grid(*ranges: range) -> List[np.ndarray]:
+    return [x.ravel() for x in np.meshgrid(*[np.arange(x.start, x.stop) for x in ranges],
+                                           indexing='ij')]
+
+
+def _gcd(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Computes greatest common divisors of pairs by Euclidean algorithm."""
+    a, b = np.abs(a), np.abs(b)
+    while np.any(b):
+        nonzero = b != 0
+        a[nonzero], b[nonzero] = b[nonzero], a[nonzero] % b[nonzero]
+    return a
 
 
 def _build_line_data(resonance: List[int], axis: float) -> str:
@@ -78,69 +93,67 @@ def _build_line_data(resonance: List[int], axis: float) -> str:
 def generate_resonance_table(body_names: List[str], axis_max: float = None,
                              order_max: int = None) -> List[str]:
     """
-    Generates resonance table.
+    Generates resonance table. Table is generated once for every set of arguments.
     """
-    data = []
+    return list(_generate_resonance_table(tuple(body_names), axis_max, order_max))
+
 
+@lru_cache(maxsize=None)
+def _generate_resonance_table(body_names: Tuple[str], axis_max: float,
+                              order_max: int) -> Tuple[str]:
     body_count = len(body_names)
     builder = _ResonanceGeneratorBuilder(body_count, order_max)
-    for resonance in builder.build():
-        if body_count == 2:
-            try:
-                bodies = [_build_body(x) for x in body_names]
-                axis = _build_resonance_axis(resonance, bodies)
-            except _MeanMotionException:
-                pass
-                continue
-            if abs(resonance[5]) >= builder.order_max or axis <= _AXIS_MIN:
-                continue
-            if axis_max is not None and axis >= axis_max:
-                continue
-            line_data = _build_line_data(resonance, axis)
-        elif body_count == 1:
-            body_axis = _build_body(body_names[0])['axis']
-            ratio = (-resonance[1]) / resonance[0]
-            axis = body_axis * (ratio ** (2/3))
-            line_data = _build_line_data(resonance, axis)
-        else:
-            raise Exception('Unexpected count of bodies.')
-        pass
-        data.append(line_data)
-    return data
-
+    resonances = builder.build()
+    if body_count == 2:
+        bodies = [_build_body(x) for x in body_names]
+        axises = _build_resonance_axises(resonances, bodies)
+        mask = ~np.isnan(axises)
+        mask[mask] = axises[mask] > _AXIS_MIN
+        mask &= np.abs(resonances[:, 5]) < builder.order_max
+        if axis_max is not None:
+            mask[mask] = axises[mask] < axis_max
+        resonances, axises = resonances[mask], axises[mask]
+    elif body_count == 1:
+        body_axis = _build_body(body_names[0])['axis']
+        ratios = (-resonances[:, 1]) / resonances[:, 0]
+        axises = body_axis * (ratios ** (2/3))
+    else:
+        raise Exception('Unexpected count of bodies.')
 
-class _MeanMotionException(Exception):
-    pass
+    return tuple(_build_line_data(x, y) for x, y in zip(resonances.tolist(), axises.tolist()))
 
 
-def _build_resonance_axis(resonance, bodies: List[_Body]) -> float:
+def _build_resonance_axises(resonances: np.ndarray, bodies: List[_Body]) -> np.ndarray:
+    """Computes semi major axises of asteroids for pointed resonances by two iterations. Axis
+    is NaN if mean motion of asteroid is negative on any iteration.
+    """
     jupiter = bodies[0]
     body_count = len(bodies)
     K = CONFIG['constants']['k']
 
-    items = []
+    resonances = resonances.astype(np.float64)
+    lin_combination = np.zeros(len(resonances))
     for i, body in enumerate(bodies):
-        items.append(-resonance[i] * body['mean_motion'])
-        items.append(-resonance[i + body_count + 1] * body['longitude_of_periapsis'])
-    lin_combination = sum(items)
-    mean_motion = lin_combination / resonance[2]
-    if mean_motion < 0:
-        raise _MeanMotionException()
-
-    axis = (K / mean_motion) ** (2.0/3)
+        lin_combination += -resonances[:, i] * body['mean_motion']
+        lin_combination += -resonances[:, i + body_count + 1] * body['longitude_of_periapsis']
+    mean_motion = lin_combination / resonances[:, 2]
+    axis = np.full(len(resonances), np.nan)
+    mask = mean_motion >= 0
+    axis[mask] = (K / mean_motion[mask]) ** (2.0/3)
+
     eps = (jupiter['axis'] - axis) / jupiter['axis']
     longitude_of_periapsis = (
-        K / (2 * math.pi) * math.sqrt(axis / jupiter['axis']) *
+        K / (2 * math.pi) * np.sqrt(axis / jupiter['axis']) *
         (eps ** 2) * jupiter['mean_motion']
     )
-    mean_motion = (lin_combination - resonance[2] * longitude_of_periapsis) / resonance[2]
-    if mean_motion < 0:
-        raise _MeanMotionException()
-
-    axis = (K / mean_motion) ** (2.0/3)
+    mean_motion = (lin_combination - resonances[:, 2] * longitude_of_periapsis) / resonances[:, 2]
+    mask &= mean_motion >= 0
+    axis[:] = np.nan
+    axis[mask] = (K / mean_motion[mask]) ** (2.0/3)
     return axis
 
 
+@lru_cache(maxsize=None)
 def _build_body(by_name: str) -> _Body:
     planet_index = _PLANET_NUMBER[by_name]
     constants = CONFIG['constants']
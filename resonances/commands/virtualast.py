@@ -7,7 +7,8 @@ from numpy.random import normal as normal_dist
 from typing import Tuple
 from typing import Iterable
 from typing import List
-from resonances.catalog import asteroid_gen
+from resonances.catalog import catalog_block_gen
+from resonances.catalog import get_asteroid_data
 from resonances.catalog import read_header
 from concurrent.futures import ThreadPoolExecutor
 from asyncio.futures import Future
@@ -114,11 +115,12 @@ class VirtualAsteroidCatalogBuilder:
 
     def _gen_distributions(self) -> Iterable[List[_DistributionParams]]:
         with ThreadPoolExecutor(max_workers=THREADS) as executor:
-            for name, orbital_elems in asteroid_gen(self._catalog, self._start, self._stop):
-                if self._epoch is None:
-                    self._epoch = orbital_elems[0]
-                task = executor.submit(_wrapped_grab_variations, name, orbital_elems)
-                task.add_done_callback(_accumulate_distributions)
+            for block in catalog_block_gen(THREADS, self._catalog, self._start, self._stop):
+                for name, orbital_elems in get_asteroid_data(block):
+                    if self._epoch is None:
+                        self._epoch = orbital_elems[0]
+                    task = executor.submit(_wrapped_grab_variations, name, orbital_elems)
+                    task.add_done_callback(_accumulate_distributions)
 
     def build(self, count: int):
         global _name_dists
@@ -1,6 +1,8 @@
 from .orbitalelements import OrbitalElementSetCollection
 from .orbitalelements import ComputedOrbitalElementSetFacade
 from .orbitalelements import ResonanceOrbitalElementSetFacade
+from .orbitalelements import ResonantPhaseEngine
+from .orbitalelements import build_coefficient_matrix
 from .orbitalelements import build_bigbody_elements
 from .orbitalelements import IOrbitalElementSetFacade
 from .orbitalelements import ElementCountException
@@ -12,6 +14,7 @@ from .librations import ApocentricBuilder
 from .librations import TransientBuilder
 from .librations import LibrationDirector
 from .librations import LibrationClassifier
+from .librations import LibrationSink
 
 from .resonances import get_resonances_with_id
 from .resonances import get_aggregated_resonances
@@ -19,11 +22,13 @@ from .resonances import get_resonances
 from .resonances import AEIDataGetter
 from .resonances import ResonanceAeiData
 from .resonances import get_resonances_by_asteroids
+from .resonances import expunge_resonances
 
 from .phases import PhaseBuilder
 from .phases import PhaseLoader
 from .phases import PhaseStorage
 from .phases import PhaseCleaner
 from .phases import get_file_name
+from .phases import get_binary_file_name
 
 from .asteroids import get_random_asteroids
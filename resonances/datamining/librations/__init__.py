@@ -2,3 +2,6 @@ from .librationbuilder import ApocentricBuilder
 from .librationbuilder import LibrationDirector
 from .librationbuilder import TransientBuilder
 from .classifier import LibrationClassifier
+from .sink import LibrationSink
+from .sink import LibrationRow
+from .sink import save_libration_rows
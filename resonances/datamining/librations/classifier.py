@@ -1,5 +1,7 @@
 import logging
-from typing import List, Dict
+from typing import List, Dict, Union
+
+import numpy as np
 
 from resonances.datamining import ResonanceOrbitalElementSetFacade
 from resonances.entities import ResonanceMixin, BodyNumberEnum, LibrationMixin
@@ -9,6 +11,7 @@ from resonances.settings import Config
 from .librationbuilder import ApocentricBuilder
 from .librationbuilder import LibrationDirector
 from .librationbuilder import TransientBuilder
+from .sink import LibrationSink
 
 CONFIG = Config.get_params()
 BODIES_COUNTER = CONFIG['integrator']['number_of_bodies']
@@ -19,8 +22,14 @@ class LibrationClassifier:
     Class is need for determining type of libration. If it needs, class will build libration by
     resonances and orbital elements of related sky bodies.
     """
-    def __init__(self, get_from_db, body_count: BodyNumberEnum):
+    def __init__(self, get_from_db, body_count: BodyNumberEnum, sink: LibrationSink = None):
+        """
+        :param get_from_db:
+        :param body_count:
+        :param sink: if it is pointed, built librations are passed to it instead of session.
+        """
         self._get_from_db = get_from_db
+        self._sink = sink
         self._libration_director = LibrationDirector(body_count)
         self._resonance = None  # type: ResonanceMixin
         self._resonance_str = None  # type: str
@@ -40,17 +49,25 @@ class LibrationClassifier:
         self._libration = self._resonance.libration
 
     def classify(self, orbital_elem_set: ResonanceOrbitalElementSetFacade,
-                 serialized_phases: List[Dict[str, float]]) -> bool:
+                 phases: Union[np.ndarray, List[Dict[str, float]]]) -> bool:
         """
         Determines class of libration. Libration can be loaded from database if object has upped
         flag _get_from_db. If libration's class was not determined, libration will be removed and
         method returns False else libration will be saved and method return True.
-        :param serialized_phases:
+        :param phases: matrix of years and resonant phases or list of serialized phases.
         :param orbital_elem_set:
         :return: flag of successful determining class of libration.
         """
+        is_built = not self._get_from_db and self._libration is None
+        is_determined = self._classify(orbital_elem_set, phases)
+        if self._sink and is_built and is_determined:
+            self._sink.add(self._resonance, self._libration)
+        return is_determined
+
+    def _classify(self, orbital_elem_set: ResonanceOrbitalElementSetFacade,
+                  phases: Union[np.ndarray, List[Dict[str, float]]]) -> bool:
         if not self._get_from_db and self._libration is None:
-            builder = TransientBuilder(self._resonance, orbital_elem_set, serialized_phases)
+            builder = TransientBuilder(self._resonance, orbital_elem_set, phases)
             self._libration = self._libration_director.build(builder)
         elif not self._libration:
             return True
@@ -65,7 +82,7 @@ class LibrationClassifier:
             raise _NoTransientException()
         except _NoTransientException:
             if not self._get_from_db and not self._libration.is_apocentric:
-                builder = ApocentricBuilder(self._resonance, orbital_elem_set, serialized_phases)
+                builder = ApocentricBuilder(self._resonance, orbital_elem_set, phases)
                 self._libration = self._libration_director.build(builder)
 
             if self._libration.is_pure:
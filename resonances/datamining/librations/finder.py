@@ -1,7 +1,10 @@
 import math
-from typing import List
+from typing import List, Dict, Tuple, Union
+
+import numpy as np
 
 from resonances.shortcuts import cutoff_angle
+from resonances.shortcuts import cutoff_angles
 
 
 class CirculationYearsFinder:
@@ -51,5 +54,62 @@ class CirculationYearsFinder:
         return result_breaks
 
 
+class VectorCirculationYearsFinder:
+    """
+    Vectorized version of CirculationYearsFinder. It works with arrays of years and resonant
+    phases directly and gives same circulation breaks.
+    """
+    def __init__(self, resonance_id: int, is_for_apocentric: bool, years: np.ndarray,
+                 phases: np.ndarray):
+        self._years = np.asarray(years, dtype=np.float64)
+        self._phases = np.asarray(phases, dtype=np.float64)
+        self._is_for_apocentric = is_for_apocentric
+        self._resonance_id = resonance_id
+
+    def get_time_breaks(self) -> List[float]:
+        """Find circulations in arrays of phases.
+        """
+        if not self._phases.size:
+            raise NoPhaseException('no resonant phases for resonance_id: %i' %
+                                   self._resonance_id)
+
+        if self._is_for_apocentric:
+            resonant_phases = cutoff_angles(self._phases + math.pi)
+        else:
+            resonant_phases = self._phases
+
+        # Difference between previous and current phase. Zero phases are skipped by the
+        # iterative version, so jumps from and to them are not breaks.
+        diffs = -np.diff(resonant_phases)
+        is_break = ((resonant_phases[:-1] != 0) & (resonant_phases[1:] != 0) &
+                    (np.abs(diffs) >= math.pi))
+        break_years = self._years[:-1][is_break]
+        directions = np.where(diffs[is_break] > 0, 1, -1)
+
+        # Break is cancelled by following break in opposite direction, see the comment
+        # about apocentric libration in CirculationYearsFinder.
+        is_kept = np.ones(break_years.size, dtype=bool)
+        is_kept[:-1] = directions[1:] == directions[:-1]
+        return break_years[is_kept].tolist()
+
+
+def split_phases(phases: Union[np.ndarray, List[Dict[str, float]]]) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """Converts phases to arrays of years and values. Columns of matrix are returned without
+    copying.
+
+    :param phases: matrix, where columns contain years and values, or list of dictionaries
+    with keys year and value.
+    :return: tuple of arrays with years and values.
+    """
+    if isinstance(phases, np.ndarray):
+        return phases[:, 0], phases[:, 1]
+    serialized_phases = phases
+    count = len(serialized_phases)
+    years = np.fromiter((x['year'] for x in serialized_phases), np.float64, count)
+    values = np.fromiter((x['value'] for x in serialized_phases), np.float64, count)
+    return years, values
+
+
 class NoPhaseException(Exception):
     pass
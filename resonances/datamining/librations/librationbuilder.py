@@ -1,5 +1,7 @@
 from abc import abstractmethod
-from typing import Dict, List, cast
+from typing import Dict, List, Union, cast
+
+import numpy as np
 
 from resonances.datamining import IOrbitalElementSetFacade
 
@@ -11,7 +13,8 @@ from resonances.entities import TwoBodyResonance
 from resonances.entities import LibrationMixin
 from resonances.entities import ThreeBodyResonance
 from resonances.settings import Config
-from .finder import CirculationYearsFinder
+from .finder import VectorCirculationYearsFinder
+from .finder import split_phases
 
 PROJECT_DIR = Config.get_project_dir()
 CONFIG = Config.get_params()
@@ -22,8 +25,8 @@ OUTPUT_ANGLE = CONFIG['output']['angle']
 class _AbstractLibrationBuilder:
     def __init__(self, libration_resonance: ResonanceMixin,
                  orbital_elem_set: IOrbitalElementSetFacade,
-                 serialized_phases: List[Dict[str, float]]):
-        self._serialized_phases = serialized_phases
+                 phases: Union[np.ndarray, List[Dict[str, float]]]):
+        self._phases = phases
         self._orbital_elem_set = orbital_elem_set
         self._resonance = libration_resonance
 
@@ -38,9 +41,9 @@ class _AbstractLibrationBuilder:
             return Libration(cast(ThreeBodyResonance, self._resonance), years, X_STOP,
                              self.is_apocetric())
 
-    @abstractmethod
-    def _get_finder(self) -> CirculationYearsFinder:
-        pass
+    def _get_finder(self) -> VectorCirculationYearsFinder:
+        years, phases = split_phases(self._phases)
+        return VectorCirculationYearsFinder(self._resonance.id, self.is_apocetric(), years, phases)
 
     @abstractmethod
     def is_apocetric(self) -> bool:
@@ -48,21 +51,11 @@ class _AbstractLibrationBuilder:
 
 
 class TransientBuilder(_AbstractLibrationBuilder):
-    def _get_finder(self) -> CirculationYearsFinder:
-        transient_finder = CirculationYearsFinder(self._resonance.id, self.is_apocetric(),
-                                                  self._serialized_phases)
-        return transient_finder
-
     def is_apocetric(self) -> bool:
         return False
 
 
 class ApocentricBuilder(_AbstractLibrationBuilder):
-    def _get_finder(self) -> CirculationYearsFinder:
-        apocentric_finder = CirculationYearsFinder(self._resonance.id, self.is_apocetric(),
-                                                   self._serialized_phases)
-        return apocentric_finder
-
     def is_apocetric(self) -> bool:
         return True
 
@@ -0,0 +1,80 @@
+from typing import List
+from typing import Tuple
+
+from resonances.entities import BodyNumberEnum
+from resonances.entities import Libration
+from resonances.entities import LibrationMixin
+from resonances.entities import ResonanceMixin
+from resonances.entities import TwoBodyLibration
+from resonances.entities.dbutills import OnConflictInsert
+from resonances.entities.dbutills import session
+from resonances.entities.dbutills import transaction
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm.attributes import set_committed_value
+
+LIBRATION_BATCH_SIZE = 1000
+
+# resonance_id, circulation_breaks, is_apocentric, average_delta, percentage
+LibrationRow = Tuple[int, List[float], bool, float, float]
+
+
+class LibrationSink:
+    """
+    Collects found librations as plain rows and writes them to database by multi-row queries.
+    Librations are removed from session at once, so identity map doesn't grow during search.
+    """
+    def __init__(self, body_count: BodyNumberEnum, batch_size: int = LIBRATION_BATCH_SIZE,
+                 conn: Connection = None):
+        """
+        :param body_count: defines table of librations.
+        :param batch_size: number of rows in one insert query.
+        :param conn: connection for saving rows, every batch takes connection from pool if it
+        is not pointed.
+        """
+        self._conn = conn
+        self._body_count = body_count
+        self._batch_size = batch_size
+        self._rows = []  # type: List[LibrationRow]
+
+    def add(self, resonance: ResonanceMixin, libration: LibrationMixin):
+        """Adds row of libration and detaches libration from session and from resonance, so
+        libration isn't cascaded to session by resonance during next flush.
+        """
+        if libration in session:
+            session.expunge(libration)
+        set_committed_value(resonance, 'libration', None)
+        self.add_rows([(resonance.id, libration.circulation_breaks, libration.is_apocentric,
+                        libration.average_delta, libration.percentage)])
+
+    def add_rows(self, rows: List[LibrationRow]):
+        self._rows += rows
+        if len(self._rows) >= self._batch_size:
+            self.flush()
+
+    def flush(self, conn: Connection = None):
+        """Saves all collected rows.
+
+        :param conn: connection for saving rows instead of connection of the sink.
+        """
+        save_libration_rows(self._rows, self._body_count, conn or self._conn)
+        self._rows = []
+
+
+def save_libration_rows(rows: List[LibrationRow], body_count: BodyNumberEnum,
+                        conn: Connection = None):
+    """Saves rows of librations by one query. Librations of resonances, that already have
+    libration, are skipped.
+
+    :param rows:
+    :param body_count: defines table of librations.
+    :param conn: connection, new connection will be taken from pool if it is not pointed.
+    """
+    if not rows:
+        return
+    table = Libration.__table__ if body_count == BodyNumberEnum.three \
+        else TwoBodyLibration.__table__
+    values = [dict(resonance_id=x[0], circulation_breaks=x[1], is_apocentric=x[2],
+                   average_delta=x[3], percentage=x[4]) for x in rows]
+    insert_q = OnConflictInsert(table.insert().values(values), ['resonance_id'])
+    with transaction(conn) as conn:
+        conn.execute(insert_q)
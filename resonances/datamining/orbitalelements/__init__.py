@@ -1,5 +1,8 @@
 import glob
+import io
+import json
 import os
+import re
 import shutil
 from os import makedirs
 from os.path import basename
@@ -10,11 +13,16 @@ from tarfile import TarFile
 from tarfile import TarInfo
 from tarfile import is_tarfile
 from tarfile import open as taropen
+from typing import Dict
 from typing import Iterable
 from typing import List
+from typing import Tuple
 
+import pandas as pd
 from boto.s3.connection import S3Connection
 from resonances.shortcuts import is_s3
+from resonances.shortcuts import read_aei
+from resonances import cache
 
 from resonances.settings import Config
 from .collection import OrbitalElementSet
@@ -26,6 +34,8 @@ from .facades import AsteroidElementCountException
 from .facades import IOrbitalElementSetFacade
 from .facades import PhaseCountException
 from .facades import ResonanceOrbitalElementSetFacade
+from .facades import ResonantPhaseEngine
+from .facades import build_coefficient_matrix
 
 PROJECT_DIR = Config.get_project_dir()
 CONFIG = Config.get_params()
@@ -37,6 +47,14 @@ _s3_folder = CONFIG['s3files_dir']
 S3_FILES_DIR = _s3_folder if isabs(_s3_folder) else opjoin(PROJECT_DIR, _s3_folder)
 
 
+TAR_INDEX_SUFFIX = '.tarindex.json'
+_COMPRESSED_MAGICS = [b'\x1f\x8b', b'BZh', b'\xfd7zXZ']
+_ASTEROID_AEI_PATTERN = re.compile(r'^A\d+\.aei$')
+
+# member name, offset of data, size, modification time
+TarMember = Tuple[str, int, int, float]
+
+
 class FilepathException(Exception):
     pass
 
@@ -76,15 +94,69 @@ def _check(paths, by_controlling: List[str]) -> List[str]:
                                        'supported' % ' '.join(invalid_paths))
 
 
+def _is_compressed(tarname: str) -> bool:
+    with open(tarname, 'rb') as f:
+        head = f.read(6)
+    return any([head.startswith(x) for x in _COMPRESSED_MAGICS])
+
+
+def get_tar_index(tarname: str) -> Dict[str, TarMember]:
+    """Gets index of members of pointed archive. Index is built by one pass through the archive
+    and it is stored to cache, so next time it will be loaded without reading the archive.
+
+    :param tarname: path to tar archive.
+    :return: dictionary, where key is base name of member.
+    """
+    index_path = cache.get_cache_path(tarname, TAR_INDEX_SUFFIX)
+    if opexists(index_path):
+        with open(index_path) as f:
+            return {key: tuple(value) for key, value in json.load(f).items()}
+
+    index = {}  # type: Dict[str, TarMember]
+    with taropen(tarname, 'r|*') as tarfile:  # type: TarFile
+        for taritem in tarfile:  # type: TarInfo
+            name = basename(taritem.name)
+            if taritem.isfile() and name not in index:
+                index[name] = (taritem.name, taritem.offset_data, taritem.size, taritem.mtime)
+
+    cache.remove_stale(tarname, TAR_INDEX_SUFFIX)
+    temp_path = '%s.%i.tmp' % (index_path, os.getpid())
+    makedirs(cache.CACHE_DIR, exist_ok=True)
+    with open(temp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(temp_path, index_path)
+    return index
+
+
+def asteroid_aei_gen(tarname: str) -> Iterable[Tuple[str, pd.DataFrame]]:
+    """Reads archive sequentially by one pass and parses aei files of asteroids from memory
+    without extraction to disk.
+
+    :param tarname: path to tar archive.
+    :return: generator of pairs of asteroid name and its orbital elements.
+    """
+    with taropen(tarname, 'r|*') as tarfile:  # type: TarFile
+        for taritem in tarfile:  # type: TarInfo
+            name = basename(taritem.name)
+            if not taritem.isfile() or not _ASTEROID_AEI_PATTERN.match(name):
+                continue
+            # members of stream are not seekable, so content is buffered.
+            content = io.BytesIO(tarfile.extractfile(taritem).read())
+            yield name[:-4], read_aei(content)
+
+
 class FilepathBuilder:
     """
     Class builds paths of pointed file names from base paths. It will search name recursive if it is
     needed.
     """
 
-    def __init__(self, paths: Iterable, is_recursive=False, is_clear_downloaded: bool = False):
+    def __init__(self, paths: Iterable, is_recursive=False, is_clear_downloaded: bool = False,
+                 extract_path: str = EXTRACT_PATH):
         self._is_clear_downloaded = is_clear_downloaded
-        self._last_tar = None
+        self._extract_path = extract_path
+        self._indexes = {}  # type: Dict[str, Dict[str, TarMember]]
+        self._extracted = {}  # type: Dict[str, str]
         self._is_recursive = is_recursive
         self._archives = []
         self._dirs = []
@@ -100,7 +172,16 @@ class FilepathBuilder:
 
         _check(paths, self._dirs + self._archives + s3paths)
         self._archives += _get_from_s3(s3paths)
-        self._dirs.append(EXTRACT_PATH)
+        self._dirs.append(self._extract_path)
+
+    @property
+    def has_archives(self) -> bool:
+        return bool(self._archives)
+
+    @property
+    def archives(self) -> List[str]:
+        """Local paths of archives. Archives from S3 are downloaded already."""
+        return self._archives
 
     def build(self, for_name: str) -> str:
         """ Builds full path by pointed filename.
@@ -134,22 +215,83 @@ class FilepathBuilder:
 
         return res
 
+    def _get_index(self, tarname: str) -> Dict[str, TarMember]:
+        if tarname not in self._indexes:
+            self._indexes[tarname] = get_tar_index(tarname)
+        return self._indexes[tarname]
+
+    def _find_in_tars(self, for_name: str) -> Tuple[str, TarMember]:
+        for tarname in self._archives:
+            member = self._get_index(tarname).get(for_name)
+            if member:
+                return tarname, member
+        return None, None
+
+    def _extract_by_seek(self, tarname: str, member: TarMember) -> str:
+        member_name, offset, size, mtime = member
+        filepath = opjoin(self._extract_path, member_name)
+        makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(tarname, 'rb') as tarfile, open(filepath, 'wb') as f:
+            tarfile.seek(offset)
+            f.write(tarfile.read(size))
+        os.utime(filepath, (mtime, mtime))
+        self._extracted[basename(member_name)] = filepath
+        return filepath
+
+    def _get_extracted(self, for_name: str) -> str:
+        filepath = self._extracted.get(for_name)
+        if filepath and opexists(filepath):
+            return filepath
+        return None
+
     def _build_from_tars(self, for_name: str) -> str:
-        archives = [self._last_tar] + self._archives if self._last_tar else self._archives
-        for tarname in archives:
-            with taropen(tarname) as tarfile:  # type: TarFile
+        res = self._get_extracted(for_name)
+        if res:
+            return res
+        tarname, member = self._find_in_tars(for_name)
+        if not tarname:
+            return None
+        if not _is_compressed(tarname):
+            return self._extract_by_seek(tarname, member)
+        for name, filepath in self.extract([for_name]):
+            return filepath
+        return None
+
+    def extract(self, names: Iterable[str]) -> Iterable[Tuple[str, str]]:
+        """Extracts pointed files from archives. Every compressed archive is read by one pass,
+        files are extracted in order of their location in the archive. Files, that already are
+        in folders, are not extracted.
+
+        :param names: names of files.
+        :return: generator of pairs of file name and path to extracted file.
+        """
+        members = {}  # type: Dict[str, Dict[str, str]]
+        for name in names:
+            if self._get_extracted(name) or self._build_from_dirs(name):
+                continue
+            tarname, member = self._find_in_tars(name)
+            if not tarname:
+                continue
+            if not _is_compressed(tarname):
+                yield name, self._extract_by_seek(tarname, member)
+            else:
+                members.setdefault(tarname, {})[member[0]] = name
+
+        for tarname, names_by_member in members.items():
+            with taropen(tarname, 'r|*') as tarfile:  # type: TarFile
                 for taritem in tarfile:  # type: TarInfo
-                    filepath = taritem.name
-                    if for_name not in filepath:
+                    name = names_by_member.pop(taritem.name, None)
+                    if name is None:
                         continue
-                    tarfile.extract(taritem, EXTRACT_PATH)
-                    self._last_tar = tarname
-                    return opjoin(EXTRACT_PATH, filepath)
-        return None
+                    tarfile.extract(taritem, self._extract_path)
+                    self._extracted[name] = opjoin(self._extract_path, taritem.name)
+                    yield name, self._extracted[name]
+                    if not names_by_member:
+                        break
 
     def __del__(self):
-        if opexists(EXTRACT_PATH):
-            shutil.rmtree(EXTRACT_PATH)
+        if opexists(self._extract_path):
+            shutil.rmtree(self._extract_path)
 
         if self._is_clear_downloaded and opexists(S3_FILES_DIR):
             shutil.rmtree(S3_FILES_DIR)
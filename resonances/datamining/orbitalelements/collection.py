@@ -5,7 +5,7 @@ import pandas as pd
 import numpy as np
 
 from resonances.settings import Config
-from resonances.shortcuts import AEI_HEADER
+from resonances.shortcuts import read_aei
 
 SMALL_BODY = 'small_body'
 CONFIG = Config.get_params()
@@ -107,11 +107,12 @@ class OrbitalElementSetCollection:
         """
         self._filepath = filepath
         self._set = self._get_orbital_elements()
+        self._m_longitudes = None  # type: np.ndarray
+        self._p_longitudes = None  # type: np.ndarray
+        self._times = None  # type: np.ndarray
 
     def _get_orbital_elements(self) -> pd.DataFrame:
-        res = pd.read_csv(self._filepath, dtype=np.float64,  # pylint: disable=no-member
-                          names=AEI_HEADER, skiprows=HEADER_LINE_COUNT, delimiter=r"\s+")
-        return res
+        return read_aei(self._filepath)
 
     @property
     def orbital_elements(self) -> pd.DataFrame:
@@ -120,6 +121,44 @@ class OrbitalElementSetCollection:
         """
         return self._set
 
+    def _build_longitudes(self):
+        elems = self.orbital_elements
+        p_longitudes = np.radians(elems['long'].values.astype(np.float64))
+        m_longitudes = p_longitudes + np.radians(elems['M'].values.astype(np.float64))
+        times = np.array(elems['Time (years)'].values, dtype=np.float64)
+        for item in (m_longitudes, p_longitudes, times):
+            item.flags.writeable = False
+        self._m_longitudes = m_longitudes
+        self._p_longitudes = p_longitudes
+        self._times = times
+
+    @property
+    def m_longitudes(self) -> np.ndarray:
+        """
+        :return: read-only array of mean longitudes in radians.
+        """
+        if self._m_longitudes is None:
+            self._build_longitudes()
+        return self._m_longitudes
+
+    @property
+    def p_longitudes(self) -> np.ndarray:
+        """
+        :return: read-only array of perihelion longitudes in radians.
+        """
+        if self._p_longitudes is None:
+            self._build_longitudes()
+        return self._p_longitudes
+
+    @property
+    def times(self) -> np.ndarray:
+        """
+        :return: read-only array of times in years.
+        """
+        if self._times is None:
+            self._build_longitudes()
+        return self._times
+
     def __getitem__(self, item: int) -> OrbitalElementSet:
         elems = self.orbital_elements
         return elems.values[item]  # pylint: disable=no-member
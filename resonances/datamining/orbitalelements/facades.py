@@ -1,4 +1,4 @@
-from typing import List, Iterable, Tuple, Dict
+from typing import List, Iterable, Dict
 
 import numpy as np
 import os
@@ -156,6 +156,65 @@ def _get_longitutes(aei_data: pd.DataFrame):
     return m_longs, p_longs, times
 
 
+def _validate_element_count(orbital_element_sets: List[OrbitalElementSetCollection],
+                            aei_data: pd.DataFrame):
+    planets_elements_count = len(orbital_element_sets[0])
+    asteroid_elements_count = aei_data.shape[0]
+    if planets_elements_count != asteroid_elements_count:
+        raise AsteroidElementCountException(
+            'Number of elements (%i) for asteroid in aei file is not '
+            'equal to number of elements (%i) for planets.' %
+            (planets_elements_count, asteroid_elements_count))
+
+
+def build_coefficient_matrix(resonances: List[ResonanceMixin]) -> np.ndarray:
+    """Builds matrix of integers of pointed resonances. Every row contains coefficients of mean
+    longitude and perihelion longitude for every big body and for small body at the end.
+
+    :param resonances: resonances of one asteroid.
+    :return: matrix with shape (number of resonances, 2 * number of bodies).
+    """
+    rows = []
+    for resonance in resonances:
+        row = []
+        for body in resonance.get_big_bodies() + [resonance.small_body]:
+            row += [body.longitude_coeff, body.perihelion_longitude_coeff]
+        rows.append(row)
+    return np.array(rows, dtype=np.float64)
+
+
+class ResonantPhaseEngine:
+    """
+    Computes resonant phases for many resonances of one asteroid at once. Longitudes of planets
+    are taken from the collections only one time for all asteroids.
+    """
+    def __init__(self, orbital_element_sets: List[OrbitalElementSetCollection]):
+        self._orbital_element_sets = orbital_element_sets
+        count = len(orbital_element_sets[0])
+        self._longitudes = np.empty((2 * (len(orbital_element_sets) + 1), count))
+        for i, set_ in enumerate(orbital_element_sets):
+            self._longitudes[2 * i] = set_.m_longitudes
+            self._longitudes[2 * i + 1] = set_.p_longitudes
+
+    def get_resonant_phases(self, aei_data: pd.DataFrame, coefficients: np.ndarray) \
+            -> np.ndarray:
+        """Computes resonant phases as product of matrix of integers and matrix of longitudes.
+
+        :param aei_data: orbital elements of asteroid.
+        :param coefficients: matrix built by build_coefficient_matrix.
+        :return: matrix of resonant phases in interval (-pi, pi] with shape (number of
+        resonances, number of elements in aei_data).
+        """
+        _validate_element_count(self._orbital_element_sets, aei_data)
+        m_longs, p_longs, times = _get_longitutes(aei_data)
+        self._longitudes[-2] = m_longs
+        self._longitudes[-1] = p_longs
+        phases = np.dot(np.atleast_2d(coefficients), self._longitudes)
+        phases = np.mod(phases, 2 * np.pi)
+        phases[phases > np.pi] -= 2 * np.pi
+        return phases
+
+
 class ResonanceOrbitalElementSetFacade(IOrbitalElementSetFacade):
     """Facade of set of the orbital elements, that computes resonant phase for
     pointed resonance. It represents elements by pointed sets of orbital
@@ -163,53 +222,42 @@ class ResonanceOrbitalElementSetFacade(IOrbitalElementSetFacade):
     """
 
     def __init__(self, orbital_element_sets: List[OrbitalElementSetCollection],
-                 resonance: ResonanceMixin):
+                 resonance: ResonanceMixin, resonant_phases: np.ndarray = None):
         """
         :param orbital_element_sets:
         :param resonance:
+        :param resonant_phases: phases computed earlier by ResonantPhaseEngine.
         :return:
         """
         super(ResonanceOrbitalElementSetFacade, self).__init__(orbital_element_sets)
         self._resonance = resonance
+        self._resonant_phases = resonant_phases
 
     def _validate_asteroid_orbital_elements(self, from_aei_data: pd.DataFrame):
-        planets_elements_count = len(self._orbital_element_sets[0])
-        asteroid_elements_count = from_aei_data.shape[0]
-        if planets_elements_count != asteroid_elements_count:
-            raise AsteroidElementCountException(
-                'Number of elements (%i) for asteroid in aei file is not '
-                'equal to number of elements (%i) for planets.' %
-                (planets_elements_count, asteroid_elements_count))
-
-    def get_resonant_phases(self, aei_data: pd.DataFrame) -> Iterable[Tuple[float, float]]:
-        self._validate_asteroid_orbital_elements(aei_data)
-        phases = np.zeros(aei_data.shape[0])
-        for big_body, set_ in zip(self._resonance.get_big_bodies(), self._orbital_element_sets):
-            m_longs, p_longs, times = _get_longitutes(set_.orbital_elements)
-            summand1 = m_longs * big_body.longitude_coeff
-            summand2 = p_longs * big_body.perihelion_longitude_coeff
-            phases += summand1 + summand2
-
-        m_longs, p_longs, times = _get_longitutes(aei_data)
-        small_body = self._resonance.small_body
-        phases += (
-            m_longs * small_body.longitude_coeff +
-            p_longs * small_body.perihelion_longitude_coeff
-        )
+        _validate_element_count(self._orbital_element_sets, from_aei_data)
 
-        phases = np.mod(phases, 2 * np.pi)
-        mask = np.where(phases > np.pi)
-        phases[mask] -= 2 * np.pi
+    def get_resonant_phases(self, aei_data: pd.DataFrame) -> np.ndarray:
+        """
+        :param aei_data:
+        :return: matrix, where first column contains years and second one contains resonant
+        phases.
+        """
+        self._validate_asteroid_orbital_elements(aei_data)
+        phases = self._resonant_phases
+        if phases is None:
+            engine = ResonantPhaseEngine(self._orbital_element_sets)
+            coefficients = build_coefficient_matrix([self._resonance])
+            phases = engine.get_resonant_phases(aei_data, coefficients)[0]
 
-        return [(x, y) for x, y in zip(times, phases)]
+        times = aei_data['Time (years)'].values
+        return np.column_stack([times, phases])
 
     def get_elements(self, aei_data: pd.DataFrame) -> pd.DataFrame:
         """
         :param aei_data:
         :return:
         """
-        time_phases = self.get_resonant_phases(aei_data)
-        phases = np.array(time_phases)[:, 1]
+        phases = self.get_resonant_phases(aei_data)[:, 1]
         res_data = self._make_res_data(aei_data, phases)
         return res_data
 
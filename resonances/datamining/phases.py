@@ -1,26 +1,43 @@
+import io
 import json
 import os
+import zlib
+import numpy as np
 import pandas as pd
 
 from enum import Enum
 from enum import unique
 from os.path import isabs
 from os.path import join as opjoin
-from typing import Dict, List
+from typing import Dict, List, Tuple, Iterable
 
 from resonances.datamining import ResonanceOrbitalElementSetFacade
 from resonances.entities import Phase
+from resonances.entities import PhaseArray
 
-from resonances.entities.dbutills import REDIS, engine
-from resonances.entities.dbutills import session
+from resonances.entities.dbutills import REDIS, engine, transaction
 from resonances.settings import Config
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
 
 PROJECT_DIR = Config.get_project_dir()
 CONFIG = Config.get_params()
 _folder = CONFIG['phases_dir']
 PHASE_DIR = _folder if isabs(_folder) else opjoin(PROJECT_DIR, _folder)
+BINARY_DTYPE = np.dtype(CONFIG['binary_phases']['dtype'])
+IS_DELTA_YEARS = CONFIG['binary_phases']['delta_years']
+IS_REDIS_COMPRESSION = CONFIG['binary_phases']['redis_compression']
+# Phases of resonances are saved to Redis or Postgres by one pipeline or one COPY when buffer
+# contains it many.
+BUFFER_SIZE = 100
+
+# Header of Redis value, next byte indicates about compression of packed phases.
+REDIS_MAGIC = b'RPHS'
+_REDIS_DTYPE = np.dtype('<f8')
 
 TABLENAME = Phase.__tablename__
+_phase_table = Phase.__table__
+_phase_array_table = PhaseArray.__table__
 
 
 @unique
@@ -28,6 +45,8 @@ class PhaseStorage(Enum):
     redis = 0
     db = 1
     file = 2
+    binary = 3
+    db_array = 4
 
 
 class PhaseCleaner:
@@ -38,12 +57,21 @@ class PhaseCleaner:
         if self._phase_storage == PhaseStorage.redis:
             REDIS.delete(_get_rediskey_name(for_resonance_id))
         elif self._phase_storage == PhaseStorage.db:
-            conn = engine.connect()
-            conn.execute("DELETE FROM %s WHERE resonance_id = %s;" % (TABLENAME, for_resonance_id))
+            with transaction() as conn:
+                conn.execute(_phase_table.delete().where(
+                    _phase_table.c.resonance_id == for_resonance_id))
+        elif self._phase_storage == PhaseStorage.db_array:
+            with transaction() as conn:
+                conn.execute(_phase_array_table.delete().where(
+                    _phase_array_table.c.resonance_id == for_resonance_id))
         elif self._phase_storage == PhaseStorage.file:
             filepath = get_file_name(for_resonance_id)
             if os.path.exists(filepath):
                 os.remove(filepath)
+        elif self._phase_storage == PhaseStorage.binary:
+            filepath = get_binary_file_name(for_resonance_id)
+            if os.path.exists(filepath):
+                os.remove(filepath)
 
 
 class PhaseLoader:
@@ -52,65 +80,213 @@ class PhaseLoader:
 
     def load(self, resonance_id: int) -> List[float]:
         phases = None
-        if self._phase_storage == PhaseStorage.redis:
-            phases = [
-                json.loads(x.decode('utf-8').replace('\'', '"'))['value']
-                for x in REDIS.lrange(_get_rediskey_name(resonance_id), 0, -1)
-            ]
-        elif self._phase_storage == PhaseStorage.db:
-            conn = engine.connect()
-            result = conn.execute('SELECT value FROM %s WHERE resonance_id=%i' %
-                                  (TABLENAME, resonance_id))
-            phases = [x['value'] for x in result]
+        if self._phase_storage in (PhaseStorage.redis, PhaseStorage.db, PhaseStorage.db_array):
+            phases = self.load_many([resonance_id])[resonance_id]
         elif self._phase_storage == PhaseStorage.file:
             with open(get_file_name(resonance_id)) as f:
                 phases = [json.loads(x.replace('\'', '"'))['value'] for x in f]
+        elif self._phase_storage == PhaseStorage.binary:
+            phases = load_binary(get_binary_file_name(resonance_id))[1]
         return phases
 
+    def load_many(self, resonance_ids: Iterable[int]) -> Dict[int, List[float]]:
+        """Loads phases of many resonances. Phases from Redis are loaded by two pipelines,
+        phases from database are loaded by one query.
+
+        :param resonance_ids:
+        :return: dictionary, where keys are id numbers of resonances and values are phases.
+        """
+        if self._phase_storage == PhaseStorage.redis:
+            return {x: y[1] for x, y in _load_redis(resonance_ids).items()}
+        elif self._phase_storage == PhaseStorage.db:
+            res = {x: [] for x in resonance_ids}
+            query = select([_phase_table.c.resonance_id, _phase_table.c.value]) \
+                .where(_phase_table.c.resonance_id.in_(list(res))) \
+                .order_by(_phase_table.c.resonance_id, _phase_table.c.year)
+            with transaction() as conn:
+                for row in conn.execute(query):
+                    res[row[0]].append(row[1])
+            return res
+        elif self._phase_storage == PhaseStorage.db_array:
+            res = {x: [] for x in resonance_ids}
+            columns = _phase_array_table.c
+            query = select([columns.resonance_id, columns['values']]) \
+                .where(columns.resonance_id.in_(list(res)))
+            with transaction() as conn:
+                for row in conn.execute(query):
+                    res[row[0]] = row[1]
+            return res
+        return {x: self.load(x) for x in resonance_ids}
+
 
 class PhaseBuilder:
     def __init__(self, phase_storage: PhaseStorage = None):
         self._phase_storage = phase_storage
+        self._buffer = {}  # type: Dict[int, Tuple[np.ndarray, np.ndarray]]
 
     def build(self, by_aei_data: pd.DataFrame, resonance_id: int,
-              orbital_elem_set: ResonanceOrbitalElementSetFacade) \
-            -> List[Dict[str, float]]:
+              orbital_elem_set: ResonanceOrbitalElementSetFacade) -> np.ndarray:
+        """Computes resonant phases and saves them to storage. Phases for Redis and database
+        are buffered, call flush after building of all phases.
 
-        serialized_phases = [dict(year=year, value=value) for year, value in
-                             orbital_elem_set.get_resonant_phases(by_aei_data)]
+        :return: matrix, where first column contains years and second one contains phases.
+        """
+        phases = orbital_elem_set.get_resonant_phases(by_aei_data)
+        years, values = phases[:, 0], phases[:, 1]
         if self._phase_storage:
-            if self._phase_storage == PhaseStorage.redis:
-                _save_redis(serialized_phases, _get_rediskey_name(resonance_id))
-            elif self._phase_storage == PhaseStorage.db:
-                _save_db(serialized_phases, resonance_id)
+            if self._phase_storage in (PhaseStorage.redis, PhaseStorage.db,
+                                       PhaseStorage.db_array):
+                self._buffer[resonance_id] = years, values
+                if len(self._buffer) >= BUFFER_SIZE:
+                    self.flush()
             elif self._phase_storage == PhaseStorage.file:
-                _save_file(serialized_phases, get_file_name(resonance_id))
+                _save_file([dict(year=x, value=y) for x, y in phases.tolist()],
+                           get_file_name(resonance_id))
+            elif self._phase_storage == PhaseStorage.binary:
+                save_binary(years, values, get_binary_file_name(resonance_id))
 
-        return serialized_phases
+        return phases
+
+    def flush(self, conn: Connection = None):
+        """Saves buffered phases to Redis by one pipeline or to database by one COPY or
+        insert query.
+
+        :param conn: connection, which transaction saves phases to database. It is taken from
+        pool if it is not pointed.
+        """
+        if not self._buffer:
+            return
+        if self._phase_storage == PhaseStorage.redis:
+            pipe = REDIS.pipeline(transaction=False)
+            for resonance_id, (years, values) in self._buffer.items():
+                pipe.set(_get_rediskey_name(resonance_id), pack_phases(years, values))
+            pipe.execute()
+        elif self._phase_storage == PhaseStorage.db:
+            _save_db(self._buffer, conn)
+        elif self._phase_storage == PhaseStorage.db_array:
+            _save_db_array(self._buffer, conn)
+        self._buffer.clear()
 
 
 def get_file_name(for_resonance_id: int) -> str:
     return os.path.join(PROJECT_DIR, PHASE_DIR, '%s:%i.rphs' % (TABLENAME, for_resonance_id))
 
 
+def get_binary_file_name(for_resonance_id: int) -> str:
+    return os.path.join(PROJECT_DIR, PHASE_DIR, '%s:%i.npy' % (TABLENAME, for_resonance_id))
+
+
 def _get_rediskey_name(for_resonance_id: int) -> str:
     return '%s:%i' % (TABLENAME, for_resonance_id)
 
 
-def _save_redis(serialized_phases: List[Dict[str, float]], in_key: str):
-    pipe = REDIS.pipeline()
-    for phase in serialized_phases:
-        pipe = pipe.rpush(in_key, '%s' % phase)
-    pipe.execute()
+def pack_phases(years: List[float], values: List[float],
+                is_compressed: bool = IS_REDIS_COMPRESSION) -> bytes:
+    """Packs phases to binary value for Redis. Value starts from header, packed float64 pairs
+    of year and value are following it.
+
+    :param years:
+    :param values:
+    :param is_compressed: indicates about compression of packed phases by zlib.
+    """
+    data = np.empty((len(years), 2), dtype=_REDIS_DTYPE)
+    data[:, 0] = years
+    data[:, 1] = values
+    payload = data.tobytes()
+    if is_compressed:
+        payload = zlib.compress(payload)
+    return REDIS_MAGIC + (b'\x01' if is_compressed else b'\x00') + payload
+
+
+def unpack_phases(packed_phases: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Unpacks phases, that are packed by pack_phases.
 
+    :return: years and values of phases.
+    """
+    header_len = len(REDIS_MAGIC)
+    assert packed_phases[:header_len] == REDIS_MAGIC
+    payload = packed_phases[header_len + 1:]
+    if packed_phases[header_len:header_len + 1] == b'\x01':
+        payload = zlib.decompress(payload)
+    data = np.frombuffer(payload, dtype=_REDIS_DTYPE).reshape(-1, 2)
+    return data[:, 0], data[:, 1]
 
-def _save_db(serialized_phases: List[Dict[str, float]], for_resonance_id: int):
-    objs = [
-        Phase(resonance_id=for_resonance_id, year=x['year'], value=x['value'],
-              is_for_apocentric=False)
-        for x in serialized_phases
-    ]
-    session.bulk_save_objects(objs)
+
+def _load_redis(resonance_ids: Iterable[int]) -> Dict[int, Tuple[List[float], List[float]]]:
+    """Loads phases of pointed resonances from Redis. Types of keys are got by first pipeline,
+    phases are got by second one. Phases, which are saved as list of serialized dictionaries
+    by previous versions, are supported too.
+
+    :return: dictionary, where keys are id numbers of resonances and values are years and
+    values of phases.
+    """
+    resonance_ids = list(resonance_ids)
+    keys = [_get_rediskey_name(x) for x in resonance_ids]
+    pipe = REDIS.pipeline(transaction=False)
+    for key in keys:
+        pipe.type(key)
+    key_types = pipe.execute()
+
+    for key, key_type in zip(keys, key_types):
+        if key_type == b'list':
+            pipe.lrange(key, 0, -1)
+        else:
+            pipe.get(key)
+    res = {}
+    for resonance_id, key_type, value in zip(resonance_ids, key_types, pipe.execute()):
+        if key_type == b'list':
+            phases = [json.loads(x.decode('utf-8').replace('\'', '"')) for x in value]
+            res[resonance_id] = [x['year'] for x in phases], [x['value'] for x in phases]
+        elif value is not None:
+            res[resonance_id] = unpack_phases(value)
+        else:
+            res[resonance_id] = [], []
+    return res
+
+
+def _save_db(phases: Dict[int, Tuple[List[float], List[float]]], conn: Connection = None):
+    """Saves phases of many resonances to table phase. Previous phases of these resonances
+    are replaced, so resonances of interrupted search can be processed again. Postgres gets
+    phases by one COPY through connection of transaction, other databases get them by one
+    insert query with many parameters.
+
+    :param phases: dictionary, where keys are id numbers of resonances and values are years
+    and values of phases.
+    :param conn: connection, it is taken from pool if it is not pointed.
+    """
+    with transaction(conn) as conn:
+        conn.execute(_phase_table.delete().where(
+            _phase_table.c.resonance_id.in_(list(phases))))
+        if conn.dialect.name != 'postgresql':
+            rows = [dict(resonance_id=resonance_id, year=year, value=value)
+                    for resonance_id, (years, values) in phases.items()
+                    for year, value in zip(years, values)]
+            conn.execute(_phase_table.insert(), rows)
+            return
+
+        buffer = io.StringIO()
+        for resonance_id, (years, values) in phases.items():
+            for year, value in zip(years, values):
+                buffer.write('%i\t%r\t%r\n' % (resonance_id, float(year), float(value)))
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        cursor.copy_expert('COPY %s (resonance_id, year, value) FROM STDIN' % TABLENAME, buffer)
+
+
+def _save_db_array(phases: Dict[int, Tuple[List[float], List[float]]], conn: Connection = None):
+    """Saves phases of many resonances to table phase_array. Previous phases of these
+    resonances are replaced.
+
+    :param phases: dictionary, where keys are id numbers of resonances and values are years
+    and values of phases.
+    :param conn: connection, it is taken from pool if it is not pointed.
+    """
+    rows = [dict(resonance_id=x, years=[float(z) for z in y[0]], values=[float(z) for z in y[1]])
+            for x, y in phases.items()]
+    with transaction(conn) as conn:
+        conn.execute(_phase_array_table.delete().where(
+            _phase_array_table.c.resonance_id.in_(list(phases))))
+        conn.execute(_phase_array_table.insert(), rows)
 
 
 def _save_file(serialized_phases: List[Dict[str, float]], filename: str):
@@ -123,3 +299,45 @@ def _save_file(serialized_phases: List[Dict[str, float]], filename: str):
             sorted_items = sorted(phase.items())
             line = '{%s}' % ', '.join("'{}': {}".format(key, val) for key, val in sorted_items)
             f.write(line)
+
+
+def save_binary(years: List[float], values: List[float], filename: str,
+                dtype: np.dtype = BINARY_DTYPE, is_delta_years: bool = IS_DELTA_YEARS):
+    """Saves phases to .npy file as structured array. If years are delta encoded, first item
+    contains year of first phase and next items contain differences between neighbour years.
+
+    :param years:
+    :param values:
+    :param filename:
+    :param dtype: type of stored years and values.
+    :param is_delta_years: indicates about delta encoding of years.
+    """
+    year_field = 'year_delta' if is_delta_years else 'year'
+    data = np.empty(len(years), dtype=[(year_field, dtype), ('value', dtype)])
+    if is_delta_years and len(years):
+        years = np.asarray(years, dtype=np.float64)
+        data[year_field][0] = years[0]
+        data[year_field][1:] = np.diff(years)
+    else:
+        data[year_field] = years
+    data['value'] = values
+
+    if not os.path.exists(os.path.dirname(filename)):
+        os.makedirs(os.path.dirname(filename))
+    with open(filename, 'wb') as f:
+        np.save(f, data)
+
+
+def load_binary(filename: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Loads phases from .npy file. Values are memory-mapped, years are memory-mapped too if
+    they are not delta encoded.
+
+    :param filename:
+    :return: years and values of phases.
+    """
+    data = np.load(filename, mmap_mode='r')
+    if 'year_delta' in data.dtype.names:
+        years = np.cumsum(data['year_delta'], dtype=np.float64)
+    else:
+        years = data['year']
+    return years, data['value']
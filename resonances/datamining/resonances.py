@@ -15,8 +15,12 @@ from resonances.datamining.orbitalelements import FilepathBuilder
 from resonances.entities import ThreeBodyResonance, BodyNumberEnum, TwoBodyResonance
 from resonances.entities.dbutills import session
 from resonances.entities import ResonanceMixin
+from resonances.entities import ResonanceProgress
+from resonances.entities import get_planets_key
 from resonances.shortcuts import add_integer_filter
+from sqlalchemy import and_
 from sqlalchemy import exc
+from sqlalchemy import inspect
 from sqlalchemy.orm import Query, contains_eager
 from sqlalchemy.orm import joinedload, aliased
 from sqlalchemy.orm.util import AliasedClass
@@ -29,6 +33,7 @@ from resonances.shortcuts import read_aei
 CONFIG = Config.get_params()
 PROJECT_DIR = Config.get_project_dir()
 MERCURY_DIR = opjoin(PROJECT_DIR, CONFIG['integrator']['dir'])
+STREAM_BATCH_SIZE = 1000
 
 FOREIGNS = ['first_body', 'second_body']
 PLANET_TABLES = {x: aliased(Planet) for x in FOREIGNS}  # type: Dict[str, Planet]
@@ -83,8 +88,11 @@ class GetQueryBuilder:
 
 
 def get_resonances_by_asteroids(asteroids_names: Iterable[str], only_librations: bool,
-                                integers: List[str], planets: tuple) -> Iterable[ResonanceMixin]:
-    """Get resonances satisfyied pointed parameters."""
+                                integers: List[str], planets: tuple, is_streaming: bool = False,
+                                is_resuming: bool = False) -> Iterable[ResonanceMixin]:
+    """Get resonances satisfyied pointed parameters. If is_streaming is true, resonances are
+    fetched by batches and expunged from session after processing. If is_resuming is true,
+    resonances from journal of search of librations are skipped."""
     body_count = BodyNumberEnum(len(planets) + 1)
     builder = GetQueryBuilder(body_count, True)
     query = builder.get_resonances()
@@ -98,10 +106,12 @@ def get_resonances_by_asteroids(asteroids_names: Iterable[str], only_librations:
         query = query.join('libration')
 
     query = filter_by_planets(query, planets)
+    if is_resuming:
+        query = filter_unprocessed(query, builder, planets)
 
     msg = 'We have no resonances, try command load-resonances for asteroids %s' % (
         ', '.join(asteroids_names))
-    yield from iterate_resonances(query, msg)
+    yield from iterate_resonances(query, msg, is_streaming)
 
 
 def filter_by_planets(query: Query, planets) -> Query:
@@ -114,6 +124,15 @@ def filter_by_planets(query: Query, planets) -> Query:
     return query
 
 
+def filter_unprocessed(query: Query, builder: GetQueryBuilder, planets: Tuple[str, ...]) \
+        -> Query:
+    """Excludes resonances, that are in journal of search of librations for pointed planets."""
+    progress = aliased(ResonanceProgress)
+    condition = and_(progress.resonance_id == builder.resonance_cls.id,
+                     progress.planets == get_planets_key(planets))
+    return query.outerjoin(progress, condition).filter(progress.id.is_(None))
+
+
 def get_resonance_query(for_bodies: BodyNumberEnum) -> Query:
     """
     Make select query for getting two or three body resonances.
@@ -150,9 +169,43 @@ def filter_by_integers(query: Query, builder: GetQueryBuilder, integers: List[in
     return query
 
 
-def iterate_resonances(query: Query, empty_message: str) -> Iterable[ResonanceMixin]:
-    is_empty = True
+def stream_resonances(query: Query) -> Iterable[ResonanceMixin]:
+    """Fetches resonances by server-side cursor in batches. Resonances must be ordered by
+    asteroid. Resonances of asteroid and their loaded related objects are expunged from session
+    when resonances of the asteroid after next one are requested, so consumer, that groups
+    resonances by asteroid, works with attached resonances and memory doesn't depend on number
+    of resonances. Resonances of last two asteroids stay in session, consumer can expunge them
+    by expunge_resonances. Related objects, that are needed after expunging, must be loaded
+    eagerly.
+
+    :param query: query of resonances.
+    """
+    query = query.yield_per(STREAM_BATCH_SIZE).execution_options(stream_results=True)
+    small_body_id = None
+    previous = []  # type: List[ResonanceMixin]
+    current = []  # type: List[ResonanceMixin]
     for resonance in query:
+        if resonance.small_body_id != small_body_id:
+            small_body_id = resonance.small_body_id
+            expunge_resonances(previous)
+            previous, current = current, []
+        current.append(resonance)
+        yield resonance
+
+
+def expunge_resonances(resonances: Iterable[ResonanceMixin]):
+    """Expunges resonances and their loaded related objects from session."""
+    for resonance in resonances:
+        loaded = inspect(resonance).dict
+        for obj in [resonance] + [loaded.get(x) for x in ['small_body', 'libration'] + FOREIGNS]:
+            if obj is not None and obj in session:
+                session.expunge(obj)
+
+
+def iterate_resonances(query: Query, empty_message: str, is_streaming: bool = False) \
+        -> Iterable[ResonanceMixin]:
+    is_empty = True
+    for resonance in stream_resonances(query) if is_streaming else query:
         is_empty = False
         yield resonance
 
@@ -161,9 +214,13 @@ def iterate_resonances(query: Query, empty_message: str) -> Iterable[ResonanceMi
 
 
 def get_resonances(start: int, stop: int, only_librations: bool, planets: Tuple[str, ...],
-                   integers: List[str] = None) -> Iterable[ResonanceMixin]:
+                   integers: List[str] = None, is_streaming: bool = False,
+                   is_resuming: bool = False) -> Iterable[ResonanceMixin]:
     """
     Returns resonances related to asteroid in pointer interval from start to stop.
+    :param is_streaming: fetch resonances by batches and expunge them from session after
+    processing.
+    :param is_resuming: skip resonances from journal of search of librations.
     :param integers:
     :param planets:
     :param start: start of interval of asteroid numbers.
@@ -177,27 +234,32 @@ def get_resonances(start: int, stop: int, only_librations: bool, planets: Tuple[
     query = builder.get_resonances()
     t1 = builder.asteroid_alias
     query = filter_by_planets(query, planets)
-    query = query.filter(builder.asteroid_alias.name.op('~')('^A\d*$'))\
-        .filter(t1.number >= start, t1.number < stop)\
-        .options(joinedload('libration')).order_by(builder.asteroid_alias.number)
+    query = query.filter(t1.number >= start, t1.number < stop)\
+        .options(joinedload('libration')).order_by(t1.number, t1.name)
 
     query = filter_by_integers(query, builder, integers)
     if only_librations:
         query = query.join('libration')
+    if is_resuming:
+        query = filter_unprocessed(query, builder, planets)
 
     msg = 'We have no resonances, try command load-resonances --start=%i --stop=%i' % (start, stop)
-    yield from iterate_resonances(query, msg)
+    yield from iterate_resonances(query, msg, is_streaming)
 
 
 class NoIDlistException(Exception):
     pass
 
 
-def get_resonances_with_id(id_list: List[int], planets: Tuple[str, ...], integers: List[str])\
+def get_resonances_with_id(id_list: List[int], planets: Tuple[str, ...], integers: List[str],
+                           is_streaming: bool = False, is_resuming: bool = False) \
         -> Iterable[ResonanceMixin]:
     """get_resonances_with_id returns generator of resonances mined from
     database by pointed id numbers and integers satisfying D'Alambert rule.
 
+    :param is_streaming: fetch resonances by batches and expunge them from session after
+    processing.
+    :param is_resuming: skip resonances from journal of search of librations.
     :param id_list:
     :param planets:
     :param integers:
@@ -209,16 +271,18 @@ def get_resonances_with_id(id_list: List[int], planets: Tuple[str, ...], integer
     query = builder.get_resonances()
     query = filter_by_planets(query, planets)
     query = query.filter(builder.resonance_cls.id.in_(id_list))\
-        .order_by(builder.asteroid_alias.name)
+        .options(joinedload('libration')).order_by(builder.asteroid_alias.name)
     if integers:
         query = filter_by_integers(query, builder, integers)
+    if is_resuming:
+        query = filter_unprocessed(query, builder, planets)
     msg = 'We have no resonances for %s' % ' '.join(planets)
     if integers:
         int_msg = 'with integers %s.' % ' '.join([str(x) for x in integers])
     else:
         int_msg = 'without integers'
 
-    yield from iterate_resonances(query, '%s %s' % (msg, int_msg))
+    yield from iterate_resonances(query, '%s %s' % (msg, int_msg), is_streaming)
 
 
 class AEIDataGetter:
@@ -248,7 +312,7 @@ class AEIDataGetter:
             self._aei_data = None
 
             aei_path = self._filepath_builder.build('%s.aei' % self._asteroid_name)
-            self._aei_data = read_aei(aei_path)
+            self._aei_data = read_aei(aei_path, not self._clear)
             if self._clear:
                 remove(aei_path)
         return self._aei_data
@@ -256,13 +320,16 @@ class AEIDataGetter:
 
 def get_aggregated_resonances(from_asteroid: int, to_asteroid: int, only_librations: bool,
                               planets: Tuple[str, ...], aei_getter: AEIDataGetter,
-                              integers: List[str] = None) \
-        -> Iterable[ResonanceAeiData]:
+                              integers: List[str] = None, is_streaming: bool = False,
+                              is_resuming: bool = False) -> Iterable[ResonanceAeiData]:
     """Find resonances from /axis/resonances by asteroid axis. Currently
     described by 7 items list of floats. 6 is integers satisfying
     D'Alembert rule. First 3 for longitutes, and second 3 for longitutes
     perihelion. Seventh value is asteroid axis.
 
+    :param is_streaming: fetch resonances by batches and expunge them from session after
+    processing.
+    :param is_resuming: skip resonances from journal of search of librations.
     :param integers:
     :param aei_getter:
     :param planets:
@@ -272,7 +339,8 @@ def get_aggregated_resonances(from_asteroid: int, to_asteroid: int, only_librati
     :return:
     """
 
-    for resonance in get_resonances(from_asteroid, to_asteroid, only_librations, planets, integers):
+    for resonance in get_resonances(from_asteroid, to_asteroid, only_librations, planets, integers,
+                                    is_streaming, is_resuming):
         with warnings.catch_warnings():
             warnings.simplefilter("ignore", category=exc.SAWarning)
             aei_data = aei_getter.get_aei_matrix(resonance.small_body.name)
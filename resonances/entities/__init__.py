@@ -5,6 +5,7 @@ from .resonance import ThreeBodyResonance
 from .resonance import ThreeBodyResonanceFactory
 from .resonance import TwoBodyResonance
 from .resonance import build_resonance
+from .resonance import build_resonances
 from .resonance import get_resonance_factory
 from .resonance import ResonanceFactory
 from .resonance import ResonanceMixin
@@ -12,3 +13,7 @@ from .libration import Libration
 from .libration import TwoBodyLibration
 from .libration import LibrationMixin
 from .phase import Phase
+from .phase import PhaseArray
+from .progress import ResonanceProgress
+from .progress import ProgressOutcome
+from .progress import get_planets_key
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, UniqueConstraint, Float, func, cast
-from sqlalchemy.ext.hybrid import hybrid_property
+import re
+
+from sqlalchemy import Column, Integer, String, UniqueConstraint, Float, Index
 
 from resonances.entities.dbutills import Base
 
@@ -9,6 +10,12 @@ LONG_COEFF = '%s_coeff' % LONG
 PERI_COEFF = '%s_coeff' % PERI
 
 UNIQUE_FIELDS = ('name', 'longitude_coeff', 'perihelion_longitude_coeff')
+NUMBERED_NAME_PATTERN = re.compile(r'^A\d+$')
+
+
+def get_asteroid_number(name: str) -> int:
+    """Returns number of asteroid by its name or None if asteroid is not numbered."""
+    return int(name[1:]) if NUMBERED_NAME_PATTERN.match(name) else None
 
 
 class _Body(object):
@@ -29,18 +36,13 @@ class Planet(_Body, Base):
 
 class Asteroid(_Body, Base):
     __tablename__ = 'asteroid'
-    __table_args__ = (UniqueConstraint(
-        *UNIQUE_FIELDS, 'axis', name='uc_name_long_peri_axis'
-    ),)
+    __table_args__ = (
+        UniqueConstraint(*UNIQUE_FIELDS, 'axis', name='uc_name_long_peri_axis'),
+        Index('ix_asteroid_number_name', 'number', 'name'),
+    )
     axis = Column(Float, nullable=False)
-
-    @hybrid_property
-    def number(self) -> int:
-        return int(self.name[1:])
-
-    @number.expression
-    def number(cls):
-        return cast(func.substr(cls.name, 2, func.length(cls.name) - 1), Integer)
+    number = Column(Integer, nullable=True)
+    """Number of asteroid from its name. It is null for asteroids without number."""
 
     def __str__(self):
         return '%s %f' % (super(Asteroid, self).__str__(), self.axis)
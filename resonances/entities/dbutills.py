@@ -1,6 +1,8 @@
 import logging
 import os
 import time
+from contextlib import contextmanager
+from typing import Iterator
 from typing import Tuple
 from typing import TypeVar
 import redis
@@ -8,6 +10,7 @@ from alembic.config import Config as AlembicConfig
 from sqlalchemy.sql.expression import Executable
 from sqlalchemy import create_engine, Integer, Column
 from sqlalchemy import event
+from sqlalchemy.engine import Connection
 from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import as_declarative
 from sqlalchemy.orm import Session
@@ -24,6 +27,7 @@ _HOST = CONFIG['postgres']['host']
 _USER = CONFIG['postgres']['user']
 _PASSWORD = CONFIG['postgres']['password']
 _DB = CONFIG['postgres']['db']
+_POOL = CONFIG['postgres']['pool']
 T = TypeVar('T')
 
 if CONFIG['debug']:
@@ -54,7 +58,9 @@ class Base(object):
     id = Column(Integer, primary_key=True)
 
 engine = create_engine('postgres://%s:%s@%s/%s' % (_USER, _PASSWORD, _HOST, _DB),
-                       implicit_returning=False)
+                       implicit_returning=False, pool_size=_POOL['size'],
+                       max_overflow=_POOL['max_overflow'], pool_timeout=_POOL['timeout'],
+                       pool_recycle=_POOL['recycle'])
 _Session = sessionmaker()
 _Session.configure(bind=engine)
 session = _Session()    # type: Session
@@ -66,6 +72,72 @@ _conn = redis.ConnectionPool(
 REDIS = redis.Redis(connection_pool=_conn)
 
 
+class PoolMetrics:
+    """Counts checkouts of connections from pool of the engine, new database connections and
+    time of waiting for connections opened by transaction.
+    """
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.wait_time = 0.
+        self.max_wait_time = 0.
+
+    def add_wait_time(self, value: float):
+        self.wait_time += value
+        self.max_wait_time = max(self.max_wait_time, value)
+
+    def log(self):
+        logging.info('Database pool: %i checkouts, %i new connections, waiting %.3f s '
+                     '(max %.3f s)', self.checkouts, self.connects, self.wait_time,
+                     self.max_wait_time)
+
+
+pool_metrics = PoolMetrics()
+
+
+@event.listens_for(engine, 'checkout')
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.checkouts += 1
+
+
+@event.listens_for(engine, 'connect')
+def _count_connect(dbapi_connection, connection_record):
+    pool_metrics.connects += 1
+
+
+@contextmanager
+def transaction(conn: Connection = None) -> Iterator[Connection]:
+    """Opens transaction and commits it if block is finished without exceptions. If connection
+    isn't pointed, it will be taken from pool and returned after transaction. Transaction of
+    pointed connection is nested to its current transaction, so all work is committed once.
+
+    :param conn: connection, that is used by caller.
+    """
+    is_own = conn is None
+    if is_own:
+        start = time.time()
+        conn = engine.connect()
+        pool_metrics.add_wait_time(time.time() - start)
+    trans = conn.begin()
+    try:
+        yield conn
+        trans.commit()
+    except:
+        trans.rollback()
+        raise
+    finally:
+        if is_own:
+            conn.close()
+
+
+def dispose_connections():
+    """Closes connections of the session and the engine. It must be invoked before forking of
+    the process, so every child process opens own connections.
+    """
+    session.close()
+    engine.dispose()
+
+
 def get_or_create(cls: type, **kwargs) -> Tuple[T, bool]:
     """
     :param kwargs:
@@ -84,17 +156,27 @@ def get_or_create(cls: type, **kwargs) -> Tuple[T, bool]:
 
 
 class OnConflictInsert(Executable, ClauseElement):
-    def __init__(self, insert_expr: Insert, indexes=None):
+    def __init__(self, insert_expr: Insert, indexes=None, update_columns=None):
+        """
+        :param insert_expr:
+        :param indexes: columns of unique index, that defines conflict.
+        :param update_columns: columns, that are updated by inserted values on conflict. Conflict
+        is ignored if they are not pointed.
+        """
         self.insert = insert_expr
         self._returning = None
         self.table = insert_expr.table
         self.indexes = indexes
+        self.update_columns = update_columns
 
 
 @compiles(OnConflictInsert)
 def on_conflict(elem: OnConflictInsert, compiler: PGCompiler_psycopg2, **kw):
     query_string = compiler.visit_insert(elem.insert, **kw)  # type: str
     action = 'ON CONFLICT %s DO NOTHING'
+    if elem.update_columns:
+        action = 'ON CONFLICT %s DO UPDATE SET ' + ', '.join(
+            '%s = EXCLUDED.%s' % (x, x) for x in elem.update_columns)
     if elem.indexes:
         fields = '(%s)' % ', '.join(elem.indexes)
         action = action % fields
@@ -1,4 +1,5 @@
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import backref
 from sqlalchemy.orm import relationship
 
@@ -18,3 +19,16 @@ class Phase(Base):
     __table_args__ = (sa.UniqueConstraint(
         'resonance_id', 'year', name='uc_time_resonance_id'
     ),)
+
+
+class PhaseArray(Base):
+    """Phases of resonance stored in one row by arrays of years and values."""
+    __tablename__ = 'phase_array'
+
+    resonance_id = sa.Column(sa.Integer, sa.ForeignKey('resonance.id'), nullable=False)
+    years = sa.Column(ARRAY(sa.Float), nullable=False)
+    values = sa.Column(ARRAY(sa.Float), nullable=False)
+
+    __table_args__ = (sa.UniqueConstraint(
+        'resonance_id', name='uc_phase_array_resonance_id'
+    ),)
@@ -0,0 +1,34 @@
+from enum import Enum
+from enum import unique
+from typing import Tuple
+
+import sqlalchemy as sa
+
+from resonances.entities import Base
+
+
+@unique
+class ProgressOutcome(Enum):
+    not_determined = 0
+    determined = 1
+    broken = 2
+
+
+class ResonanceProgress(Base):
+    """Record of journal of search of librations. It means that resonance was processed for
+    pointed planets and keeps outcome of classifying its libration.
+    """
+    __tablename__ = 'resonance_progress'
+
+    asteroid_name = sa.Column(sa.String(255), nullable=False)
+    planets = sa.Column(sa.String(255), nullable=False)
+    resonance_id = sa.Column(sa.Integer, nullable=False)
+    outcome = sa.Column(sa.Integer, nullable=False)
+
+    __table_args__ = (sa.UniqueConstraint(
+        'planets', 'resonance_id', name='uc_planets_resonance_id'
+    ),)
+
+
+def get_planets_key(planets: Tuple[str, ...]) -> str:
+    return '-'.join(planets)
@@ -2,6 +2,7 @@ from .threebodyresonance import ThreeBodyResonance
 from .twobodyresonance import TwoBodyResonance
 from .twobodyresonance import ResonanceMixin
 from .factory import build_resonance
+from .factory import build_resonances
 from .factory import ThreeBodyResonanceFactory
 from .factory import TwoBodyResonanceFactory
 from .factory import get_resonance_factory
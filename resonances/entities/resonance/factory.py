@@ -1,12 +1,14 @@
 import warnings
 from abc import abstractmethod
+from collections import OrderedDict
 from enum import Enum, unique
 from typing import Dict, Tuple
 from typing import List
 from functools import reduce
 from operator import add
 
-from resonances.entities.dbutills import engine, session
+from resonances.entities.dbutills import session
+from resonances.entities.dbutills import transaction
 from sqlalchemy import Table
 from sqlalchemy import exc as sa_exc, column, UniqueConstraint
 from sqlalchemy.dialects.postgresql.psycopg2 import PGCompiler_psycopg2
@@ -25,12 +27,14 @@ from sqlalchemy.sql.expression import table
 from resonances.entities.body import Asteroid
 from resonances.entities.body import LONG_COEFF
 from resonances.entities.body import PERI_COEFF
+from resonances.entities.body import get_asteroid_number
 from resonances.entities.body import Planet
 from resonances.shortcuts import fix_id_sequence
 from .threebodyresonance import ThreeBodyResonance
 from .twobodyresonance import TwoBodyResonance
 
 _has_upsert = None
+BULK_SIZE = 1000
 _planet_table = Planet.__table__  # type: Table
 _asteroid_table = Asteroid.__table__  # type: Table
 
@@ -84,12 +88,7 @@ class ResonanceFactory:
         if not resonance_exists:
             resonance_insert = _InsertFromSelect(self._resonance_table, sel,
                                                  self._resonance_cls.__table__)
-            try:
-                resonance_id = conn.execute(resonance_insert).scalar()
-            except IntegrityError:
-                fix_id_sequence(self._resonance_cls.__table__, conn)
-                resonance_id = conn.execute(resonance_insert).scalar()
-            return resonance_id
+            return _execute_insert(conn, self._resonance_cls.__table__, resonance_insert).scalar()
 
     @property
     def _columns(self) -> List[ColumnClause]:
@@ -120,6 +119,7 @@ class ThreeBodyResonanceFactory(ResonanceFactory):
             },
             small_body={
                 'name': 'A%s' % asteroid_num,
+                'number': get_asteroid_number('A%s' % asteroid_num),
                 LONG_COEFF: int(data[2]),
                 PERI_COEFF: int(data[5]),
                 'axis': float(data[6])
@@ -151,6 +151,7 @@ class TwoBodyResonanceFactory(ResonanceFactory):
             },
             small_body={
                 'name': 'A%s' % asteroid_num,
+                'number': get_asteroid_number('A%s' % asteroid_num),
                 LONG_COEFF: int(data[1]),
                 PERI_COEFF: int(data[3]),
                 'axis': float(data[4])
@@ -171,14 +172,67 @@ class TwoBodyResonanceFactory(ResonanceFactory):
         return self.bodies['small_body']
 
 
-def build_resonance(resonance_factory: ResonanceFactory) -> int:
+def build_resonance(resonance_factory: ResonanceFactory, conn: Connection = None) -> int:
     """Builds SQL query to add instance ResonanceMixin and return id of it.
 
     :param resonance_factory:
+    :param conn: connection, new connection will be taken from pool if it is not pointed.
     :return:
     """
-    conn = engine.connect()
-    return resonance_factory.build(conn)
+    with transaction(conn) as conn:
+        return resonance_factory.build(conn)
+
+
+def build_resonances(resonance_factories: List[ResonanceFactory], conn: Connection = None) \
+        -> List[int]:
+    """Saves resonances of pointed factories by multi-row queries and returns id numbers of them
+    in same order. Bodies are upserted at first, after that resonances are inserted by one
+    set-based query for every chunk. If database doesn't support upsert, resonances will be
+    saved one by one.
+
+    :param resonance_factories:
+    :param conn: connection, new connection will be taken from pool if it is not pointed.
+    :return: list of id numbers of resonances.
+    """
+    if not resonance_factories:
+        return []
+    with transaction(conn) as conn:
+        if not _is_support_upsert():
+            return [build_resonance(x, conn) for x in resonance_factories]
+        return _build_resonances(resonance_factories, conn)
+
+
+def _build_resonances(resonance_factories: List[ResonanceFactory], conn: Connection) \
+        -> List[int]:
+    planets = OrderedDict()  # type: Dict[tuple, Dict]
+    asteroids = OrderedDict()  # type: Dict[tuple, Dict]
+    for factory in resonance_factories:
+        for planet in factory._get_planets():
+            planets[_get_unique_key(_planet_table, planet)] = planet
+        asteroid = factory._get_asteroid()
+        asteroids[_get_unique_key(_asteroid_table, asteroid)] = asteroid
+    planet_ids = _upsert_rows(conn, _planet_table, planets)
+    asteroid_ids = _upsert_rows(conn, _asteroid_table, asteroids)
+
+    resonance_keys = []
+    resonances_by_tables = OrderedDict()  # type: Dict[Table, Dict[tuple, Dict]]
+    for factory in resonance_factories:
+        resonance = {}
+        for key, body in factory.bodies.items():
+            if key == 'small_body':
+                resonance['%s_id' % key] = asteroid_ids[_get_unique_key(_asteroid_table, body)]
+            else:
+                resonance['%s_id' % key] = planet_ids[_get_unique_key(_planet_table, body)]
+        resonance_table = factory.resonance_cls.__table__
+        resonance_key = _get_row_key(resonance)
+        resonances_by_tables.setdefault(resonance_table, OrderedDict())[resonance_key] = resonance
+        resonance_keys.append((resonance_table, resonance_key))
+
+    resonance_ids = {}
+    for resonance_table, resonances in resonances_by_tables.items():
+        for key, resonance_id in _upsert_rows(conn, resonance_table, resonances).items():
+            resonance_ids[resonance_table, key] = resonance_id
+    return [resonance_ids[x] for x in resonance_keys]
 
 
 def get_resonance_factory(planets: Tuple, data: List[str],
@@ -230,11 +284,21 @@ def _append_string(insert_expr: Insert, compiler: PGCompiler_psycopg2, **kw):
 
 
 def _execute_insert(by_conn: Connection, for_table: Table, insert_query):
+    """Executes insert query. If query fails because of sequence of id numbers, the sequence
+    will be fixed and the query will be executed again. Inside transaction query is executed
+    in savepoint, so the transaction can be continued after failure.
+    """
+    savepoint = by_conn.begin_nested() if by_conn.in_transaction() else None
     try:
-        by_conn.execute(insert_query)
+        result = by_conn.execute(insert_query)
     except IntegrityError:
+        if savepoint:
+            savepoint.rollback()
         fix_id_sequence(for_table, by_conn)
-        by_conn.execute(insert_query)
+        return by_conn.execute(insert_query)
+    if savepoint:
+        savepoint.commit()
+    return result
 
 
 def _build_planets(conn: Connection, planets: List[Dict[str, int]], small_body: Dict[str, int]):
@@ -257,6 +321,39 @@ def _build_planets(conn: Connection, planets: List[Dict[str, int]], small_body:
         _execute_insert(conn, Asteroid.__table__, asteroid_insert)
 
 
+def _get_row_key(row: Dict) -> tuple:
+    return tuple(sorted(row.items()))
+
+
+def _get_unique_key(for_table: Table, row: Dict) -> tuple:
+    return _get_row_key({x: row[x] for x in _get_unique_columns(for_table)})
+
+
+def _upsert_rows(conn: Connection, for_table: Table, rows: Dict[tuple, Dict]) -> Dict[tuple, int]:
+    """Inserts unique rows by multi-row queries. Every conflicted row is updated by itself, so
+    query returns id numbers of all pointed rows.
+
+    :param conn:
+    :param for_table:
+    :param rows: dictionary, where keys are made from unique fields of rows by _get_unique_key.
+    :return: dictionary, where keys are same and values are id numbers of rows.
+    """
+    column_names = _get_unique_columns(for_table)
+    action = 'on conflict (%s) DO UPDATE SET %s=EXCLUDED.%s RETURNING id, %s' % (
+        ', '.join(column_names), column_names[0], column_names[0], ', '.join(column_names))
+    values = list(rows.values())
+    ids = {}
+    for i in range(0, len(values), BULK_SIZE):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=sa_exc.SAWarning)
+            query = for_table.insert(append_string=action, inline=True,
+                                     values=values[i:i + BULK_SIZE])
+            result = _execute_insert(conn, for_table, query)
+        for row in result:
+            ids[_get_unique_key(for_table, row)] = row['id']
+    return ids
+
+
 def _check_body(cls, parametes: Dict):
     query = session.query
     return query(query(cls).filter_by(**parametes).exists()).scalar()
@@ -265,8 +362,8 @@ def _check_body(cls, parametes: Dict):
 def _is_support_upsert() -> bool:
     global _has_upsert
     if _has_upsert is None:
-        conn = engine.connect()
-        version_str = [x['version'] for x in conn.execute('SELECT version();')][0]
+        with transaction() as conn:
+            version_str = [x['version'] for x in conn.execute('SELECT version();')][0]
         if '9.5' in version_str:
             _has_upsert = True
         else:
@@ -274,14 +371,18 @@ def _is_support_upsert() -> bool:
     return _has_upsert
 
 
+def _get_unique_columns(for_table: Table) -> List[str]:
+    unique_contraints = [x for x in for_table.constraints if isinstance(x, UniqueConstraint)]
+    return reduce(add, [x.columns.keys() for x in unique_contraints])
+
+
 def _get_conflict_action(for_table: Table, need_id: bool = False) -> str:
     """Makes part of SQL query contains action that will be produced on conflict.
 
     :param for_table: table which will take new record.
     :param need_id: indicates that query must return id.
     """
-    unique_contraints = [x for x in for_table.constraints if isinstance(x, UniqueConstraint)]
-    column_names = reduce(add, [x.columns.keys() for x in unique_contraints])
+    column_names = _get_unique_columns(for_table)
 
     if need_id and column_names:
         action = 'DO UPDATE SET {0}=EXCLUDED.{0} RETURNING id;'.format(column_names[0])
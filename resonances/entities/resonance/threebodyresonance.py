@@ -3,6 +3,7 @@ from typing import Dict, List
 from resonances.entities.dbutills import Base
 from sqlalchemy import Column
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.orm import relationship, backref
@@ -26,10 +27,12 @@ class ThreeBodyResonance(ResonanceMixin, Base):
         return cls.BUILDER
 
     __tablename__ = 'resonance'
-    __table_args__ = (UniqueConstraint(
-        'first_body_id', 'second_body_id', 'small_body_id',
-        name='uc_first_second_small'
-    ),)
+    __table_args__ = (
+        UniqueConstraint('first_body_id', 'second_body_id', 'small_body_id',
+                         name='uc_first_second_small'),
+        Index('ix_resonance_second_body_id', 'second_body_id'),
+        Index('ix_resonance_small_body_id', 'small_body_id'),
+    )
 
     @classmethod
     def _small_body_ref(cls):
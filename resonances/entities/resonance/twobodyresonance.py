@@ -1,6 +1,7 @@
 from typing import Dict, List
 
 from resonances.entities.dbutills import Base
+from sqlalchemy import Index
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.orm import backref
 
@@ -23,7 +24,9 @@ class TwoBodyResonance(ResonanceMixin, Base):
 
     __tablename__ = 'two_body_resonance'
     __table_args__ = (
-        UniqueConstraint('first_body_id', 'small_body_id', name='uc_first_small'),)
+        UniqueConstraint('first_body_id', 'small_body_id', name='uc_first_small'),
+        Index('ix_two_body_resonance_small_body_id', 'small_body_id'),
+    )
 
     def get_big_bodies(self) -> List[Planet]:
         return [self.first_body]
@@ -4,3 +4,4 @@ from .programs import mercury6
 from .programs import simple_clean
 from .programs import element6
 from .programs import aei_clean
+from .programs import create_scratch_dir
@@ -1,69 +1,90 @@
 import logging
 import os
+import shutil
 import subprocess
 from glob import glob
 from os.path import join as opjoin
+from tempfile import mkdtemp
 
 from resonances.settings import Config
 
 CONFIG = Config.get_params()
 PROJECT_DIR = Config.get_project_dir()
 INTEGRATOR_DIR = opjoin(PROJECT_DIR, CONFIG['integrator']['dir'])
+SMALL_BODIES_FILENAME = CONFIG['integrator']['files']['small_bodies']
 EXTENSIONS = ['dmp', 'clo', 'out', 'tmp']
+SCRATCH_PREFIX = 'mercury-'
 _DEBUG = 10
 
 
-def _execute_programm(name: str, is_mute: bool = False) -> int:
+def _execute_programm(name: str, is_mute: bool = False, path: str = INTEGRATOR_DIR) -> int:
     """Execute programm from Mercury6 appication.
 
     :param name: name of programm from Mercury6 application.
     :param is_mute: indicates about muting of invoked application.
+    :param path: working directory of programm. Programm is always taken from directory of
+    integrator.
     :rtype int:
     :return: finish code of programm.
     :raises: MercuryProgramNotFoundException
     """
-
-    path = os.path.join(PROJECT_DIR, CONFIG['integrator']['dir'])
     stdout = subprocess.DEVNULL if is_mute else None
-    res = subprocess.call([os.path.join(path, name)], cwd=path, stdout=stdout)
+    res = subprocess.call([opjoin(INTEGRATOR_DIR, name)], cwd=path, stdout=stdout)
     if res:
         logging.error('%s finished with code %i' % (name, res))
     return res
 
 
-def aei_clean():
-    for filename in glob(opjoin(INTEGRATOR_DIR, '*.aei')):
+def aei_clean(path: str = INTEGRATOR_DIR):
+    for filename in glob(opjoin(path, '*.aei')):
         os.remove(filename)
 
 
-def simple_clean(with_aei=True):
+def simple_clean(with_aei=True, path: str = INTEGRATOR_DIR):
     """Execute simple_clean.sh
 
     :param with_aei:
+    :param path: directory, where integrator has been launched.
     :rtype bool:
     """
     for ext in EXTENSIONS:
-        for filename in glob(opjoin(INTEGRATOR_DIR, '*.%s' % ext)):
+        for filename in glob(opjoin(path, '*.%s' % ext)):
             os.remove(filename)
     if with_aei:
-        aei_clean()
+        aei_clean(path)
 
 
-def mercury6() -> int:
+def mercury6(path: str = INTEGRATOR_DIR) -> int:
     """Execute mercury6
 
+    :param path: working directory of programm.
     :rtype int:
     :return: finish code of programm.
     :raises: MercuryProgramNotFoundException
     """
-    return _execute_programm('mercury6', logging.getLogger().getEffectiveLevel() != _DEBUG)
+    return _execute_programm('mercury6', logging.getLogger().getEffectiveLevel() != _DEBUG, path)
 
 
-def element6() -> int:
+def element6(path: str = INTEGRATOR_DIR) -> int:
     """Execute element6
 
+    :param path: working directory of programm.
     :rtype int:
     :return: finish code of programm.
     :raises: MercuryProgramNotFoundException
     """
-    return _execute_programm('element6', logging.getLogger().getEffectiveLevel() != _DEBUG)
+    return _execute_programm('element6', logging.getLogger().getEffectiveLevel() != _DEBUG, path)
+
+
+def create_scratch_dir() -> str:
+    """Makes temporary directory with copies of input files of integrator, so integrator can be
+    launched in it independently from other launches. File of small bodies isn't copied, it must
+    be created for every launch.
+
+    :return: path to created directory.
+    """
+    path = mkdtemp(prefix=SCRATCH_PREFIX)
+    for filename in glob(opjoin(INTEGRATOR_DIR, '*.in')):
+        if os.path.basename(filename) != SMALL_BODIES_FILENAME:
+            shutil.copy(filename, path)
+    return path
@@ -15,10 +15,10 @@ PROJECT_DIR = Config.get_project_dir()
 INTEGRATOR_PATH = os.path.join(PROJECT_DIR, CONFIG['integrator']['dir'])
 
 
-def move_aei_files(output_path: str):
+def move_aei_files(output_path: str, from_path: str = INTEGRATOR_PATH):
     if not os.path.exists(output_path):
         os.makedirs(output_path)
-    for path in iglob(opjoin(INTEGRATOR_PATH, '*.aei')):
+    for path in iglob(opjoin(from_path, '*.aei')):
         shutil.move(path, opjoin(output_path, os.path.basename(path)))
 
 
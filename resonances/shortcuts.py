@@ -1,5 +1,8 @@
 import logging
 import math
+import operator
+import re
+from typing import Callable
 from typing import List
 from typing import Tuple
 from typing import Iterable
@@ -15,18 +18,42 @@ from sqlalchemy.orm import Query
 from sqlalchemy.orm.util import AliasedClass
 from itertools import combinations
 from functools import reduce
+from functools import lru_cache
 from operator import add
 import pandas as pd
 import numpy as np
 
+from resonances import cache
 
-AEI_HEADER = ['Time (years)', 'long', 'M', 'a', 'e', 'i', 'peri', 'node', 'mass']
 
+AEI_HEADER = ['Time (years)', 'long', 'M', 'a', 'e', 'i', 'peri', 'node', 'mass']
+ANY_INTEGER = '*'
+_COMPARISON_OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '==': operator.eq, '!=': operator.ne,
+}
+_CONDITION_PATTERN = re.compile(r'\s*(<=|>=|==|!=|<|>)\s*(-?\d+)')
+_EXPRESSION_PATTERN = re.compile(r'(%s)+\s*$' % _CONDITION_PATTERN.pattern)
+
+
+def read_aei(aei_path, use_cache: bool = True) -> pd.DataFrame:
+    """Reads orbital elements from aei file. If use_cache is true, parsed data is stored to
+    binary cache and it will be memory-mapped next time. Data has type from cache settings in
+    both cases.
+
+    :param aei_path: path or file object of aei file.
+    :param use_cache: cache is used only if aei_path is path.
+    """
+    use_cache = use_cache and isinstance(aei_path, str)
+    if use_cache:
+        data = cache.load_aei(aei_path)
+        if data is not None:
+            return pd.DataFrame(data, columns=AEI_HEADER, copy=False)
 
-def read_aei(aei_path) -> pd.DataFrame:
-    dtype = np.float64  # pylint: disable=no-member
-    res = pd.read_csv(aei_path, dtype=dtype, names=AEI_HEADER,
+    res = pd.read_csv(aei_path, dtype=cache.AEI_DTYPE, names=AEI_HEADER,
                       skiprows=4, delimiter=r"\s+")
+    if use_cache:
+        cache.save_aei(aei_path, res.values)
     return res
 
 
@@ -106,6 +133,24 @@ def cutoff_angle(value: float) -> float:
     return value
 
 
+def cutoff_angles(values: np.ndarray) -> np.ndarray:
+    """Vectorized version of cutoff_angle. Returns new array.
+
+    :param values: array of angles.
+    :return: array of angles in interval [0; Pi] or (0; -Pi]
+    """
+    values = np.array(values, dtype=np.float64)
+    mask = values > math.pi
+    while mask.any():
+        values[mask] -= 2 * math.pi
+        mask = values > math.pi
+    mask = values < -math.pi
+    while mask.any():
+        values[mask] += 2 * math.pi
+        mask = values < -math.pi
+    return values
+
+
 def get_asteroid_interval(from_line: str):
     starts_from = from_line.index('aei-') + 4
     ends_by = from_line.index('-', starts_from)
@@ -149,12 +194,36 @@ class ProgressBar:
         self.fin()
 
 
+class IntegerExpressionException(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def parse_integer_expression(expression: str) -> Tuple[Tuple[Callable, int], ...]:
+    """Parses expression of integer like '>1', '==-1' or '>=3<5'. Asterisk means any integer.
+
+    :param expression:
+    :return: pairs of comparison operator and integer.
+    """
+    if expression.strip() == ANY_INTEGER:
+        return ()
+    if not _EXPRESSION_PATTERN.match(expression):
+        raise IntegerExpressionException('Invalid integer expression %s' % expression)
+    return tuple((_COMPARISON_OPERATORS[x], int(y))
+                 for x, y in _CONDITION_PATTERN.findall(expression))
+
+
 def add_integer_filter(query: Query, ints: List[str], body_tables: List[AliasedClass]) -> Query:
-    any_int = '*'
+    """Adds conditions for longitude coefficients of bodies. Integers are passed to query as
+    bound parameters.
 
+    :param query:
+    :param ints: expressions of integers, see parse_integer_expression.
+    :param body_tables: tables of bodies in same order as integers.
+    """
     for integer, table in zip(ints, body_tables):
-        if integer != any_int:
-            query = query.filter(eval('table.longitude_coeff %s' % integer))
+        for compare, value in parse_integer_expression(integer):
+            query = query.filter(compare(table.longitude_coeff, value))
     return query
 
 
@@ -0,0 +1,80 @@
+from typing import List
+
+import pytest
+
+from resonances.catalog import AsteroidData
+from resonances.catalog import ColumnCountException
+from resonances.catalog import asteroid_gen
+from resonances.catalog import asteroid_list_gen
+from resonances.catalog import asteroid_names_gen
+from resonances.catalog import catalog_block_gen
+from resonances.catalog import find_by_name
+from resonances.catalog import find_by_number
+from resonances.catalog import load_catalog
+
+
+def test_load_catalog(catalog_path: str, asteroids: List[AsteroidData]):
+    data = load_catalog(catalog_path)
+    assert data['name'].tolist() == [x[0] for x in asteroids]
+    assert data['a'].tolist() == [x[1][1] for x in asteroids]
+    assert data['peri'].tolist() == [x[1][4] for x in asteroids]
+    assert data['node'].tolist() == [x[1][5] for x in asteroids]
+    assert load_catalog(catalog_path) is data
+
+
+@pytest.mark.parametrize('buffer_size, start, stop', [
+    (7, None, None), (7, 3, 20), (5, 1, 11), (100, 20, 100), (3, 100, None)
+])
+def test_asteroid_list_gen(catalog_path: str, asteroids: List[AsteroidData], buffer_size: int,
+                           start: int, stop: int):
+    blocks = [x for x in asteroid_list_gen(buffer_size, catalog_path, start, stop)]
+    assert all(0 < len(x) <= buffer_size for x in blocks)
+    assert [x for y in blocks for x in y] == [x for x in asteroid_gen(catalog_path, start, stop)]
+
+
+@pytest.mark.parametrize('start, stop', [(None, None), (2, None), (5, 10), (20, 100),
+                                         (100, None)])
+def test_asteroid_gen(catalog_path: str, asteroids: List[AsteroidData], start: int, stop: int):
+    expected = asteroids[(start or 1) - 1:stop - 1 if stop else None]
+    assert [x for x in asteroid_gen(catalog_path, start, stop)] == expected
+
+
+def test_find(catalog_path: str, asteroids: List[AsteroidData]):
+    for i, asteroid in enumerate(asteroids):
+        assert find_by_number(i + 1, catalog_path) == asteroid[1]
+        assert find_by_name(asteroid[0], catalog_path) == asteroid
+    assert find_by_number(len(asteroids) + 1, catalog_path) is None
+    assert find_by_name('unknown', catalog_path) is None
+    assert [x for x in asteroid_names_gen(catalog_path)] == [x[0] for x in asteroids]
+
+
+def test_changed_catalog(catalog_path: str, asteroids: List[AsteroidData]):
+    load_catalog(catalog_path)
+    with open(catalog_path) as fd:
+        lines = [x for x in fd]
+    with open(catalog_path, 'w') as fd:
+        fd.writelines(lines[:-2] + [lines[-1]])
+
+    assert load_catalog(catalog_path).shape[0] == len(asteroids) - 1
+    assert find_by_number(len(asteroids) - 1, catalog_path) == asteroids[-1][1]
+
+
+def test_block_views(catalog_path: str):
+    data = load_catalog(catalog_path)
+    for block in catalog_block_gen(4, catalog_path):
+        assert block.base is data or block.base is data.base
+
+
+def test_extra_columns(catalog_path: str, asteroids: List[AsteroidData]):
+    with open(catalog_path) as fd:
+        lines = [x for x in fd]
+    with open(catalog_path, 'w') as fd:
+        fd.writelines(lines[:-1] + [lines[-1].rstrip('\n') + '   1.5   2\n'])
+    assert find_by_number(len(asteroids), catalog_path) == asteroids[-1][1]
+
+
+def test_wrong_columns(catalog_path: str):
+    with open(catalog_path, 'a') as fd:
+        fd.write("'A1'   57400.000000   2.7   0.07\n")
+    with pytest.raises(ColumnCountException):
+        load_catalog(catalog_path)
@@ -0,0 +1,37 @@
+import shutil
+from os.path import join as opjoin
+from typing import List
+from unittest import mock
+
+import pytest
+
+from resonances.catalog import AsteroidData
+from resonances.catalog import SKIP_LINES
+from resonances.settings import Config
+
+PROJECT_DIR = Config.get_project_dir()
+CATALOG = opjoin(PROJECT_DIR, 'tests', 'fixtures', 'allnum.cat')
+
+
+@pytest.fixture
+def catalog_path(request, tmpdir) -> str:
+    """Copy of catalog, cache files of which are saved to temporary directory."""
+    path = str(tmpdir.join('allnum.cat'))
+    shutil.copy(CATALOG, path)
+    patcher = mock.patch('resonances.cache.CACHE_DIR', str(tmpdir))
+    patcher.start()
+    request.addfinalizer(patcher.stop)
+    return path
+
+
+@pytest.fixture
+def asteroids(catalog_path: str) -> List[AsteroidData]:
+    """Asteroids of catalog, that are parsed line by line."""
+    res = []
+    with open(catalog_path) as fd:
+        for line in fd.readlines()[SKIP_LINES:]:
+            values = line.split()
+            elements = [float(x) for x in values[1:]]
+            elements[4], elements[5] = elements[5], elements[4]
+            res.append((values[0].strip("'"), elements))
+    return res
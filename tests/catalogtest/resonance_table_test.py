@@ -0,0 +1,46 @@
+from os.path import join as opjoin
+from typing import List
+
+import pytest
+
+from resonances.catalog import AXIS_COLUMNS
+from resonances.catalog import ResonanceTable
+from resonances.catalog import PossibleResonanceBuilder
+from resonances.entities import BodyNumberEnum
+from resonances.settings import Config
+
+PROJECT_DIR = Config.get_project_dir()
+RESONANCE_TABLE = opjoin(PROJECT_DIR, 'tests', 'fixtures', 'resonances')
+
+
+@pytest.fixture
+def lines() -> List[str]:
+    with open(RESONANCE_TABLE) as fd:
+        return [x for x in fd]
+
+
+def _scan(lines: List[str], axis: float, axis_swing: float) -> List[int]:
+    column = AXIS_COLUMNS[BodyNumberEnum.three]
+    return [i for i, x in enumerate(lines) if abs(float(x.split()[column]) - axis) <= axis_swing]
+
+
+@pytest.mark.parametrize('axis_swing', [0.001, 0.01, 0.1])
+def test_line_numbers(lines: List[str], axis_swing: float):
+    table = ResonanceTable(lines, BodyNumberEnum.three)
+    axis_values = [1., 2.7681116175738203, 3.1412, 3.4910, 3.4910 + axis_swing,
+                   4.1509 - axis_swing, 6.]
+    for axis, numbers in zip(axis_values, table.get_line_numbers(axis_values, axis_swing)):
+        assert numbers.tolist() == _scan(lines, axis, axis_swing)
+
+
+def test_factories(lines: List[str]):
+    builder = PossibleResonanceBuilder(('JUPITER', 'SATURN'), 0.01)
+    table = builder.get_table(lines)
+    asteroid = ('1', [57400.0, 3.4910])
+    factories = builder.get_factories(table, asteroid)
+    from_lines = builder.get_factories(lines, asteroid)
+    assert [x.bodies for x in factories] == [x.bodies for x in from_lines]
+    assert len(factories) == len(_scan(lines, 3.4910, 0.01))
+    for factory in factories:
+        assert abs(factory.bodies['small_body']['axis'] - 3.4910) <= 0.01
+        assert factory.bodies['small_body']['name'] == 'A1'
@@ -0,0 +1,21 @@
+from unittest import mock
+
+import click
+import pytest
+
+from resonances.cli.internal import validate_integer_expression
+
+
+@pytest.mark.parametrize('value, expressions', [
+    ('5 -1 -1', ['==5', '==-1', '==-1']),
+    ('>=3<5 * !=0', ['>=3<5', '*', '!=0']),
+    ('>1 1', ['>1', '==1']),
+])
+def test_validate_integer_expression(value, expressions):
+    assert validate_integer_expression(None, mock.Mock(), value) == expressions
+
+
+@pytest.mark.parametrize('value', ['1', '1 2 3 4', '1 =2', '>=3<', 'a b'])
+def test_validate_wrong_integer_expression(value):
+    with pytest.raises(click.BadOptionUsage):
+        validate_integer_expression(None, mock.Mock(), value)
@@ -0,0 +1,111 @@
+from typing import List
+from typing import Tuple
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from resonances.commands import find as find_module
+from resonances.entities.dbutills import OnConflictInsert
+
+
+def _build_connection() -> mock.MagicMock:
+    """Builds connection, that returns saved broken asteroids for select and keeps compiled
+    inserts.
+    """
+    conn = mock.MagicMock()
+    conn.inserts = []  # type: List[Tuple[str, dict]]
+
+    def _execute(query):
+        if not isinstance(query, OnConflictInsert):
+            return iter([('A1',)])
+        compiled = query.compile(dialect=postgresql.dialect())
+        conn.inserts.append((str(compiled), compiled.params))
+
+    conn.execute.side_effect = _execute
+    return conn
+
+
+@pytest.fixture
+def conn(request) -> mock.MagicMock:
+    conn = _build_connection()
+    patcher = mock.patch.object(find_module, 'transaction')
+    transaction_mock = patcher.start()
+    request.addfinalizer(patcher.stop)
+    transaction_mock.return_value.__enter__.return_value = conn
+    return conn
+
+
+def _get_names(params: dict) -> List[str]:
+    return [params['name_m%i' % i] for i in range(len(params) // 2)]
+
+
+def test_check(conn: mock.MagicMock):
+    registry = find_module._BrokenAsteroidRegistry()
+    assert registry.check('A1')
+    assert not registry.check('A2')
+    registry.save('A2', 'Has no data in aei file.')
+    assert registry.check('A2')
+    assert conn.execute.call_count == 1
+    assert not conn.inserts
+
+
+@pytest.mark.parametrize('batch_size, names, inserted', [
+    (2, ['A2', 'A3', 'A4'], [['A2', 'A3'], ['A4']]),
+    (3, ['A2', 'A3', 'A4'], [['A2', 'A3', 'A4']]),
+    (5, ['A2', 'A3', 'A4'], [['A2', 'A3', 'A4']]),
+    (2, ['A2', 'A1', 'A2', 'A3'], [['A2', 'A3']]),
+])
+def test_flush(conn: mock.MagicMock, batch_size: int, names: List[str],
+               inserted: List[List[str]]):
+    registry = find_module._BrokenAsteroidRegistry(batch_size)
+    for name in names:
+        registry.save(name, 'reason', conn)
+    registry.flush(conn)
+    registry.flush(conn)
+
+    assert [_get_names(x[1]) for x in conn.inserts] == inserted
+    for query, params in conn.inserts:
+        assert query.endswith('ON CONFLICT (name) DO NOTHING')
+        assert all(params['reason_m%i' % i] == 'reason' for i in range(len(params) // 2))
+
+
+def test_skip_broken_asteroid(conn: mock.MagicMock):
+    finder = mock.Mock(_broken_asteroids=find_module._BrokenAsteroidRegistry(),
+                       _is_verbose=False, _planets=('JUPITER', 'SATURN'), _is_current=False,
+                       _phase_storage=None)
+    finder._classify.return_value = []
+    resonances = [mock.Mock(small_body=mock.Mock()) for _ in range(3)]
+    for resonance, name in zip(resonances, ['A1', 'A1', 'A2']):
+        resonance.small_body.name = name
+    with mock.patch.object(find_module, 'ResonantPhaseEngine'), \
+            mock.patch.object(find_module, 'PhaseBuilder'), \
+            mock.patch.object(find_module, 'session'):
+        find_module.LibrationFinder._find(finder, [(x, None) for x in resonances], 0, [])
+
+    assert finder._classify.call_count == 1
+    assert finder._classify.call_args[0][:2] == ('A2', (resonances[2],))
+
+
+def test_skip_remaining_resonances(conn: mock.MagicMock):
+    from resonances.datamining.orbitalelements.collection import AEIValueError
+    from resonances.entities import ProgressOutcome
+
+    finder = mock.Mock(_broken_asteroids=find_module._BrokenAsteroidRegistry())
+    classifier = mock.Mock()
+    classifier.classify.return_value = False
+    phase_builder = mock.Mock()
+    phase_builder.build.side_effect = [[1.], AEIValueError(), [2.]]
+    phase_engine = mock.Mock()
+    phase_engine.get_resonant_phases.return_value = [[0.]] * 3
+    aei_data = mock.Mock(empty=False)
+    with mock.patch.object(find_module, 'build_coefficient_matrix'), \
+            mock.patch.object(find_module, 'ResonanceOrbitalElementSetFacade'):
+        outcomes = find_module.LibrationFinder._classify(
+            finder, 'A2', [mock.Mock()] * 3, aei_data, classifier, phase_builder,
+            phase_engine, [])
+
+    assert outcomes == [ProgressOutcome.not_determined] + [ProgressOutcome.broken] * 2
+    assert classifier.classify.call_count == 1
+    assert phase_builder.build.call_count == 2
+    assert finder._broken_asteroids.check('A2')
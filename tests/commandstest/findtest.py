@@ -0,0 +1,87 @@
+import os
+from os.path import join as opjoin
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from resonances.commands import find as find_module
+from resonances.commands import LibrationFinder
+from resonances.datamining.orbitalelements.collection import AEIValueError
+from resonances.entities import ProgressOutcome
+
+
+@pytest.fixture
+def finder() -> LibrationFinder:
+    with mock.patch.object(find_module, 'transaction'), \
+            mock.patch.object(find_module, 'fix_id_sequence'):
+        return LibrationFinder(('JUPITER', 'SATURN'), False, False, False)
+
+
+def _get_interval(start: int, stop: int, *args, **kwargs):
+    return start, stop
+
+
+def _find_to_file(self: LibrationFinder, interval: tuple, *args, **kwargs):
+    with open(opjoin(self.out_dir, '%i-%i' % interval), 'w') as fd:
+        fd.write('%i %s' % (os.getpid(), self._extract_path))
+
+
+def _failed_sets(self: LibrationFinder, pathbuilder):
+    raise AEIValueError('Incorrect data in JUPITER.aei')
+
+
+@pytest.fixture
+def worker_mocks(request):
+    patchers = [
+        mock.patch.object(find_module, 'dispose_connections'),
+        mock.patch.object(find_module, 'get_aggregated_resonances', _get_interval),
+        mock.patch.object(LibrationFinder, '_get_orbital_element_sets'),
+        mock.patch.object(LibrationFinder, '_find', _find_to_file),
+    ]
+    for patcher in patchers:
+        patcher.start()
+        request.addfinalizer(patcher.stop)
+
+
+def test_find_parallel(finder: LibrationFinder, worker_mocks, tmpdir):
+    out_dir = str(tmpdir)
+    finder.out_dir = out_dir
+    finder.find_parallel(1, 26, 5, (out_dir,), 2)
+
+    assert sorted(os.listdir(out_dir)) == sorted('%i-%i' % (x, min(x + 5, 26))
+                                                  for x in range(1, 26, 5))
+    extract_paths = {}
+    for name in os.listdir(out_dir):
+        with open(opjoin(out_dir, name)) as fd:
+            pid, extract_path = fd.read().split()
+        assert extract_paths.setdefault(pid, extract_path) == extract_path
+    assert len(set(extract_paths.values())) == len(extract_paths)
+    worker_paths = [opjoin(find_module.EXTRACT_PATH, 'worker-%i' % x) for x in range(2)]
+    assert set(extract_paths.values()) <= set(worker_paths)
+
+
+def test_find_parallel_error(finder: LibrationFinder, worker_mocks, tmpdir):
+    with mock.patch.object(LibrationFinder, '_get_orbital_element_sets', _failed_sets):
+        with pytest.raises(AEIValueError):
+            finder.find_parallel(1, 11, 5, (str(tmpdir),), 2)
+
+
+def test_planet_elements_error(finder: LibrationFinder, tmpdir):
+    for planet in finder.planets:
+        tmpdir.join('%s.aei' % planet).write('broken')
+    pathbuilder = mock.Mock(build=lambda x: str(tmpdir.join(x)))
+    with mock.patch.object(find_module, 'build_bigbody_elements', side_effect=AEIValueError):
+        with pytest.raises(AEIValueError):
+            finder._get_orbital_element_sets(pathbuilder)
+
+
+def test_journal_replaces_outcome():
+    resonances = [mock.Mock(id=1), mock.Mock(id=2)]
+    outcomes = [ProgressOutcome.determined, ProgressOutcome.broken]
+    conn = mock.Mock()
+    find_module._ProgressJournal(('JUPITER', 'SATURN')).save('A1', resonances, outcomes, conn)
+
+    query = str(conn.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert query.endswith('ON CONFLICT (planets, resonance_id) DO UPDATE SET '
+                          'asteroid_name = EXCLUDED.asteroid_name, outcome = EXCLUDED.outcome')
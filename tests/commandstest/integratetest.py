@@ -0,0 +1,127 @@
+import json
+import os
+import time
+from os.path import exists as opexists
+from os.path import join as opjoin
+from unittest import mock
+
+import pytest
+
+from resonances.commands import integrate as integrate_module
+from resonances.commands.integrate import _IntegrationState
+from resonances.commands.integrate import integrate
+from resonances.settings import Config
+
+PROJECT_DIR = Config.get_project_dir()
+CATALOG = opjoin(PROJECT_DIR, 'tests', 'fixtures', 'allnum.cat')
+STEP = 4
+BLOCKS = [1, 5, 9, 13, 17]
+
+
+class _Pipeline:
+    """Records events of mocked stages and checks aei files of blocks during search."""
+    def __init__(self, tmpdir):
+        self.state_file = str(tmpdir.join('integration_state.json'))
+        self.aei_path = str(tmpdir.join('aei'))
+        self.events = []
+        self.failed_block = None
+        self.find_delay = 0.
+
+    def calc(self, asteroid_blocks, from_day, to_day, aei_path):
+        block_start = int(aei_path.split('-')[-1])
+        if block_start == self.failed_block:
+            raise ValueError('Integration of block %i is failed' % block_start)
+        self.events.append(('calc', block_start))
+        os.makedirs(aei_path)
+        for name, _ in asteroid_blocks[0]:
+            open(opjoin(aei_path, '%s.aei' % name), 'w').close()
+
+    def load_resonances(self, filepath, asteroids, builder, is_verbose):
+        return {x[0]: [int(x[0])] for x in asteroids}
+
+    def find_by_resonances(self, resonances_data, aei_paths):
+        aei_path = aei_paths[0]
+        block_start = int(aei_path.split('-')[-1])
+        assert len(os.listdir(aei_path)) == min(STEP, 21 - block_start)
+        list(resonances_data)
+        time.sleep(self.find_delay)
+        self.events.append(('find', block_start))
+
+    def get_blocks(self, stage: str):
+        return [y for x, y in self.events if x == stage]
+
+
+@pytest.fixture
+def pipeline(request, tmpdir) -> _Pipeline:
+    pipeline = _Pipeline(tmpdir)
+    finder = mock.MagicMock(planets=('JUPITER', 'SATURN'))
+    finder.find_by_resonances.side_effect = pipeline.find_by_resonances
+    patchers = [
+        mock.patch('resonances.cache.CACHE_DIR', str(tmpdir)),
+        mock.patch.object(integrate_module, 'STEP', STEP),
+        mock.patch.object(integrate_module, 'STATE_FILE', pipeline.state_file),
+        mock.patch.object(integrate_module, 'AEI_PATH', pipeline.aei_path),
+        mock.patch.object(integrate_module, 'calc', pipeline.calc),
+        mock.patch.object(integrate_module, 'load_resonances', pipeline.load_resonances),
+        mock.patch.object(integrate_module, 'PossibleResonanceBuilder'),
+        mock.patch.object(integrate_module, 'LibrationFinder', return_value=finder),
+        mock.patch.object(integrate_module, 'get_resonances_with_id', return_value=[]),
+    ]
+    for patcher in patchers:
+        patcher.start()
+        request.addfinalizer(patcher.stop)
+    return pipeline
+
+
+def _integrate(do_continue: bool = False, queue_size: int = integrate_module.QUEUE_SIZE):
+    integrate(0., 100., ('JUPITER', 'SATURN'), CATALOG, 0.01, [], do_continue,
+              queue_size=queue_size)
+
+
+def _save_states(pipeline: _Pipeline, states: dict):
+    with open(pipeline.state_file, 'w') as fd:
+        json.dump({str(x): y.value for x, y in states.items()}, fd)
+
+
+def test_block_order(pipeline: _Pipeline):
+    _integrate()
+    assert pipeline.get_blocks('calc') == BLOCKS
+    assert pipeline.get_blocks('find') == BLOCKS
+    assert not opexists(pipeline.state_file)
+
+
+def test_aei_removal(pipeline: _Pipeline):
+    _integrate()
+    assert not os.listdir(pipeline.aei_path)
+
+
+@pytest.mark.parametrize('queue_size', [1, 2])
+def test_bounded_queue(pipeline: _Pipeline, queue_size: int):
+    pipeline.find_delay = 0.2
+    _integrate(queue_size=queue_size)
+    first_find = pipeline.events.index(('find', 1))
+    # One block is searched, blocks of queue wait and one integrated block waits for queue.
+    assert pipeline.events[:first_find] == [('calc', x) for x in BLOCKS[:queue_size + 2]]
+    assert pipeline.get_blocks('find') == BLOCKS
+
+
+def test_continue(pipeline: _Pipeline):
+    _save_states(pipeline, {1: _IntegrationState.find, 5: _IntegrationState.find,
+                            9: _IntegrationState.calc, 17: _IntegrationState.find})
+    os.makedirs(opjoin(pipeline.aei_path, 'block-9'))
+    for i in range(9, 13):
+        open(opjoin(pipeline.aei_path, 'block-9', '%i.aei' % i), 'w').close()
+
+    _integrate(True)
+    assert pipeline.get_blocks('calc') == [13]
+    assert pipeline.get_blocks('find') == [9, 13]
+
+
+def test_calc_error(pipeline: _Pipeline):
+    pipeline.failed_block = 9
+    with pytest.raises(ValueError):
+        _integrate()
+    assert pipeline.get_blocks('find') == [1, 5]
+    with open(pipeline.state_file) as fd:
+        assert json.load(fd) == {'1': _IntegrationState.find.value,
+                                 '5': _IntegrationState.find.value}
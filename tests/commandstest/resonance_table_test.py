@@ -0,0 +1,84 @@
+import math
+from fractions import Fraction
+from typing import List
+
+import pytest
+
+from resonances.commands.resonace_table import CONFIG
+from resonances.commands.resonace_table import _AXIS_MIN
+from resonances.commands.resonace_table import _build_body
+from resonances.commands.resonace_table import _build_line_data
+from resonances.commands.resonace_table import generate_resonance_table
+
+
+def _loop_axis(resonance: List[int], planets: List[str]) -> float:
+    """Computes axis of three body resonance like the generator before vectorization."""
+    bodies = [_build_body(x) for x in planets]
+    jupiter = bodies[0]
+    K = CONFIG['constants']['k']
+    items = []
+    for i, body in enumerate(bodies):
+        items.append(-resonance[i] * body['mean_motion'])
+        items.append(-resonance[i + len(bodies) + 1] * body['longitude_of_periapsis'])
+    lin_combination = sum(items)
+    mean_motion = lin_combination / resonance[2]
+    if mean_motion < 0:
+        return None
+    axis = (K / mean_motion) ** (2.0/3)
+    eps = (jupiter['axis'] - axis) / jupiter['axis']
+    longitude_of_periapsis = (K / (2 * math.pi) * math.sqrt(axis / jupiter['axis']) *
+                              (eps ** 2) * jupiter['mean_motion'])
+    mean_motion = (lin_combination - resonance[2] * longitude_of_periapsis) / resonance[2]
+    if mean_motion < 0:
+        return None
+    return (K / mean_motion) ** (2.0/3)
+
+
+def _loop_table(planets: List[str], axis_max: float, order_max: int) -> List[str]:
+    lines = []
+    if len(planets) == 1:
+        order_max = order_max or 25
+        axis = _build_body(planets[0])['axis']
+        for i in range(1, order_max + 1):
+            for j in range(1, order_max + 1):
+                if Fraction(i, j).numerator == i:
+                    lines.append(_build_line_data([i, -j, 0, j - i], axis * (j / i) ** (2/3)))
+        return lines
+
+    order_max = order_max or 7
+    for i in range(1, 9):
+        for j in range(-order_max, order_max + 1):
+            for k in range(-order_max, order_max + 1):
+                diff = -i - j - k
+                if j == 0 or k == 0 or abs(diff) >= order_max:
+                    continue
+                resonance = [i, j, k, 0, 0, diff]
+                axis = _loop_axis(resonance, planets)
+                if axis is None or axis <= _AXIS_MIN or axis_max is not None and axis >= axis_max:
+                    continue
+                lines.append(_build_line_data(resonance, axis))
+    return lines
+
+
+def test_two_body_table():
+    assert generate_resonance_table(['JUPITER'], order_max=2) == [
+        '1 -1 0 0 5.2043', '1 -2 0 1 8.2613', '2 -1 0 -1 3.2785'
+    ]
+
+
+@pytest.mark.parametrize('planets, axis_max, order_max', [
+    (['JUPITER'], None, None),
+    (['SATURN'], None, 7),
+    (['JUPITER', 'SATURN'], None, None),
+    (['JUPITER', 'SATURN'], 3.5, 5),
+    (['JUPITER', 'MARS'], 4., 4),
+])
+def test_table_equals_loop(planets: List[str], axis_max: float, order_max: int):
+    assert generate_resonance_table(planets, axis_max, order_max) == \
+        _loop_table(planets, axis_max, order_max)
+
+
+def test_table_copies():
+    table = generate_resonance_table(['JUPITER'], order_max=2)
+    table.clear()
+    assert len(generate_resonance_table(['JUPITER'], order_max=2)) == 3
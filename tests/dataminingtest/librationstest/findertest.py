@@ -0,0 +1,52 @@
+from typing import List, Dict
+
+import numpy as np
+import pytest
+
+from resonances.datamining.librations.finder import CirculationYearsFinder
+from resonances.datamining.librations.finder import NoPhaseException
+from resonances.datamining.librations.finder import VectorCirculationYearsFinder
+from resonances.datamining.librations.finder import split_phases
+from tests.dataminingtest import VALUES
+from tests.dataminingtest import RESONANCE_ID
+
+
+@pytest.mark.parametrize('phase_arguments, result_years, for_apocentric', VALUES)
+def test_getting_years(phase_arguments: List[Dict], result_years: List[float],
+                       for_apocentric: bool):
+    years, phases = split_phases(phase_arguments)
+    finder = VectorCirculationYearsFinder(RESONANCE_ID, for_apocentric, years, phases)
+    if result_years is None:
+        with pytest.raises(NoPhaseException):
+            finder.get_time_breaks()
+    else:
+        assert finder.get_time_breaks() == result_years
+
+
+def _random_phases(seed: int, count: int) -> List[Dict[str, float]]:
+    random = np.random.RandomState(seed)
+    steps = random.normal(scale=random.uniform(0.1, 2.), size=count)
+    values = np.mod(np.cumsum(steps), 2 * np.pi)
+    values[values > np.pi] -= 2 * np.pi
+    values[random.randint(0, count, size=count // 50)] = 0.
+    return [{'year': i * 3., 'value': x} for i, x in enumerate(values)]
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('for_apocentric', [False, True])
+def test_same_breaks(seed: int, for_apocentric: bool):
+    serialized_phases = _random_phases(seed, 2000)
+    years, phases = split_phases(serialized_phases)
+    finder = CirculationYearsFinder(RESONANCE_ID, for_apocentric, serialized_phases)
+    vector_finder = VectorCirculationYearsFinder(RESONANCE_ID, for_apocentric, years, phases)
+    assert vector_finder.get_time_breaks() == finder.get_time_breaks()
+
+
+def test_split_phases():
+    serialized_phases = _random_phases(0, 10)
+    years, phases = split_phases(serialized_phases)
+    matrix = np.column_stack([years, phases])
+    matrix_years, matrix_phases = split_phases(matrix)
+    assert np.may_share_memory(matrix_years, matrix) and np.may_share_memory(matrix_phases, matrix)
+    assert matrix_years.tolist() == years.tolist()
+    assert matrix_phases.tolist() == phases.tolist()
@@ -0,0 +1,44 @@
+from unittest import mock
+
+import pytest
+from resonances.datamining import LibrationSink
+from resonances.entities import BodyNumberEnum
+
+from resonances.datamining.librations import sink as sink_module
+
+ROWS = [(1, [10., 20.], False, 5., 40.), (2, [], True, None, None), (3, [1.], False, 1., 1.)]
+
+
+@pytest.mark.parametrize('batch_size, saved_counts', [
+    (1, [1, 1, 1]), (2, [2, 1]), (10, [3])
+])
+def test_add_rows(batch_size, saved_counts):
+    sink = LibrationSink(BodyNumberEnum.three, batch_size=batch_size)
+    with mock.patch('%s.save_libration_rows' % sink_module.__name__) as save_mock:
+        for row in ROWS:
+            sink.add_rows([row])
+        sink.flush()
+        calls = [x for x in save_mock.call_args_list if x[0][0]]
+        assert [len(x[0][0]) for x in calls] == saved_counts
+        assert sum([x[0][0] for x in calls], []) == ROWS
+        assert all(x[0][1] == BodyNumberEnum.three for x in calls)
+        save_mock.reset_mock()
+        sink.flush()
+        assert save_mock.call_args[0][0] == []
+
+
+def test_add():
+    libration = mock.Mock(circulation_breaks=[1., 2.], is_apocentric=True, average_delta=3.,
+                          percentage=4.)
+    resonance = mock.Mock(id=5)
+    sink = LibrationSink(BodyNumberEnum.three)
+    with mock.patch('%s.session' % sink_module.__name__) as session_mock, \
+            mock.patch('%s.set_committed_value' % sink_module.__name__) as set_mock, \
+            mock.patch('%s.save_libration_rows' % sink_module.__name__) as save_mock:
+        session_mock.__contains__ = mock.Mock(return_value=True)
+        sink.add(resonance, libration)
+        session_mock.expunge.assert_called_once_with(libration)
+        set_mock.assert_called_once_with(resonance, 'libration', None)
+        sink.flush()
+        save_mock.assert_called_once_with([(5, [1., 2.], True, 3., 4.)], BodyNumberEnum.three,
+                                          None)
@@ -1,12 +1,18 @@
 from math import radians
 from os.path import join as opjoin
+from unittest import mock
 
+import numpy as np
 import pytest
 from resonances.datamining import OrbitalElementSet
 from resonances.datamining import OrbitalElementSetCollection
 
 from resonances.datamining.orbitalelements.collection import AEIValueError
 from resonances.settings import Config
+from resonances.shortcuts import read_aei
+from resonances import cache
+
+JUPITER_PATH = opjoin(Config.get_project_dir(), 'tests', 'fixtures', 'mercury', 'JUPITER.aei')
 
 
 @pytest.fixture()
@@ -57,3 +63,35 @@ def test_serialize_as_asteroid(data, serialized_string):
 ])
 def test_serialize_as_planet(data, serialized_string):
     assert OrbitalElementSet(data).serialize_as_planet() == serialized_string
+
+
+def test_longitudes(tmpdir):
+    with mock.patch('resonances.cache.CACHE_DIR', str(tmpdir)):
+        collection = OrbitalElementSetCollection(JUPITER_PATH)
+    elems = collection.orbital_elements
+    assert collection.times.tolist() == elems['Time (years)'].tolist()
+    assert collection.p_longitudes[1] == radians(elems['long'][1])
+    assert collection.m_longitudes[1] == radians(elems['long'][1]) + radians(elems['M'][1])
+    assert collection.m_longitudes is collection.m_longitudes
+    with pytest.raises(ValueError):
+        collection.p_longitudes[0] = 0.
+
+
+def test_aei_cache(tmpdir):
+    with mock.patch('resonances.cache.CACHE_DIR', str(tmpdir)):
+        assert cache.load_aei(JUPITER_PATH) is None
+        parsed = read_aei(JUPITER_PATH)
+        assert isinstance(cache.load_aei(JUPITER_PATH), np.memmap)
+        cached = read_aei(JUPITER_PATH)
+        assert isinstance(cached.values, np.ndarray)
+        assert cached.equals(parsed)
+        assert len(tmpdir.listdir()) == 1
+
+
+def test_aei_cache_dtype(tmpdir):
+    with mock.patch('resonances.cache.CACHE_DIR', str(tmpdir)), \
+            mock.patch('resonances.cache.AEI_DTYPE', np.dtype(np.float32)):
+        parsed = read_aei(JUPITER_PATH)
+        cached = read_aei(JUPITER_PATH)
+        assert (parsed.dtypes == np.float32).all()
+        assert cached.equals(parsed)
@@ -10,6 +10,8 @@ from resonances.datamining import IOrbitalElementSetFacade
 from resonances.datamining import PhaseCountException
 from resonances.datamining import ResonanceOrbitalElementSetFacade
 from resonances.datamining import AsteroidElementCountException
+from resonances.datamining import ResonantPhaseEngine
+from resonances.datamining import build_coefficient_matrix
 
 from resonances.entities import ThreeBodyResonance
 from resonances.entities.body import Asteroid
@@ -208,3 +210,41 @@ def _test_get_resonant_phases_raise(aei_data, facade: ResonanceOrbitalElementSet
     with pytest.raises(AsteroidElementCountException):
         for item in facade.get_resonant_phases(aei_data):
             pass
+
+
+def _build_resonance_with(first_long: int, second_long: int, long: int, peri: int):
+    resonance = _build_resonance()
+    type(resonance).get_big_bodies = mock.MagicMock(return_value=[
+        _build_planet(first_long), _build_planet(second_long)])
+    type(resonance).small_body = mock.PropertyMock(return_value=_build_asteroid(long, peri))
+    return resonance
+
+
+def test_phase_engine():
+    resonances = [
+        _build_resonance_with(4, -2, -1, 2),
+        _build_resonance_with(1, 1, -1, -1),
+        _build_resonance_with(7, -2, -3, -2),
+    ]
+    first_planet_elems = build_elem_set(['5.203 0.048', '3.203 0.037', '7.913 0.049'])
+    second_planet_elems = build_elem_set(['9.578 0.054', '8.511 0.044', '6.070 0.041'])
+    planet_elems = build_orbital_collection_set([first_planet_elems, second_planet_elems])
+
+    vals = [x.split() for x in [first_aei_data(), second_aei_data(), third_aei_data()]]
+    aei_data = pd.DataFrame(
+        [d[:6] + [d[7]] for d in vals],
+        columns=['Time (years)', 'long', 'M', 'a', 'e', 'i', 'node'],
+        dtype=float
+    )
+
+    coefficients = build_coefficient_matrix(resonances)
+    assert coefficients.tolist() == [[4, 0, -2, 0, -1, 2], [1, 0, 1, 0, -1, -1],
+                                     [7, 0, -2, 0, -3, -2]]
+    phases = ResonantPhaseEngine(planet_elems).get_resonant_phases(aei_data, coefficients)
+    assert phases.shape == (3, 3)
+    assert np.isclose(phases[0], [-2.87358243274, -0.88372908443, 1.5333412318]).all()
+    for resonance, resonance_phases in zip(resonances, phases):
+        facade = ResonanceOrbitalElementSetFacade(planet_elems, resonance)
+        etalon = [y for x, y in facade.get_resonant_phases(aei_data)]
+        assert np.isclose(resonance_phases, etalon).all()
+        assert (resonance_phases <= np.pi).all() and (resonance_phases > -np.pi).all()
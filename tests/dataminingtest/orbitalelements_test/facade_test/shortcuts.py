@@ -7,9 +7,21 @@ from resonances.datamining import OrbitalElementSet
 from resonances.datamining import OrbitalElementSetCollection
 from tests.shortcuts import get_class_path
 
+import numpy as np
 import pandas as pd
 
 
+def _set_longitudes(mock_obj, orbital_elements):
+    if type(orbital_elements) != pd.DataFrame:
+        return
+    p_longitudes = np.radians(orbital_elements['long'].values)
+    m_longitudes = p_longitudes + np.radians(orbital_elements['M'].values)
+    type(mock_obj).m_longitudes = mock.PropertyMock(return_value=m_longitudes)
+    type(mock_obj).p_longitudes = mock.PropertyMock(return_value=p_longitudes)
+    type(mock_obj).times = mock.PropertyMock(
+        return_value=orbital_elements['Time (years)'].values)
+
+
 def build_orbital_collection(property_mock_values: List) \
         -> List[OrbitalElementSetCollection]:
     """
@@ -43,6 +55,8 @@ def build_orbital_collection(property_mock_values: List) \
                 type(second_elems).__getitem__ = mock.MagicMock(
                     return_value=property_mock_values[1][0])
 
+            _set_longitudes(first_elems, property_mock_values[0])
+            _set_longitudes(second_elems, property_mock_values[1])
             return [first_elems, second_elems]
 
 
@@ -74,6 +88,8 @@ def build_orbital_collection_set(property_mock_values: List) \
             type(second_elems).__len__ = mock.MagicMock(return_value=len(property_mock_values[1]))
             type(second_elems).__getitem__ = mock.MagicMock(side_effect=_second_get_item)
 
+            _set_longitudes(first_elems, property_mock_values[0])
+            _set_longitudes(second_elems, property_mock_values[1])
             return [first_elems, second_elems]
 
 
@@ -0,0 +1,72 @@
+import tarfile
+from os.path import join as opjoin
+from unittest import mock
+
+import pytest
+
+from resonances.datamining.orbitalelements import FilepathBuilder
+from resonances.datamining.orbitalelements import asteroid_aei_gen
+from resonances.datamining.orbitalelements import FilepathException
+from resonances.datamining.orbitalelements import get_tar_index
+from resonances.settings import Config
+from resonances.shortcuts import read_aei
+
+FIXTURES = opjoin(Config.get_project_dir(), 'tests', 'fixtures', 'mercury')
+NAMES = ['A1.aei', 'A2.aei', 'JUPITER.aei', 'SATURN.aei']
+
+
+def _read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(params=['w', 'w:gz'])
+def archive(request, tmpdir):
+    tarpath = str(tmpdir.join('aei.tar'))
+    with tarfile.open(tarpath, request.param) as tar:
+        for name in NAMES:
+            tar.add(opjoin(FIXTURES, name), arcname=opjoin('aei', name))
+    patcher = mock.patch('resonances.cache.CACHE_DIR', str(tmpdir.join('cache')))
+    patcher.start()
+    request.addfinalizer(patcher.stop)
+    return tarpath
+
+
+def test_tar_index(archive):
+    index = get_tar_index(archive)
+    assert sorted(index) == NAMES
+    assert index['A1.aei'][0] == 'aei/A1.aei'
+    with mock.patch('resonances.datamining.orbitalelements.taropen') as taropen:
+        assert get_tar_index(archive) == index
+        assert not taropen.called
+
+
+def test_build_from_tar(archive, tmpdir):
+    extract_path = str(tmpdir.join('extract'))
+    builder = FilepathBuilder([archive], extract_path=extract_path)
+    for name in reversed(NAMES):
+        path = builder.build(name)
+        assert path == opjoin(extract_path, 'aei', name)
+        assert _read(path) == _read(opjoin(FIXTURES, name))
+
+    with pytest.raises(FilepathException):
+        builder.build('A3.aei')
+
+
+def test_extract(archive, tmpdir):
+    extract_path = str(tmpdir.join('extract'))
+    builder = FilepathBuilder([archive], extract_path=extract_path)
+    names = ['SATURN.aei', 'A3.aei', 'A1.aei']
+    extracted = dict(builder.extract(names))
+    assert sorted(extracted) == ['A1.aei', 'SATURN.aei']
+    for name, path in extracted.items():
+        assert _read(path) == _read(opjoin(FIXTURES, name))
+    assert list(builder.extract(names)) == []
+
+
+def test_asteroid_aei_gen(archive):
+    names = []
+    for name, aei_data in asteroid_aei_gen(archive):
+        names.append(name)
+        assert aei_data.equals(read_aei(opjoin(FIXTURES, '%s.aei' % name), False))
+    assert names == ['A1', 'A2']
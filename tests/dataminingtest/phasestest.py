@@ -0,0 +1,146 @@
+from os.path import exists as opexists
+from os.path import join as opjoin
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from resonances.commands import migrate_phases
+from resonances.datamining import PhaseCleaner
+from resonances.datamining import PhaseLoader
+from resonances.datamining import PhaseStorage
+from resonances.datamining import get_binary_file_name
+from resonances.datamining import get_file_name
+from resonances.datamining.phases import PhaseBuilder
+from resonances.datamining.phases import load_binary
+from resonances.datamining.phases import pack_phases
+from resonances.datamining.phases import unpack_phases
+from resonances.datamining.phases import save_binary
+from resonances.datamining.phases import _save_file
+
+YEARS = [0., 3., 6., 9., 12.]
+VALUES = [-0.51, 0.87, 2.37, -2.51, 1.51]
+
+
+@pytest.fixture
+def phase_dir(request, tmpdir):
+    patcher = mock.patch('resonances.datamining.phases.PHASE_DIR', str(tmpdir))
+    patcher.start()
+    request.addfinalizer(patcher.stop)
+    return str(tmpdir)
+
+
+@pytest.mark.parametrize('dtype, is_delta_years', [
+    (np.float64, False), (np.float64, True), (np.float32, False), (np.float32, True)
+])
+def test_binary(dtype: np.dtype, is_delta_years: bool, tmpdir):
+    filename = opjoin(str(tmpdir), 'phases', 'phase:1.npy')
+    save_binary(YEARS, VALUES, filename, dtype, is_delta_years)
+    years, values = load_binary(filename)
+    assert years.tolist() == YEARS
+    assert np.allclose(values, VALUES, atol=1e-6)
+    assert isinstance(values, np.memmap)
+
+
+def test_loader_and_cleaner(phase_dir):
+    save_binary(YEARS, VALUES, get_binary_file_name(1))
+    assert PhaseLoader(PhaseStorage.binary).load(1).tolist() == VALUES
+    PhaseCleaner(PhaseStorage.binary).delete(1)
+    assert not opexists(get_binary_file_name(1))
+
+
+@pytest.mark.parametrize('is_removing', [False, True])
+def test_migrate_phases(is_removing: bool, phase_dir):
+    _save_file([dict(year=x, value=y) for x, y in zip(YEARS, VALUES)], get_file_name(1))
+    migrate_phases((phase_dir,), is_removing)
+    years, values = load_binary(get_binary_file_name(1))
+    assert years.tolist() == YEARS
+    assert values.tolist() == VALUES
+    assert opexists(get_file_name(1)) != is_removing
+
+
+@pytest.mark.parametrize('is_compressed', [False, True])
+def test_pack_phases(is_compressed: bool):
+    years, values = unpack_phases(pack_phases(YEARS, VALUES, is_compressed))
+    assert years.tolist() == YEARS
+    assert values.tolist() == VALUES
+
+
+class _RedisPipeline:
+    def __init__(self, data: dict):
+        self._data = data
+        self._commands = []
+
+    def type(self, key):
+        self._commands.append(lambda: (b'list' if isinstance(self._data.get(key), list) else
+                                       b'string' if key in self._data else b'none'))
+
+    def get(self, key):
+        self._commands.append(lambda: self._data.get(key))
+
+    def lrange(self, key, start, stop):
+        self._commands.append(lambda: self._data[key][start:None if stop == -1 else stop + 1])
+
+    def set(self, key, value):
+        self._commands.append(lambda: self._data.__setitem__(key, value))
+
+    def execute(self):
+        res = [x() for x in self._commands]
+        self._commands.clear()
+        return res
+
+
+@pytest.fixture
+def redis_data(request):
+    data = {}
+    redis = mock.MagicMock()
+    redis.pipeline.side_effect = lambda *args, **kwargs: _RedisPipeline(data)
+    patcher = mock.patch('resonances.datamining.phases.REDIS', redis)
+    patcher.start()
+    request.addfinalizer(patcher.stop)
+    return data
+
+
+def test_redis(redis_data: dict):
+    facade = mock.MagicMock()
+    facade.get_resonant_phases.return_value = np.column_stack([YEARS, VALUES])
+    builder = PhaseBuilder(PhaseStorage.redis)
+    builder.build(None, 1, facade)
+    assert not redis_data
+    builder.flush()
+    assert redis_data['phase:1'] == pack_phases(YEARS, VALUES)
+
+    redis_data['phase:2'] = [('%s' % dict(year=x, value=y)).encode('utf-8')
+                             for x, y in zip(YEARS, VALUES)]
+    phases = PhaseLoader(PhaseStorage.redis).load_many([1, 2, 3])
+    assert phases[1].tolist() == VALUES
+    assert phases[2] == VALUES
+    assert phases[3] == []
+
+
+def test_db_copy():
+    facade = mock.MagicMock()
+    facade.get_resonant_phases.return_value = np.column_stack([YEARS, VALUES])
+    builder = PhaseBuilder(PhaseStorage.db)
+    conn = mock.MagicMock()
+    conn.dialect.name = 'postgresql'
+    cursor = conn.connection.cursor.return_value
+    cursor.copy_expert.side_effect = lambda query, buffer: copied.append(buffer.read())
+    copied = []
+    with mock.patch('resonances.datamining.phases.transaction') as transaction:
+        transaction.return_value.__enter__.return_value = conn
+        builder.build(None, 1, facade)
+        builder.build(None, 2, facade)
+        assert not copied
+        builder.flush(conn)
+
+    transaction.assert_called_once_with(conn)
+    delete_q = conn.execute.call_args[0][0]
+    assert str(delete_q.compile(compile_kwargs={'literal_binds': True})) == \
+        'DELETE FROM phase WHERE phase.resonance_id IN (1, 2)'
+    assert cursor.copy_expert.call_args[0][0] == 'COPY phase (resonance_id, year, value) FROM STDIN'
+    rows = [x.split('\t') for x in copied[0].splitlines()]
+    assert len(rows) == 2 * len(YEARS)
+    assert [int(x[0]) for x in rows] == [1] * len(YEARS) + [2] * len(YEARS)
+    assert [float(x[1]) for x in rows] == YEARS * 2
+    assert [float(x[2]) for x in rows] == VALUES * 2
@@ -4,6 +4,12 @@ from typing import List
 import pytest
 from resonances.datamining import get_resonances
 from resonances.datamining import get_resonances_by_asteroids
+from resonances.datamining import expunge_resonances
+from resonances.entities import ProgressOutcome
+from resonances.entities import ResonanceProgress
+from resonances.entities import get_planets_key
+from resonances.entities.dbutills import engine
+from resonances.entities.dbutills import session
 
 from .conftest import fixture_base
 
@@ -24,6 +30,43 @@ def test_asteroid_numbers(resonancesfixture, start: int, stop: int, fixture_inde
     assert counter == len(fixture_indexes)
 
 
+def test_streaming(resonancesfixture):
+    asteroid_nums, planets = resonancesfixture
+    ids = [x.id for x in get_resonances(1, 10 ** 5, False, planets)]
+    resonances = list(get_resonances(1, 10 ** 5, False, planets, is_streaming=True))
+    assert [x.id for x in resonances] == ids
+    last_asteroids = [x.small_body_id for x in resonances][-1:]
+    last_asteroids += [x.small_body_id for x in resonances if x.small_body_id not in
+                       last_asteroids][-1:]
+    for resonance in resonances:
+        assert (resonance in session) == (resonance.small_body_id in last_asteroids)
+    expunge_resonances(resonances)
+    for resonance in resonances:
+        assert resonance not in session
+        assert resonance.small_body not in session
+        assert resonance.small_body.name == 'A%i' % resonance.asteroid_number
+        assert [x.name for x in resonance.get_big_bodies()] == list(planets)
+        assert resonance.libration is None
+
+
+def test_resuming(resonancesfixture):
+    asteroid_nums, planets = resonancesfixture
+    resonances = list(get_resonances(1, 10 ** 5, False, planets))
+    processed = resonances[:2]
+    table = ResonanceProgress.__table__
+    conn = engine.connect()
+    conn.execute(table.insert().values([
+        dict(asteroid_name=x.small_body.name, planets=get_planets_key(planets), resonance_id=x.id,
+             outcome=ProgressOutcome.determined.value) for x in processed
+    ] + [dict(asteroid_name='A1', planets='MARS', resonance_id=resonances[2].id,
+              outcome=ProgressOutcome.broken.value)]))
+    try:
+        ids = [x.id for x in get_resonances(1, 10 ** 5, False, planets, is_resuming=True)]
+        assert ids == [x.id for x in resonances[2:]]
+    finally:
+        conn.execute(table.delete())
+
+
 def test_ordering(resonancesfixture):
     asteroid_nums, planets = resonancesfixture
     max_asteroid_num = 0
@@ -72,3 +115,40 @@ def test_get_resonances_by_asteroids(resonancesfixture, integers: List[str],
             assert resonance.second_body.longitude_coeff == control_integers[1]
             assert resonance.small_body.longitude_coeff == control_integers[2]
     assert count == control_count
+
+
+def test_find_streamed_resonances(resonancesfixture):
+    import pandas as pd
+    from unittest import mock
+    from resonances.commands import LibrationFinder
+    from resonances.commands import find as find_module
+    from resonances.datamining.librations import librationbuilder
+    from resonances.entities import Libration
+
+    asteroid_nums, planets = resonancesfixture
+    finder = LibrationFinder(planets, False, True, False)
+    aei_data = pd.DataFrame([[0.]])
+    resonances_data = ((x, aei_data) for x in
+                       get_resonances(1, 10 ** 5, False, planets, is_streaming=True))
+    # frequent circulations, so resonances have no libration.
+    circulation_finder = mock.Mock()
+    circulation_finder.get_time_breaks.return_value = [float(x) for x in range(10, 10 ** 5, 10)]
+    phase_engine = mock.Mock()
+    phase_engine.get_resonant_phases.side_effect = lambda x, y: [None] * len(y)
+    table = ResonanceProgress.__table__
+    conn = engine.connect()
+    try:
+        with mock.patch.object(find_module, 'ResonantPhaseEngine', return_value=phase_engine), \
+                mock.patch.object(find_module, 'build_coefficient_matrix', lambda x: x), \
+                mock.patch.object(find_module, 'PhaseBuilder'), \
+                mock.patch.object(find_module, 'ResonanceOrbitalElementSetFacade'), \
+                mock.patch.object(librationbuilder._AbstractLibrationBuilder, '_get_finder',
+                                  return_value=circulation_finder):
+            finder._find(resonances_data, 0, [])
+
+        assert not session.query(Libration).count()
+        outcomes = [x.outcome for x in conn.execute(table.select())]
+        assert len(outcomes) == len(asteroid_nums) * 2
+        assert set(outcomes) == {ProgressOutcome.not_determined.value}
+    finally:
+        conn.execute(table.delete())
@@ -1,6 +1,9 @@
 from resonances.entities.dbutills import OnConflictInsert
 from resonances.entities.body import BrokenAsteroid
 from resonances.entities.dbutills import engine
+from resonances.entities.dbutills import pool_metrics
+from resonances.entities.dbutills import transaction
+from unittest import mock
 from sqlalchemy.sql import select
 from sqlalchemy.sql import func
 import pytest
@@ -29,3 +32,35 @@ def test_on_conflict(fixture):
     sel = select([func.count()]).select_from(table).where(table.c.name == 'qwe')
     result = conn.execute(sel).scalar()
     assert result == 1
+
+
+@mock.patch('resonances.entities.dbutills.engine')
+def test_transaction(engine_mock):
+    conn = engine_mock.connect.return_value
+    wait_time = pool_metrics.wait_time
+    with transaction() as opened_conn:
+        assert opened_conn is conn
+    conn.begin.return_value.commit.assert_called_once_with()
+    conn.close.assert_called_once_with()
+    assert pool_metrics.wait_time >= wait_time
+
+
+@mock.patch('resonances.entities.dbutills.engine')
+def test_transaction_rollback(engine_mock):
+    conn = engine_mock.connect.return_value
+    with pytest.raises(ValueError):
+        with transaction():
+            raise ValueError()
+    conn.begin.return_value.rollback.assert_called_once_with()
+    assert not conn.begin.return_value.commit.called
+    conn.close.assert_called_once_with()
+
+
+@mock.patch('resonances.entities.dbutills.engine')
+def test_transaction_of_pointed_connection(engine_mock):
+    conn = mock.MagicMock()
+    with transaction(conn) as opened_conn:
+        assert opened_conn is conn
+    assert not engine_mock.connect.called
+    conn.begin.return_value.commit.assert_called_once_with()
+    assert not conn.close.called
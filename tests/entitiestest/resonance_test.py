@@ -5,6 +5,7 @@ from unittest import mock
 import pytest
 from resonances.entities import BodyNumberEnum
 from resonances.entities import ThreeBodyResonance, build_resonance
+from resonances.entities import build_resonances
 from resonances.entities import get_resonance_factory, ResonanceFactory, TwoBodyResonance
 from resonances.entities.dbutills import session, engine
 from sqlalchemy import and_, Table
@@ -17,6 +18,7 @@ from resonances.entities.body import LONG_COEFF
 from resonances.entities.body import PERI
 from resonances.entities.body import PERI_COEFF
 from resonances.entities.body import Planet
+from resonances.entities.body import get_asteroid_number
 from resonances.shortcuts import cutoff_angle
 from tests.shortcuts import TARGET_TABLES, clear_resonance_finalizer
 from tests.shortcuts import get_class_path
@@ -138,7 +140,7 @@ def test_build_resonance(input_values: List[str], asteroid_num: int, asteroid_in
             assert getattr(resonances[0], foreign) == planet
 
         asteroids = asteroid_q.all()  # type: List[Asteroid]
-        _check(asteroids[0], {'name': 'A%i' % asteroid_num,
+        _check(asteroids[0], {'name': 'A%i' % asteroid_num, 'number': asteroid_num,
                               LONG_COEFF: int(input_values[asteroid_indicies[0]]),
                               PERI_COEFF: int(input_values[asteroid_indicies[1]])})
         assert asteroids[0].axis == float(input_values[asteroid_indicies[2]])
@@ -150,6 +152,13 @@ def test_build_resonance(input_values: List[str], asteroid_num: int, asteroid_in
     _check_bodies()
 
 
+@pytest.mark.parametrize('name, number', [
+    ('A1', 1), ('A490', 490), ('A2004A111', None), ('A', None), ('A12a', None)
+])
+def test_get_asteroid_number(name: str, number: int):
+    assert get_asteroid_number(name) == number
+
+
 def _check(body, by_values: Dict):
     for key, value in by_values.items():
         assert getattr(body, key) == value
@@ -263,3 +272,21 @@ def test_three_body_resonance_count(line_data: List[str], next_line_data: List[s
                                     _constraint_fixture):
     _create_two_resonances(line_data, next_line_data, planets)
     assert session.query(ThreeBodyResonance).count() == resonance_count
+
+
+@pytest.mark.parametrize('lines, planets, asteroid_count, planet_count', [
+    ([JUPITER_INTS, JUPITER_INTS, '1 2 0 -5 3.5083'.split()], ('JUPITER',), 2, 1),
+    ([JUPITER_SATURN_INTS, '1 2 1 0 0 -3 4.1509'.split(), JUPITER_SATURN_INTS],
+     ('JUPITER', 'SATURN'), 1, 3),
+])
+def test_build_resonances(lines: List[List[str]], planets: Tuple, asteroid_count: int,
+                          planet_count: int, _constraint_fixture):
+    factories = [get_resonance_factory(planets, x, 1) for x in lines]
+    resonance_ids = build_resonances(factories)
+    assert resonance_ids[0] == resonance_ids[-1]
+    assert len(set(resonance_ids)) == 2
+    assert resonance_ids == build_resonances(factories)
+    assert resonance_ids[1] == build_resonance(factories[1])
+    assert session.query(Asteroid).count() == asteroid_count
+    assert session.query(Planet).count() == planet_count
+    assert session.query(factories[0].resonance_cls).count() == 2
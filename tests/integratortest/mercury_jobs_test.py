@@ -0,0 +1,86 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from os.path import exists as opexists
+from os.path import join as opjoin
+
+from resonances.settings import Config
+
+CONFIG = Config.get_params()
+PROJECT_DIR = Config.get_project_dir()
+INTEGRATOR_DIR = opjoin(PROJECT_DIR, CONFIG['integrator']['dir'])
+
+MERCURY_STUB = """#!/bin/sh
+test -f param.in -a -f big.in || exit 1
+for name in $(awk '/ ep=/ {print $1}' small.in); do pwd > $name.aei; done
+"""
+FAILED_STUB = """#!/bin/sh
+exit 1
+"""
+ELEMENT_STUB = """#!/bin/sh
+exit 0
+"""
+
+
+def _write_program(name: str, text: str):
+    path = opjoin(INTEGRATOR_DIR, name)
+    with open(path, 'w') as f:
+        f.write(text)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+def _get_blocks(count: int, size: int):
+    elements = [0., 2.5, 0.1, 3., 10., 20., 30., 15.]
+    return [[('%i' % (i * size + j + 1), elements) for j in range(size)] for i in range(count)]
+
+
+class MercuryJobsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.aei_path = tempfile.mkdtemp()
+        _write_program('element6', ELEMENT_STUB)
+
+    def tearDown(self):
+        shutil.rmtree(self.aei_path)
+        for name in ['mercury6', 'element6']:
+            if opexists(opjoin(INTEGRATOR_DIR, name)):
+                os.remove(opjoin(INTEGRATOR_DIR, name))
+
+    def test_integrate_parallel(self):
+        from resonances.commands.calc import _integrate_parallel
+        _write_program('mercury6', MERCURY_STUB)
+        _integrate_parallel(iter(_get_blocks(5, 3)), 2, self.aei_path)
+
+        names = sorted(os.listdir(self.aei_path))
+        self.assertEqual(names, sorted('A%i.aei' % (x + 1) for x in range(15)))
+        scratch_paths = set()
+        for name in names:
+            with open(opjoin(self.aei_path, name)) as f:
+                scratch_paths.add(f.read().strip())
+        self.assertEqual(len(scratch_paths), 2)
+        for path in scratch_paths:
+            self.assertNotEqual(path, INTEGRATOR_DIR)
+            self.assertFalse(opexists(path))
+
+    def test_reused_block(self):
+        from resonances.commands.calc import _integrate_parallel
+        _write_program('mercury6', MERCURY_STUB)
+
+        def _gen():
+            block = []
+            for data in _get_blocks(3, 2):
+                block += data
+                yield block
+                block.clear()
+
+        _integrate_parallel(_gen(), 3, self.aei_path)
+        self.assertEqual(len(os.listdir(self.aei_path)), 6)
+
+    def test_failed_job(self):
+        from resonances.commands.calc import _integrate_parallel
+        from resonances.commands.calc import MercuryException
+        _write_program('mercury6', FAILED_STUB)
+        with self.assertRaises(MercuryException):
+            _integrate_parallel(iter(_get_blocks(3, 2)), 2, self.aei_path)
+        self.assertFalse(os.listdir(self.aei_path))
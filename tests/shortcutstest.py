@@ -0,0 +1,37 @@
+from operator import eq, ge, lt, ne
+
+import pytest
+from sqlalchemy.orm import Query
+
+from resonances.entities.body import Asteroid, Planet
+from resonances.shortcuts import IntegerExpressionException
+from resonances.shortcuts import add_integer_filter
+from resonances.shortcuts import parse_integer_expression
+
+
+@pytest.mark.parametrize('expression, conditions', [
+    ('*', ()),
+    ('>=3', ((ge, 3),)),
+    ('==-1', ((eq, -1),)),
+    ('>=3<5', ((ge, 3), (lt, 5))),
+    (' >= 3 < 5 ', ((ge, 3), (lt, 5))),
+    ('!=0', ((ne, 0),)),
+])
+def test_parse_integer_expression(expression, conditions):
+    assert parse_integer_expression(expression) == conditions
+
+
+@pytest.mark.parametrize('expression', ['', '3', '=3', '>=', '>=3;', '>=3 or 1', '**'])
+def test_parse_wrong_integer_expression(expression):
+    with pytest.raises(IntegerExpressionException):
+        parse_integer_expression(expression)
+
+
+def test_add_integer_filter():
+    query = add_integer_filter(Query([Planet.id]), ['>=3<5', '*', '==-1'],
+                               [Planet, Planet, Asteroid])
+    compiled = query.statement.compile()
+    assert 'planet.longitude_coeff >= :longitude_coeff_1' in str(compiled)
+    assert 'planet.longitude_coeff < :longitude_coeff_2' in str(compiled)
+    assert 'asteroid.longitude_coeff = :longitude_coeff_3' in str(compiled)
+    assert sorted(compiled.params.values()) == [-1, 3, 5]